@@ -0,0 +1,197 @@
+"""
+Benchmark of get_or_fetch_cache (src.utils.redis_client) against the read-through it replaced.
+
+`--workers` processes, each with `--callers` concurrent callers, read one key whose
+fetch takes `--fetch-ms`. Two scenarios run, once per implementation:
+
+    cold   the key is missing and every caller asks for it at the same instant
+    hot    callers keep reading for `--duration` seconds while the key expires every `--ttl`
+
+    legacy  GET, on a miss fetch + SET + verifying GET, no coordination between callers
+    xfetch  the current get_or_fetch_cache: fill lock, one pipelined write, early refresh
+
+For each it reports requests served, upstream fetches, redis round trips (commands
+sent on their own plus pipeline executions) and p50/p99 latency. The L1 is not started,
+so every read goes to redis. Needs redis in REDIS_URL, keys are written under bench:cache:.
+
+    python -m benchmarks.cache --workers 4 --callers 50 --ttl 2 --duration 20 --output cache.json
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, List
+
+from benchmarks.load import configure_env, percentile
+
+
+ROUND_TRIPS = {"round_trips": 0}
+
+
+def count_round_trips():
+    """Patches redis-py so every command sent alone and every pipeline execution is counted."""
+    from redis.asyncio.client import Pipeline, Redis
+
+    counts = ROUND_TRIPS
+    send_command = Redis.execute_command
+    send_pipeline = Pipeline.execute
+
+    async def execute_command(self, *args, **options):
+        counts["round_trips"] += 1
+        return await send_command(self, *args, **options)
+
+    async def execute(self, *args, **kwargs):
+        counts["round_trips"] += 1
+        return await send_pipeline(self, *args, **kwargs)
+
+    Redis.execute_command = execute_command
+    Pipeline.execute = execute
+
+
+async def legacy_get_or_fetch_cache(key: str, fetch_callback, ttl: int):
+    from src.utils.redis_client import get_redis
+
+    redis = await get_redis()
+    cached = await redis.get(key)
+    if cached:
+        return json.loads(cached)
+    fresh = await fetch_callback()
+    await redis.set(key, json.dumps(fresh), ex=ttl)
+    if not await redis.get(key):
+        raise RuntimeError(f"Failed to cache data for key {key}")
+    return fresh
+
+
+async def worker(settings: Dict) -> Dict:
+    from src.utils import redis_client
+
+    # pool processes run several scenarios, each in a new event loop that needs its own connection
+    redis_client._redis = redis_client._binary_redis = None
+    await redis_client.setup_redis()
+    fill_stats = dict(redis_client.fill_stats)
+    get = legacy_get_or_fetch_cache if settings["implementation"] == "legacy" else redis_client.get_or_fetch_cache
+    payload = "x" * settings["value_bytes"]
+    fetches = 0
+
+    async def fetch():
+        nonlocal fetches
+        fetches += 1
+        await asyncio.sleep(settings["fetch_ms"] / 1000)
+        return {"payload": payload, "fetched_at": time.time()}
+
+    latencies: List[float] = []
+    errors = 0
+
+    async def caller():
+        nonlocal errors
+        while True:
+            started = time.perf_counter()
+            try:
+                await get(settings["key"], fetch, settings["ttl"])
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+            if settings["scenario"] == "cold" or time.time() >= settings["ends_at"]:
+                return
+            await asyncio.sleep(settings["think_ms"] / 1000)
+
+    await asyncio.sleep(max(settings["starts_at"] - time.time(), 0))
+    before = ROUND_TRIPS["round_trips"]
+    await asyncio.gather(*(caller() for _ in range(settings["callers"])))
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "fetches": fetches,
+        "round_trips": ROUND_TRIPS["round_trips"] - before,
+        "latencies": latencies,
+        "fill_stats": {name: value - fill_stats[name] for name, value in redis_client.fill_stats.items()},
+    }
+
+
+def init_worker(port: int):
+    configure_env(port)
+    count_round_trips()
+
+
+def run_worker(settings: Dict) -> Dict:
+    return asyncio.run(worker(settings))
+
+
+def run_scenario(pool, args, scenario: str, implementation: str) -> Dict:
+    # every process gets a second to import before the callers start together
+    starts_at = time.time() + 1.0
+    settings = {
+        "scenario": scenario,
+        "implementation": implementation,
+        "key": f"bench:cache:{scenario}:{implementation}:{uuid.uuid4().hex[:8]}",
+        "callers": args.callers,
+        "ttl": args.ttl,
+        "fetch_ms": args.fetch_ms,
+        "think_ms": args.think_ms,
+        "value_bytes": args.value_bytes,
+        "starts_at": starts_at,
+        "ends_at": starts_at + args.duration,
+    }
+    results = pool.map(run_worker, [settings] * args.workers, chunksize=1)
+
+    latencies = sorted(latency for result in results for latency in result["latencies"])
+    requests = sum(result["requests"] for result in results)
+    round_trips = sum(result["round_trips"] for result in results)
+    summary = {
+        "scenario": scenario,
+        "implementation": implementation,
+        "requests": requests,
+        "errors": sum(result["errors"] for result in results),
+        "upstream_fetches": sum(result["fetches"] for result in results),
+        "round_trips": round_trips,
+        "round_trips_per_request": round(round_trips / requests, 3) if requests else None,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2) if latencies else None,
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2) if latencies else None,
+    }
+    if implementation == "xfetch":
+        summary["fill_stats"] = {
+            name: sum(result["fill_stats"][name] for result in results)
+            for name in results[0]["fill_stats"]
+        }
+    print(
+        f"{scenario:<5} {implementation:<7} requests={requests:<7} fetches={summary['upstream_fetches']:<5} "
+        f"round_trips={round_trips:<7} ({summary['round_trips_per_request']}/req) "
+        f"p50={summary['p50_ms']}ms p99={summary['p99_ms']}ms errors={summary['errors']}"
+    )
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="get_or_fetch_cache stampede benchmark")
+    parser.add_argument("--workers", type=int, default=4, help="processes, each stands in for an app worker")
+    parser.add_argument("--callers", type=int, default=50, help="concurrent callers per worker")
+    parser.add_argument("--ttl", type=int, default=2, help="cache ttl of the key in seconds")
+    parser.add_argument("--duration", type=float, default=20.0, help="length of the hot scenario in seconds")
+    parser.add_argument("--fetch-ms", type=float, default=100.0, help="time fetch_callback takes")
+    parser.add_argument("--think-ms", type=float, default=10.0, help="pause between a hot caller's requests")
+    parser.add_argument("--value-bytes", type=int, default=512)
+    parser.add_argument("--port", type=int, default=8090, help="only used for BASE_URL, nothing listens on it")
+    parser.add_argument("--output", default=f"cache-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    args = parser.parse_args()
+
+    runs = []
+    with multiprocessing.get_context("spawn").Pool(args.workers, init_worker, (args.port,)) as pool:
+        for scenario in ("cold", "hot"):
+            for implementation in ("legacy", "xfetch"):
+                runs.append(run_scenario(pool, args, scenario, implementation))
+
+    report = {
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "settings": vars(args),
+        "runs": runs,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2, default=str)
+    print(f"results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
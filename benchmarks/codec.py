@@ -0,0 +1,158 @@
+"""
+Benchmark of the cache value codecs (src.utils.codec) on representative payloads.
+
+Every installed codec is run with compression off and with zlib above `--threshold`
+bytes, and for each payload the median encode and decode time and the bytes that
+would be stored in redis (header included) are reported:
+
+    tokens         cached DSpace tokens of a principal (a JWT and a csrf token)
+    roles          role -> permission lists
+    group          a HAL group with its metadata and links
+    members_page   a HAL page of `--page-size` epersons
+    members_large  `--members` epersons, the biggest member list the group cache keeps
+
+Runs in process, nothing else is needed:
+
+    python -m benchmarks.codec --members 5000 --output codec.json
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List
+
+from benchmarks.fake_dspace import WORDS
+
+BASE = "https://repository.example.edu/server/api"
+
+
+def eperson(rng: random.Random) -> Dict[str, Any]:
+    eperson_id = str(uuid.UUID(int=rng.getrandbits(128)))
+    first, last = rng.choice(WORDS).title(), rng.choice(WORDS).title()
+    return {
+        "id": eperson_id,
+        "uuid": eperson_id,
+        "name": f"{first.lower()}.{last.lower()}@unical.edu.ng",
+        "handle": None,
+        "metadata": {
+            "eperson.firstname": [{"value": first, "language": None, "authority": None, "confidence": -1, "place": 0}],
+            "eperson.lastname": [{"value": last, "language": None, "authority": None, "confidence": -1, "place": 0}],
+        },
+        "netid": None,
+        "lastActive": "2026-10-01T09:30:00.000+00:00",
+        "canLogIn": True,
+        "email": f"{first.lower()}.{last.lower()}@unical.edu.ng",
+        "requireCertificate": False,
+        "selfRegistered": False,
+        "type": "eperson",
+        "_links": {
+            "groups": {"href": f"{BASE}/eperson/epersons/{eperson_id}/groups"},
+            "self": {"href": f"{BASE}/eperson/epersons/{eperson_id}"},
+        },
+    }
+
+
+def members_page(rng: random.Random, group_id: str, size: int, total: int) -> Dict[str, Any]:
+    return {
+        "_embedded": {"epersons": [eperson(rng) for _ in range(size)]},
+        "_links": {"self": {"href": f"{BASE}/eperson/groups/{group_id}/epersons?page=0&size={size}"}},
+        "page": {"size": size, "totalElements": total, "totalPages": -(-total // size), "number": 0},
+    }
+
+
+def payloads(args) -> Dict[str, Any]:
+    rng = random.Random(args.seed)
+    group_id = str(uuid.UUID(int=rng.getrandbits(128)))
+    return {
+        "tokens": {
+            "access_token": "Bearer eyJhbGciOiJIUzI1NiJ9." + "".join(rng.choice("abcdefghijklmnop") for _ in range(700)),
+            "csrf_token": str(uuid.UUID(int=rng.getrandbits(128))),
+        },
+        "roles": {
+            role: [f"{role}:{rng.choice(WORDS)}:{action}" for action in ("read", "write", "submit", "review") * 10]
+            for role in ("admin", "lecturer", "student", "librarian", "reviewer", "guest")
+        },
+        "group": {
+            "id": group_id,
+            "uuid": group_id,
+            "name": "Faculty of Science Students",
+            "permanent": False,
+            "metadata": {"dc.description": [{"value": " ".join(rng.choices(WORDS, k=40)), "language": None}]},
+            "type": "group",
+            "_links": {
+                name: {"href": f"{BASE}/eperson/groups/{group_id}/{name}"}
+                for name in ("epersons", "subgroups", "object", "self")
+            },
+        },
+        "members_page": members_page(rng, group_id, args.page_size, args.members),
+        "members_large": [eperson(rng) for _ in range(args.members)],
+    }
+
+
+def median_us(operation: Callable[[], Any], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        operation()
+        timings.append(time.perf_counter() - started)
+    return round(statistics.median(timings) * 1_000_000, 1)
+
+
+def run(args) -> List[Dict[str, Any]]:
+    from src.utils.codec import CODECS, COMPRESSED, CacheCodecs
+
+    results = []
+    data = payloads(args)
+    for codec in (codec for codec in CODECS.values() if codec.available):
+        for threshold in (0, args.threshold):
+            codecs = CacheCodecs(default=codec.name, compress_threshold=threshold, compress_level=args.level)
+            for name, value in data.items():
+                encoded = codecs.encode(name, value)
+                assert codecs.decode(encoded) == json.loads(json.dumps(value))
+                # the big payloads take milliseconds, fewer rounds keep the run short
+                repeat = max(5, min(args.repeat, int(args.repeat * 2000 / max(len(encoded), 1))))
+                result = {
+                    "payload": name,
+                    "codec": codec.name,
+                    "compressed": bool(encoded[0] & COMPRESSED),
+                    "threshold": threshold,
+                    "json_bytes": len(json.dumps(value)),
+                    "stored_bytes": len(encoded),
+                    "encode_us": median_us(lambda: codecs.encode(name, value), repeat),
+                    "decode_us": median_us(lambda: codecs.decode(encoded), repeat),
+                }
+                results.append(result)
+                print(
+                    f"{name:<14} {codec.name:<8} {'zlib' if result['compressed'] else 'raw':<4} "
+                    f"bytes={result['stored_bytes']:<9} ({result['stored_bytes'] / result['json_bytes']:.2f}x json) "
+                    f"encode={result['encode_us']}us decode={result['decode_us']}us"
+                )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cache codec encode/decode and size benchmark")
+    parser.add_argument("--members", type=int, default=5000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--threshold", type=int, default=4096, help="compression threshold of the zlib runs")
+    parser.add_argument("--level", type=int, default=1, help="zlib level")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=f"codec-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    args = parser.parse_args()
+
+    report = {
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "settings": vars(args),
+        "results": run(args),
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2, default=str)
+    print(f"results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,513 @@
+"""
+Stand-in for the DSpace REST endpoints the backend talks to, for load tests without a live DSpace.
+
+Covers security/csrf, authn/login, authn/status, eperson/epersons, the eperson/groups
+routes (search, CRUD, paginated members, text/uri-list membership), multipart bitstream
+uploads, range-aware bitstream downloads and discover/search/objects for items (only the
+lastModified range query and sort the item sync uses). Everything lives in memory except bitstream
+content, which goes to a temp directory. Latency, 5xx errors and 429 throttling can be
+injected on every request.
+
+Run it standalone:
+    python -m benchmarks.fake_dspace --port 8089 --latency-ms 20 --error-rate 0.01 --throttle-rate 0.01
+
+and point the backend at it with BASE_URL=http://localhost:8089/server/api
+(use a host name, aiohttp's cookie jar ignores cookies set by bare IP addresses)
+"""
+import argparse
+import asyncio
+import bisect
+import hashlib
+import itertools
+import json
+import os
+import random
+import re
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+import jwt
+from aiohttp import web
+
+API_PREFIX = "/server/api"
+CSRF_COOKIE = "DSPACE-XSRF-COOKIE"
+CSRF_HEADER = "DSPACE-XSRF-TOKEN"
+JWT_SECRET = "fake-dspace"
+LAST_MODIFIED_QUERY = re.compile(r"lastModified:\[(\S+) TO \*\]")
+ITEM_TYPES = ("Thesis", "Article", "Dataset", "Book", "Conference Paper")
+WORDS = (
+    "adaptive", "analysis", "bayesian", "cassava", "climate", "delta", "distributed", "energy",
+    "estimation", "groundwater", "health", "learning", "malaria", "maternal", "model", "network",
+    "niger", "nutrition", "oil", "policy", "rainfall", "rural", "soil", "solar", "students",
+    "survey", "teaching", "trade", "urban", "water", "yield", "youth",
+)
+
+
+class FakeDspace():
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        token_lifetime: int = 1800,
+        check_csrf: bool = True,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.token_lifetime = token_lifetime
+        self.check_csrf = check_csrf
+        self.epersons = {}  # id -> eperson
+        self.eperson_emails = {}  # lower cased email -> eperson id
+        self.groups = {}  # id -> group
+        self.members = {}  # group id -> {eperson id, ...} (insertion ordered dict used as a set)
+        self.requests = {}  # "METHOD template" -> count
+        self.bitstreams = {}  # id -> bitstream, content on disk under storage_dir
+        self.grants = {}  # object id -> {eperson id or "anonymous", ...}, objects not listed are open to all
+        self.storage_dir = tempfile.mkdtemp(prefix="fake-dspace-")
+        self.items = {}  # id -> item
+        self._items_by_modified = None  # [(lastModified, id), ...] rebuilt after item changes
+
+    # ============ Helpers ============
+    def _new_csrf(self, response: web.StreamResponse) -> str:
+        token = str(uuid.uuid4())
+        response.headers[CSRF_HEADER] = token
+        response.set_cookie(CSRF_COOKIE, token, path=API_PREFIX)
+        return token
+
+    def _csrf_ok(self, request: web.Request) -> bool:
+        if not self.check_csrf:
+            return True
+        header = request.headers.get("X-XSRF-TOKEN")
+        return header is not None and header == request.cookies.get(CSRF_COOKIE)
+
+    def _authenticated(self, request: web.Request) -> bool:
+        auth = request.headers.get("Authorization", "")
+        try:
+            jwt.decode(auth.split(" ", 1)[-1], JWT_SECRET, algorithms=["HS256"])
+            return True
+        except jwt.PyJWTError:
+            return False
+
+    @staticmethod
+    def _page(request: web.Request, items: list, key: str) -> dict:
+        page = int(request.query.get("page", 0))
+        size = int(request.query.get("size", 20))
+        total = len(items)
+        return {
+            "_embedded": {key: items[page * size:(page + 1) * size]},
+            "page": {"size": size, "totalElements": total, "totalPages": (total + size - 1) // size, "number": page},
+        }
+
+    @staticmethod
+    def _json(body, status: int = 200, etag: bool = False) -> web.Response:
+        response = web.json_response(body, status=status)
+        if etag:
+            response.headers["ETag"] = f'"{hash(response.body) & 0xffffffff:x}"'
+        return response
+
+    def _conditional(self, request: web.Request, body: dict) -> web.Response:
+        response = self._json(body, etag=True)
+        if request.headers.get("If-None-Match") == response.headers["ETag"]:
+            return web.Response(status=304, headers={"ETag": response.headers["ETag"]})
+        return response
+
+    # ============ Middleware ============
+    @web.middleware
+    async def chaos(self, request: web.Request, handler):
+        route = request.match_info.route.resource.canonical if request.match_info.route.resource else request.path
+        name = f"{request.method} {route}"
+        self.requests[name] = self.requests.get(name, 0) + 1
+
+        if self.latency or self.jitter:
+            await asyncio.sleep(max(0.0, self.latency + random.uniform(-self.jitter, self.jitter)))
+        roll = random.random()
+        if roll < self.throttle_rate:
+            return web.json_response({"message": "Too Many Requests"}, status=429, headers={"Retry-After": "1"})
+        if roll < self.throttle_rate + self.error_rate:
+            return web.json_response({"message": "Internal Server Error"}, status=500)
+        return await handler(request)
+
+    # ============ Auth ============
+    async def csrf(self, request: web.Request):
+        response = web.Response(status=204)
+        self._new_csrf(response)
+        return response
+
+    async def login(self, request: web.Request):
+        form = await request.post()
+        if not self._csrf_ok(request):
+            return self._json({"message": "Invalid CSRF token"}, status=403)
+        if not form.get("user") or not form.get("password"):
+            return self._json({"message": "Authentication failed"}, status=401)
+        token = jwt.encode(
+            {"eid": str(uuid.uuid5(uuid.NAMESPACE_DNS, form["user"])), "exp": int(time.time()) + self.token_lifetime},
+            JWT_SECRET,
+            algorithm="HS256",
+        )
+        response = web.Response(status=200)
+        response.headers["Authorization"] = f"Bearer {token}"
+        self._new_csrf(response)
+        return response
+
+    async def status(self, request: web.Request):
+        authenticated = self._authenticated(request)
+        response = self._json({"authenticated": authenticated, "okay": True, "type": "status"})
+        response.headers[CSRF_HEADER] = request.headers.get("X-XSRF-TOKEN") or request.cookies.get(CSRF_COOKIE, "")
+        return response
+
+    # ============ EPersons ============
+    async def create_eperson(self, request: web.Request):
+        if not self._authenticated(request):
+            return self._json({"message": "Unauthorized"}, status=401)
+        body = await request.json()
+        if isinstance(body, str):
+            # the backend sends an already serialized model
+            body = json.loads(body)
+        email = (body.get("email") or "").lower()
+        if email and email in self.eperson_emails:
+            return self._json({"message": "Unprocessable Entity", "status": 422}, status=422)
+        eperson_id = str(uuid.uuid4())
+        eperson = {**body, "id": eperson_id, "uuid": eperson_id, "type": "eperson"}
+        self.epersons[eperson_id] = eperson
+        if email:
+            self.eperson_emails[email] = eperson_id
+        return self._json(eperson, status=201)
+
+    async def eperson_by_email(self, request: web.Request):
+        if not self._authenticated(request):
+            return self._json({"message": "Unauthorized"}, status=401)
+        eperson_id = self.eperson_emails.get(request.query.get("email", "").lower())
+        if eperson_id is None:
+            return web.Response(status=204)
+        return self._json(self.epersons[eperson_id])
+
+    # ============ Groups ============
+    async def create_group(self, request: web.Request):
+        if not self._authenticated(request):
+            return self._json({"message": "Unauthorized"}, status=401)
+        body = await request.json()
+        group_id = str(uuid.uuid4())
+        group = {"id": group_id, "uuid": group_id, "name": body.get("name"), "metadata": body.get("metadata", {}), "type": "group"}
+        self.groups[group_id] = group
+        self.members[group_id] = {}
+        return self._json(group, status=201)
+
+    async def search_groups(self, request: web.Request):
+        query = request.query.get("query", "").lower()
+        found = [group for group in self.groups.values() if query in (group["name"] or "").lower()]
+        return self._conditional(request, self._page(request, found, "groups"))
+
+    async def get_group(self, request: web.Request):
+        group = self.groups.get(request.match_info["group_id"])
+        if group is None:
+            return self._json({"message": "Not found"}, status=404)
+        return self._conditional(request, group)
+
+    async def delete_group(self, request: web.Request):
+        if not self._authenticated(request):
+            return self._json({"message": "Unauthorized"}, status=401)
+        group_id = request.match_info["group_id"]
+        if self.groups.pop(group_id, None) is None:
+            return self._json({"message": "Not found"}, status=404)
+        self.members.pop(group_id, None)
+        return web.Response(status=204)
+
+    async def patch_group(self, request: web.Request):
+        if not self._authenticated(request):
+            return self._json({"message": "Unauthorized"}, status=401)
+        group = self.groups.get(request.match_info["group_id"])
+        if group is None:
+            return self._json({"message": "Not found"}, status=404)
+        for operation in await request.json():
+            if operation.get("op") == "replace" and operation.get("path") == "/name":
+                group["name"] = operation["value"]
+            elif operation.get("op") == "replace" and operation.get("path", "").startswith("/metadata/"):
+                group["metadata"][operation["path"].split("/", 2)[-1]] = operation["value"]
+        return self._json(group)
+
+    async def group_members(self, request: web.Request):
+        group_id = request.match_info["group_id"]
+        if group_id not in self.groups:
+            return self._json({"message": "Not found"}, status=404)
+        page = int(request.query.get("page", 0))
+        size = int(request.query.get("size", 20))
+        total = len(self.members[group_id])
+        # slice the ids before building dicts, big groups are paged through hundreds of times
+        members = [
+            self.epersons.get(eperson_id, {"id": eperson_id, "uuid": eperson_id, "type": "eperson"})
+            for eperson_id in itertools.islice(self.members[group_id], page * size, (page + 1) * size)
+        ]
+        return self._conditional(request, {
+            "_embedded": {"epersons": members},
+            "page": {"size": size, "totalElements": total, "totalPages": (total + size - 1) // size, "number": page},
+        })
+
+    async def add_group_members(self, request: web.Request):
+        if not self._authenticated(request):
+            return self._json({"message": "Unauthorized"}, status=401)
+        group_id = request.match_info["group_id"]
+        if group_id not in self.groups:
+            return self._json({"message": "Not found"}, status=404)
+        uris = [line.strip() for line in (await request.text()).splitlines() if line.strip()]
+        eperson_ids = [uri.rstrip("/").rsplit("/", 1)[-1] for uri in uris]
+        try:
+            for eperson_id in eperson_ids:
+                uuid.UUID(eperson_id)
+        except ValueError:
+            return self._json({"message": "Unprocessable uri-list"}, status=422)
+        for eperson_id in eperson_ids:
+            self.members[group_id][eperson_id] = None
+        return web.Response(status=204)
+
+    async def remove_group_member(self, request: web.Request):
+        if not self._authenticated(request):
+            return self._json({"message": "Unauthorized"}, status=401)
+        group_id = request.match_info["group_id"]
+        if self.members.get(group_id, {}).pop(request.match_info["eperson_id"], 0) == 0:
+            return self._json({"message": "Not found"}, status=404)
+        return web.Response(status=204)
+
+    # ============ Bitstreams ============
+    async def upload_bitstream(self, request: web.Request):
+        if not self._authenticated(request):
+            return self._json({"message": "Unauthorized"}, status=401)
+        bitstream_id = str(uuid.uuid4())
+        path = os.path.join(self.storage_dir, bitstream_id)
+        properties, filename, part_type, size, md5 = {}, None, None, 0, hashlib.md5()
+        reader = await request.multipart()
+        async for part in reader:
+            if part.name == "properties":
+                properties = await part.json()
+            elif part.name == "file":
+                filename = part.filename
+                part_type = part.headers.get("Content-Type", "application/octet-stream")
+                with open(path, "wb") as f:
+                    while chunk := await part.read_chunk(256 * 1024):
+                        size += len(chunk)
+                        md5.update(chunk)
+                        f.write(chunk)
+        if filename is None:
+            return self._json({"message": "No file part"}, status=422)
+        bitstream = {
+            "id": bitstream_id,
+            "uuid": bitstream_id,
+            "name": properties.get("name") or filename,
+            "metadata": properties.get("metadata", {}),
+            "bundleName": "ORIGINAL",
+            "mimeType": part_type,
+            "sizeBytes": size,
+            "checkSum": {"checkSumAlgorithm": "MD5", "value": md5.hexdigest()},
+            "type": "bitstream",
+        }
+        self.bitstreams[bitstream_id] = bitstream
+        return self._json(bitstream, status=201)
+
+    async def bitstream_content(self, request: web.Request):
+        bitstream = self.bitstreams.get(request.match_info["bitstream_id"])
+        if bitstream is None:
+            return self._json({"message": "Not found"}, status=404)
+        # FileResponse answers Range and If-None-Match on its own
+        return web.FileResponse(
+            os.path.join(self.storage_dir, bitstream["id"]),
+            headers={
+                "Content-Type": bitstream.get("mimeType", "application/octet-stream"),
+                "Content-Disposition": f'attachment; filename="{bitstream["name"]}"',
+            },
+        )
+
+    async def delete_bitstream(self, request: web.Request):
+        if not self._authenticated(request):
+            return self._json({"message": "Unauthorized"}, status=401)
+        bitstream_id = request.match_info["bitstream_id"]
+        if self.bitstreams.pop(bitstream_id, None) is None:
+            return self._json({"message": "Not found"}, status=404)
+        os.remove(os.path.join(self.storage_dir, bitstream_id))
+        return web.Response(status=204)
+
+    # ============ Authorizations ============
+    async def authorizations(self, request: web.Request):
+        eperson = request.query.get("eperson")
+        if eperson is not None and not self._authenticated(request):
+            return self._json({"message": "Unauthorized"}, status=401)
+        if eperson is None:
+            # asking for yourself: the admin may do anything, no token means anonymous
+            eperson = "admin" if self._authenticated(request) else "anonymous"
+        object_id = request.query["uri"].rstrip("/").rsplit("/", 1)[-1]
+        allowed = self.grants.get(object_id)
+        if eperson != "admin" and allowed is not None and eperson not in allowed:
+            return web.Response(status=204)
+        authorization = {
+            "id": f"{eperson}_{request.query['feature']}_{object_id}",
+            "type": "authorization",
+            "_links": {"feature": {"href": f"{API_PREFIX}/authz/features/{request.query['feature']}"}},
+        }
+        return self._json({"_embedded": {"authorizations": [authorization]}, "page": {"totalElements": 1}})
+
+    # ============ Items ============
+    @staticmethod
+    def _now() -> str:
+        return datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+
+    def add_item(
+        self,
+        title: str,
+        authors=(),
+        abstract: str = None,
+        item_type: str = "Thesis",
+        date_issued: str = "2020",
+        subjects=(),
+        last_modified: str = None,
+    ) -> dict:
+        item_id = str(uuid.uuid4())
+        metadata = {
+            "dc.title": [{"value": title}],
+            "dc.contributor.author": [{"value": author} for author in authors],
+            "dc.type": [{"value": item_type}],
+            "dc.date.issued": [{"value": date_issued}],
+            "dc.subject": [{"value": subject} for subject in subjects],
+        }
+        if abstract:
+            metadata["dc.description.abstract"] = [{"value": abstract}]
+        self.items[item_id] = {
+            "id": item_id,
+            "uuid": item_id,
+            "name": title,
+            "handle": f"123456789/{len(self.items) + 1}",
+            "metadata": metadata,
+            "inArchive": True,
+            "discoverable": True,
+            "withdrawn": False,
+            "lastModified": last_modified or self._now(),
+            "type": "item",
+        }
+        self._items_by_modified = None
+        return self.items[item_id]
+
+    def update_item(self, item_id: str, field: str, value: str):
+        item = self.items[item_id]
+        item["metadata"][field] = [{"value": value}]
+        if field == "dc.title":
+            item["name"] = value
+        item["lastModified"] = self._now()
+        self._items_by_modified = None
+
+    def remove_item(self, item_id: str):
+        del self.items[item_id]
+        self._items_by_modified = None
+
+    def seed_items(self, count: int, seed: int = 0):
+        """Adds `count` synthetic items with made up titles, authors and abstracts."""
+        rng = random.Random(seed)
+        start = datetime(2020, 1, 1, tzinfo=timezone.utc)
+        for n in range(count):
+            words = rng.sample(WORDS, 6)
+            self.add_item(
+                title=" ".join(words[:4]).capitalize(),
+                authors=[f"{rng.choice(WORDS).capitalize()}, {chr(65 + rng.randrange(26))}." for _ in range(rng.randint(1, 3))],
+                abstract=" ".join(rng.choice(WORDS) for _ in range(40)),
+                item_type=rng.choice(ITEM_TYPES),
+                date_issued=str(rng.randint(1990, 2025)),
+                subjects=words[4:],
+                last_modified=(start + timedelta(seconds=n)).isoformat(timespec="milliseconds"),
+            )
+
+    def _sorted_items(self) -> list:
+        if self._items_by_modified is None:
+            self._items_by_modified = sorted(
+                (datetime.fromisoformat(item["lastModified"]), item_id) for item_id, item in self.items.items()
+            )
+        return self._items_by_modified
+
+    async def discover(self, request: web.Request):
+        if request.query.get("dsoType", "ITEM").upper() != "ITEM":
+            return self._json({"message": "only dsoType=ITEM is supported"}, status=400)
+        ordered = self._sorted_items()
+        match = LAST_MODIFIED_QUERY.search(request.query.get("query", ""))
+        if match:
+            since = datetime.fromisoformat(match.group(1).replace("Z", "+00:00"))
+            ordered = ordered[bisect.bisect_left(ordered, (since, "")):]
+        if request.query.get("sort", "lastModified,ASC").upper().endswith(",DESC"):
+            ordered = ordered[::-1]
+        page = int(request.query.get("page", 0))
+        size = int(request.query.get("size", 20))
+        objects = [
+            {"type": "discover", "_embedded": {"indexableObject": self.items[item_id]}}
+            for _, item_id in ordered[page * size:(page + 1) * size]
+        ]
+        total = len(ordered)
+        return self._json({
+            "type": "discover",
+            "_embedded": {"searchResult": {
+                "_embedded": {"objects": objects},
+                "page": {"size": size, "totalElements": total, "totalPages": (total + size - 1) // size, "number": page},
+            }},
+        })
+
+    # ============ Admin (not part of DSpace) ============
+    async def fake_stats(self, request: web.Request):
+        return self._json({
+            "requests": self.requests,
+            "epersons": len(self.epersons),
+            "groups": len(self.groups),
+            "memberships": sum(len(members) for members in self.members.values()),
+            "bitstreams": len(self.bitstreams),
+            "items": len(self.items),
+        })
+
+    def create_app(self) -> web.Application:
+        # uploads are streamed to disk, so the body size cap only has to allow big files
+        app = web.Application(middlewares=[self.chaos], client_max_size=1 << 40)
+        routes = [
+            web.get(f"{API_PREFIX}/security/csrf", self.csrf),
+            web.post(f"{API_PREFIX}/authn/login", self.login),
+            web.get(f"{API_PREFIX}/authn/status", self.status),
+            web.post(f"{API_PREFIX}/eperson/epersons", self.create_eperson),
+            web.get(f"{API_PREFIX}/eperson/epersons/search/byEmail", self.eperson_by_email),
+            web.post(f"{API_PREFIX}/eperson/groups", self.create_group),
+            web.get(f"{API_PREFIX}/eperson/groups/search/byMetadata", self.search_groups),
+            web.get(f"{API_PREFIX}/eperson/groups/{{group_id}}", self.get_group),
+            web.delete(f"{API_PREFIX}/eperson/groups/{{group_id}}", self.delete_group),
+            web.patch(f"{API_PREFIX}/eperson/groups/{{group_id}}", self.patch_group),
+            web.get(f"{API_PREFIX}/eperson/groups/{{group_id}}/epersons", self.group_members),
+            web.post(f"{API_PREFIX}/eperson/groups/{{group_id}}/epersons", self.add_group_members),
+            web.delete(f"{API_PREFIX}/eperson/groups/{{group_id}}/epersons/{{eperson_id}}", self.remove_group_member),
+            web.post(f"{API_PREFIX}/core/bundles/{{bundle_id}}/bitstreams", self.upload_bitstream),
+            web.delete(f"{API_PREFIX}/core/bitstreams/{{bitstream_id}}", self.delete_bitstream),
+            web.get(f"{API_PREFIX}/core/bitstreams/{{bitstream_id}}/content", self.bitstream_content),
+            web.get(f"{API_PREFIX}/authz/authorizations/search/object", self.authorizations),
+            web.get(f"{API_PREFIX}/discover/search/objects", self.discover),
+            web.get("/_fake/stats", self.fake_stats),
+        ]
+        app.add_routes(routes)
+        return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake DSpace REST server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 500")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="fraction of requests answered with 429")
+    parser.add_argument("--no-csrf-check", action="store_true")
+    parser.add_argument("--items", type=int, default=0, help="synthetic items to seed for the item sync")
+    args = parser.parse_args()
+
+    fake = FakeDspace(
+        latency=args.latency_ms / 1000,
+        jitter=args.jitter_ms / 1000,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        check_csrf=not args.no_csrf_check,
+    )
+    fake.seed_items(args.items)
+    web.run_app(fake.create_app(), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
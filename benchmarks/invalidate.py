@@ -0,0 +1,136 @@
+"""
+Benchmark of namespace and tag invalidation (src.utils.redis_client) on a large keyspace.
+
+Seeds `--keys` keys, `--target` of them under the bench_target namespace and also tagged
+bench_target, and the rest under bench_other. Each of these passes then runs while a
+probe sends a GET every millisecond:
+
+    tag        invalidate_tag: SSCAN of the tag set + batched UNLINK
+    namespace  invalidate_namespace: SCAN of the whole keyspace + batched UNLINK
+    blocking   (--compare-blocking) KEYS bench_target:* + one DEL, the pattern replaced
+
+Each pass reports duration, keys deleted, keys/s and the probe's p50/p99/max latency.
+The targets are reseeded between passes. Afterwards bench_other is removed the same way
+and reported as `cleanup`. Needs a disposable redis in REDIS_URL with room for the keys
+(roughly 100 bytes per key, ~1 GB at 10M).
+
+    python -m benchmarks.invalidate --keys 10000000 --target 0.01 --output invalidate.json
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, List
+
+from benchmarks.load import configure_env, percentile
+
+TARGET = "bench_target"
+OTHER = "bench_other"
+
+
+async def seed(redis, namespace: str, start: int, count: int, value: bytes, tag: str = None, batch: int = 10_000):
+    for offset in range(start, start + count, batch):
+        keys = [f"{namespace}:{n}" for n in range(offset, min(offset + batch, start + count))]
+        async with redis.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.set(key, value)
+            if tag:
+                pipe.sadd(f"tag:{tag}", *keys)
+            await pipe.execute()
+
+
+async def probe(redis, stop: asyncio.Event, latencies: List[float]):
+    await redis.set("bench_probe", "1")
+    while not stop.is_set():
+        started = time.perf_counter()
+        await redis.get("bench_probe")
+        latencies.append(time.perf_counter() - started)
+        await asyncio.sleep(0.001)
+
+
+async def measure(name: str, redis, operation: Callable[[], Awaitable[int]]) -> Dict:
+    stop = asyncio.Event()
+    latencies: List[float] = []
+    prober = asyncio.create_task(probe(redis, stop, latencies))
+    started = time.perf_counter()
+    deleted = await operation()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await prober
+    latencies.sort()
+    summary = {
+        "pass": name,
+        "seconds": round(elapsed, 3),
+        "deleted": deleted,
+        "keys_per_s": round(deleted / elapsed) if elapsed else None,
+        "probe_p50_ms": round(percentile(latencies, 0.50) * 1000, 3) if latencies else None,
+        "probe_p99_ms": round(percentile(latencies, 0.99) * 1000, 3) if latencies else None,
+        "probe_max_ms": round(latencies[-1] * 1000, 3) if latencies else None,
+    }
+    print(
+        f"{name:<9} {summary['seconds']:>9}s deleted={deleted:<9} {summary['keys_per_s']} keys/s  "
+        f"probe p50={summary['probe_p50_ms']}ms p99={summary['probe_p99_ms']}ms max={summary['probe_max_ms']}ms"
+    )
+    return summary
+
+
+async def run(args) -> Dict:
+    from src.utils.config import config
+    from src.utils.redis_client import get_redis, invalidate_namespace, invalidate_tag, setup_redis
+
+    config.cache_invalidate_batch_size = args.batch_size
+    config.cache_invalidate_pause = args.pause
+    await setup_redis()
+    redis = await get_redis()
+    value = b"x" * args.value_bytes
+    targets = int(args.keys * args.target)
+    others = args.keys - targets
+
+    started = time.perf_counter()
+    await seed(redis, OTHER, 0, others, value)
+    await seed(redis, TARGET, 0, targets, value, tag=TARGET)
+    print(f"seeded {args.keys} keys ({targets} targets) in {time.perf_counter() - started:.1f}s, dbsize {await redis.dbsize()}")
+
+    passes = [await measure("tag", redis, lambda: invalidate_tag(TARGET))]
+    await seed(redis, TARGET, 0, targets, value, tag=TARGET)
+    passes.append(await measure("namespace", redis, lambda: invalidate_namespace(TARGET)))
+
+    if args.compare_blocking:
+        await seed(redis, TARGET, 0, targets, value)
+
+        async def blocking() -> int:
+            keys = await redis.keys(f"{TARGET}:*")
+            return await redis.delete(*keys) if keys else 0
+
+        passes.append(await measure("blocking", redis, blocking))
+
+    passes.append(await measure("cleanup", redis, lambda: invalidate_namespace(OTHER)))
+    await redis.delete("bench_probe", f"tag:{TARGET}")
+    return {"passes": passes}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Namespace/tag invalidation benchmark on a large keyspace")
+    parser.add_argument("--keys", type=int, default=10_000_000)
+    parser.add_argument("--target", type=float, default=0.01, help="fraction of the keys that is invalidated")
+    parser.add_argument("--batch-size", type=int, default=1000, help="keys per SCAN/UNLINK batch")
+    parser.add_argument("--pause", type=float, default=0.0, help="seconds between batches")
+    parser.add_argument("--value-bytes", type=int, default=32)
+    parser.add_argument("--compare-blocking", action="store_true", help="also time KEYS + DEL on the targets")
+    parser.add_argument("--output", default=f"invalidate-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    args = parser.parse_args()
+
+    configure_env(8090)
+    report = {
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "settings": vars(args),
+        **asyncio.run(run(args)),
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2, default=str)
+    print(f"results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import argparse
+import asyncio
+import json
+from src.utils.redis_client import setup_redis
+from src.utils.http_config import http_client
+from src.v1.dspace.role_groups import role_group_map
+from src.v1.service.user_import import user_import
+
+# bulk user import, e.g. a new intake:
+#   python import_users.py intake.csv --report intake-report.json
+# columns are the CreateUser fields: user_name,email,first_name,last_name,password,role
+# running the same file again resumes after the last finished batch
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Import users from a CSV file into the app and DSpace")
+    parser.add_argument("path")
+    parser.add_argument("--job-id", help="defaults to a hash of the file, so a re-run resumes")
+    parser.add_argument("--restart", action="store_true", help="drop the checkpoint and start from the first row")
+    parser.add_argument("--batch-size", type=int)
+    parser.add_argument("--concurrency", type=int)
+    parser.add_argument("--batch-pause", type=float)
+    parser.add_argument("--report", help="write the report as json to this file")
+    args = parser.parse_args()
+
+    await setup_redis()
+    await role_group_map.load()
+    job = user_import(
+        args.path,
+        job_id=args.job_id,
+        batch_size=args.batch_size,
+        concurrency=args.concurrency,
+        batch_pause=args.batch_pause,
+    )
+    if args.restart:
+        await job.reset()
+    try:
+        report = await job.run()
+    finally:
+        await http_client.close()
+
+    print(
+        f"import {report['job_id']}: {report['imported']} imported, {report['skipped']} skipped, "
+        f"{report['failed']} failed, {report['rows_per_s']} rows/s"
+    )
+    for error in report["errors"][:20]:
+        print(f"  row {error['row']} ({error['stage']}): {error['error']}")
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"report written to {args.report}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,63 @@
+"""added bitstream columns to resources table for streaming uploads
+
+Revision ID: 3c81e5b0a9f2
+Revises: 7f3a9c21d4e6
+Create Date: 2026-10-17 14:03:52.918233
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c81e5b0a9f2'
+down_revision: Union[str, Sequence[str], None] = '7f3a9c21d4e6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # added nullable first so existing rows survive, then backfilled and made NOT NULL
+    op.add_column('resources', sa.Column('bitstream_id', sa.String(), nullable=True))
+    op.add_column('resources', sa.Column('bundle_id', sa.String(), nullable=True))
+    op.add_column('resources', sa.Column('filename', sa.String(), nullable=True))
+    op.add_column('resources', sa.Column('content_type', sa.String(), nullable=True))
+    op.add_column('resources', sa.Column('size_bytes', sa.BigInteger(), nullable=True))
+    op.add_column('resources', sa.Column('checksum_md5', sa.String(length=32), nullable=True))
+    op.add_column('resources', sa.Column('checksum_sha256', sa.String(length=64), nullable=True))
+    op.add_column('resources', sa.Column('uploaded_by', sa.UUID(), nullable=True))
+    # rows from before streaming uploads have no bitstream, their own id keeps bitstream_id unique
+    op.execute("""
+        UPDATE resources SET
+            bitstream_id = id::text,
+            bundle_id = '',
+            filename = '',
+            size_bytes = 0,
+            checksum_md5 = '',
+            checksum_sha256 = ''
+    """)
+    for column in ('bitstream_id', 'bundle_id', 'filename', 'size_bytes', 'checksum_md5', 'checksum_sha256'):
+        op.alter_column('resources', column, nullable=False)
+    op.create_index(op.f('ix_resources_bitstream_id'), 'resources', ['bitstream_id'], unique=True)
+    op.create_index(op.f('ix_resources_bundle_id'), 'resources', ['bundle_id'], unique=False)
+    op.create_index(op.f('ix_resources_uploaded_by'), 'resources', ['uploaded_by'], unique=False)
+    op.create_foreign_key(op.f('fk_resources_uploaded_by_users'), 'resources', 'users', ['uploaded_by'], ['id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint(op.f('fk_resources_uploaded_by_users'), 'resources', type_='foreignkey')
+    op.drop_index(op.f('ix_resources_uploaded_by'), table_name='resources')
+    op.drop_index(op.f('ix_resources_bundle_id'), table_name='resources')
+    op.drop_index(op.f('ix_resources_bitstream_id'), table_name='resources')
+    op.drop_column('resources', 'uploaded_by')
+    op.drop_column('resources', 'checksum_sha256')
+    op.drop_column('resources', 'checksum_md5')
+    op.drop_column('resources', 'size_bytes')
+    op.drop_column('resources', 'content_type')
+    op.drop_column('resources', 'filename')
+    op.drop_column('resources', 'bundle_id')
+    op.drop_column('resources', 'bitstream_id')
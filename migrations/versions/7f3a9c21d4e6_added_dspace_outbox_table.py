@@ -0,0 +1,49 @@
+"""added dspace_outbox table for role -> dspace group writes
+
+Revision ID: 7f3a9c21d4e6
+Revises: 488396c4078d
+Create Date: 2026-10-17 10:12:31.402117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7f3a9c21d4e6'
+down_revision: Union[str, Sequence[str], None] = '488396c4078d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('dspace_outbox',
+    sa.Column('role_id', sa.UUID(), nullable=False),
+    sa.Column('operation', sa.Enum('CREATE_GROUP', 'UPDATE_GROUP', name='outbox_operation_enum'), nullable=False),
+    sa.Column('payload', sa.JSON(), nullable=False),
+    sa.Column('status', sa.Enum('PENDING', 'DONE', 'FAILED', name='outbox_status_enum'), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('last_error', sa.String(), nullable=True),
+    sa.Column('next_attempt_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('processed_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('deleted_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['role_id'], ['roles.id'], name=op.f('fk_dspace_outbox_role_id_roles')),
+    sa.PrimaryKeyConstraint('id', name=op.f('pk_dspace_outbox'))
+    )
+    op.create_index(op.f('ix_dspace_outbox_role_id'), 'dspace_outbox', ['role_id'], unique=False)
+    op.create_index('ix_dspace_outbox_status_next_attempt_at', 'dspace_outbox', ['status', 'next_attempt_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_dspace_outbox_status_next_attempt_at', table_name='dspace_outbox')
+    op.drop_index(op.f('ix_dspace_outbox_role_id'), table_name='dspace_outbox')
+    op.drop_table('dspace_outbox')
+    sa.Enum(name='outbox_status_enum').drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name='outbox_operation_enum').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,69 @@
+"""added repository_items mirror and sync_watermarks tables
+
+Revision ID: 9d2b4f7e1c35
+Revises: 3c81e5b0a9f2
+Create Date: 2026-10-17 16:41:07.225914
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d2b4f7e1c35'
+down_revision: Union[str, Sequence[str], None] = '3c81e5b0a9f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('repository_items',
+    sa.Column('handle', sa.String(), nullable=True),
+    sa.Column('title', sa.String(), nullable=True),
+    sa.Column('authors', sa.JSON(), nullable=False),
+    sa.Column('abstract', sa.Text(), nullable=True),
+    sa.Column('subjects', sa.JSON(), nullable=False),
+    sa.Column('item_type', sa.String(), nullable=True),
+    sa.Column('date_issued', sa.String(), nullable=True),
+    sa.Column('issued_year', sa.Integer(), nullable=True),
+    sa.Column('withdrawn', sa.Boolean(), nullable=False),
+    sa.Column('dspace_metadata', sa.JSON(), nullable=False),
+    sa.Column('dspace_last_modified', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('last_seen_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('deleted_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id', name=op.f('pk_repository_items'))
+    )
+    op.create_index(op.f('ix_repository_items_handle'), 'repository_items', ['handle'], unique=False)
+    op.create_index(op.f('ix_repository_items_dspace_last_modified'), 'repository_items', ['dspace_last_modified'], unique=False)
+    op.create_index(op.f('ix_repository_items_issued_year'), 'repository_items', ['issued_year'], unique=False)
+    op.create_index('ix_repository_items_type_year', 'repository_items', ['item_type', 'issued_year'], unique=False)
+    op.create_table('sync_watermarks',
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('watermark', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('runs', sa.Integer(), nullable=False),
+    sa.Column('last_run_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('last_result', sa.JSON(), nullable=True),
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('deleted_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id', name=op.f('pk_sync_watermarks'))
+    )
+    op.create_index(op.f('ix_sync_watermarks_name'), 'sync_watermarks', ['name'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_sync_watermarks_name'), table_name='sync_watermarks')
+    op.drop_table('sync_watermarks')
+    op.drop_index('ix_repository_items_type_year', table_name='repository_items')
+    op.drop_index(op.f('ix_repository_items_issued_year'), table_name='repository_items')
+    op.drop_index(op.f('ix_repository_items_dspace_last_modified'), table_name='repository_items')
+    op.drop_index(op.f('ix_repository_items_handle'), table_name='repository_items')
+    op.drop_table('repository_items')
@@ -0,0 +1,39 @@
+"""added repository_items search_vector with gin index
+
+Revision ID: b61e0d4a8f73
+Revises: 9d2b4f7e1c35
+Create Date: 2026-10-17 23:31:52.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b61e0d4a8f73'
+down_revision: Union[str, Sequence[str], None] = '9d2b4f7e1c35'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('repository_items', sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True))
+    # same weights as src.v1.repository.search.search_vector, for rows synced before this column existed
+    op.execute("""
+        UPDATE repository_items SET search_vector =
+            setweight(to_tsvector('english'::regconfig, coalesce(title, '')), 'A')
+            || setweight(to_tsvector('english'::regconfig, coalesce(
+                (SELECT string_agg(value, ' ') FROM json_array_elements_text(authors)), '')), 'B')
+            || setweight(to_tsvector('english'::regconfig, coalesce(abstract, '')), 'C')
+    """)
+    op.create_index('ix_repository_items_search_vector', 'repository_items', ['search_vector'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_repository_items_search_vector', table_name='repository_items', postgresql_using='gin')
+    op.drop_column('repository_items', 'search_vector')
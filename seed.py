@@ -3,6 +3,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 import sqlalchemy as sa
 from src.utils.db import get_session
 from src.v1.model.roles import Role, Permission, PermissionType, PERMISSION_DESCRIPTIONS, Role_Enum
+from src.utils.redis_client import setup_redis
+from src.v1.dspace.role_groups import role_group_map
 
 async def seed_permissions(session: AsyncSession):
     print("Seeding permissions...")
@@ -113,6 +115,9 @@ async def add_group_id(session: AsyncSession, group_id: str, role_name: Role_Enu
     role.group_id = group_id
     session.add(role)
     await session.commit()
+    # running servers reload their role -> group map on their next poll
+    await setup_redis()
+    await role_group_map.bump()
     print(f"Successfully updated group_id for role {role_name}")
     
 async def main():
@@ -2,13 +2,22 @@ from fastapi import FastAPI
 from contextlib import asynccontextmanager
 # from utils.db import init_db
 from src.utils.db import init_db, drop_db
-from src.utils.redis_client import setup_redis
+from src.utils.redis_client import setup_redis, start_local_cache, stop_local_cache
 from src.v1.auth.route import auth_router
+from src.v1.auth.revocation import revocation_filter
 from fastapi.middleware.cors import CORSMiddleware
 from src.utils.config import Settings 
 from src.utils.exception import register_error_handlers
 from src.v1.dspace.route import dspace_auth_router
+from src.v1.dspace.service import admin_token_provider
+from src.v1.dspace.outbox import outbox_dispatcher
+from src.v1.dspace.role_groups import role_group_map
+from src.utils.http_config import http_client
 from src.v1.admin.route import admin_router, super_admin_router
+from src.v1.resource.route import resource_router
+from src.v1.resource.service import bitstream_cache
+from src.v1.repository.route import item_router
+from src.v1.repository.sync import item_sync
 @asynccontextmanager
 async def life_span(app: FastAPI):
     """
@@ -36,11 +45,33 @@ async def life_span(app: FastAPI):
     
     print("redis is starting....")
     await setup_redis()
+    # in-process L1 in front of redis, kept coherent through pub/sub invalidations
+    await start_local_cache()
     print("redis has started!!")
+    # revoked jwt ids, so most authenticated requests skip the revocation lookup in redis
+    revocation_filter.start()
+
+    # keep the dspace admin tokens warm so requests never wait on a login
+    admin_token_provider.start()
+    # role -> dspace group ids, so provisioning never queries the roles table
+    await role_group_map.start()
+    # push queued role -> dspace group writes
+    outbox_dispatcher.start()
+    # keep the local item mirror in step with dspace
+    item_sync.start()
+    # index of the bitstream disk cache, scanned in a thread before the first download
+    await bitstream_cache.load()
     yield  # Yield control back to FastAPI
     
     # Shutdown: Perform any necessary cleanup
     print("server is ending.....")
+    await item_sync.stop()
+    await outbox_dispatcher.stop()
+    await role_group_map.stop()
+    await admin_token_provider.stop()
+    await revocation_filter.stop()
+    await stop_local_cache()
+    await http_client.close()
 
 app = FastAPI(
     lifespan=life_span,
@@ -65,6 +96,8 @@ app.include_router(auth_router, prefix=Settings.API_PREFIX)
 app.include_router(dspace_auth_router, prefix=Settings.API_PREFIX)
 app.include_router(super_admin_router, prefix=Settings.API_PREFIX)
 app.include_router(admin_router, prefix=Settings.API_PREFIX)
+app.include_router(resource_router, prefix=Settings.API_PREFIX)
+app.include_router(item_router, prefix=Settings.API_PREFIX)
 
 
 
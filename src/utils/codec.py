@@ -0,0 +1,167 @@
+import json
+import zlib
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional
+from src.utils.log import setup_logger
+logger = setup_logger(__name__, "codec.log")
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# first byte of every encoded value: HEADER_BASE | codec id, plus COMPRESSED when zlib'd.
+# All of them are >= 0x80, which can't start plain JSON, so values written before the
+# codecs existed (and by set_cache in older deploys) are still told apart and read as JSON.
+HEADER_BASE = 0xE0
+COMPRESSED = 0x10
+
+
+class CodecError(ValueError):
+    """A cached value this process can't decode (unknown header or codec not installed)."""
+
+
+class Codec(ABC):
+    def __init__(self, name: str, codec_id: int, available: bool):
+        self.name = name
+        self.id = codec_id
+        self.available = available
+
+    @abstractmethod
+    def dumps(self, value) -> bytes:
+        ...
+
+    @abstractmethod
+    def loads(self, data: bytes):
+        ...
+
+
+class JsonCodec(Codec):
+    def __init__(self):
+        super().__init__("json", 1, True)
+
+    def dumps(self, value) -> bytes:
+        return json.dumps(value, separators=(",", ":")).encode()
+
+    def loads(self, data: bytes):
+        return json.loads(data)
+
+
+class OrjsonCodec(Codec):
+    """Same JSON on the wire as JsonCodec, so a process without orjson still reads it."""
+
+    def __init__(self):
+        super().__init__("orjson", 2, orjson is not None)
+
+    def dumps(self, value) -> bytes:
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+
+    def loads(self, data: bytes):
+        return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+class MsgpackCodec(Codec):
+    def __init__(self):
+        super().__init__("msgpack", 3, msgpack is not None)
+
+    def dumps(self, value) -> bytes:
+        return msgpack.packb(value, use_bin_type=True)
+
+    def loads(self, data: bytes):
+        if msgpack is None:
+            raise CodecError("value was written with msgpack, which isn't installed here")
+        return msgpack.unpackb(data, raw=False, strict_map_key=False)
+
+
+CODECS: Dict[str, Codec] = {codec.name: codec for codec in (JsonCodec(), OrjsonCodec(), MsgpackCodec())}
+CODECS_BY_ID: Dict[int, Codec] = {codec.id: codec for codec in CODECS.values()}
+
+
+def fastest_codec() -> Codec:
+    return CODECS["orjson"] if CODECS["orjson"].available else CODECS["json"]
+
+
+class CacheCodecs():
+    """
+    Encodes the values redis_client caches, with a codec chosen by key namespace (the
+    key up to the first ':'). "auto" is orjson when it's installed, json otherwise; a
+    configured codec that isn't installed falls back to the same.
+
+    Encoded values at least `compress_threshold` bytes long are zlib compressed when
+    that makes them smaller. The header byte records codec and compression, so values
+    decode the same whichever worker wrote them, whatever its own settings.
+    """
+
+    def __init__(
+        self,
+        default: str = "auto",
+        namespaces: Optional[Dict[str, str]] = None,
+        compress_threshold: int = 4096,
+        compress_level: int = 1,
+    ):
+        self.default = self._resolve(default)
+        self.namespaces = {namespace: self._resolve(name) for namespace, name in (namespaces or {}).items()}
+        self.compress_threshold = compress_threshold
+        self.compress_level = compress_level
+        self.stats = {"encoded": 0, "decoded": 0, "compressed": 0, "legacy": 0, "bytes_in": 0, "bytes_out": 0}
+
+    @staticmethod
+    def _resolve(name: str) -> Codec:
+        if name == "auto":
+            return fastest_codec()
+        codec = CODECS.get(name)
+        if codec is None:
+            raise ValueError(f"unknown cache codec '{name}', expected one of auto, {', '.join(CODECS)}")
+        if not codec.available:
+            logger.warning(f"cache codec '{name}' is not installed, using {fastest_codec().name}")
+            return fastest_codec()
+        return codec
+
+    def for_key(self, key: str) -> Codec:
+        namespace = key.split(":", 1)[0] if ":" in key else ""
+        return self.namespaces.get(namespace, self.default)
+
+    def encode(self, key: str, value: Any) -> bytes:
+        codec = self.for_key(key)
+        data = codec.dumps(value)
+        header = HEADER_BASE | codec.id
+        self.stats["encoded"] += 1
+        self.stats["bytes_in"] += len(data)
+        if self.compress_threshold > 0 and len(data) >= self.compress_threshold:
+            compressed = zlib.compress(data, self.compress_level)
+            if len(compressed) < len(data):
+                data = compressed
+                header |= COMPRESSED
+                self.stats["compressed"] += 1
+        self.stats["bytes_out"] += len(data) + 1
+        return bytes((header,)) + data
+
+    def decode(self, raw: bytes) -> Any:
+        if isinstance(raw, str):
+            raw = raw.encode()
+        self.stats["decoded"] += 1
+        if not raw or raw[0] < HEADER_BASE:
+            # plain JSON from before values carried a header
+            self.stats["legacy"] += 1
+            return json.loads(raw)
+        header = raw[0]
+        codec = CODECS_BY_ID.get(header & ~(HEADER_BASE | COMPRESSED))
+        if codec is None:
+            raise CodecError(f"unknown cache value header {header:#x}")
+        data = raw[1:]
+        if header & COMPRESSED:
+            data = zlib.decompress(data)
+        return codec.loads(data)
+
+    def snapshot(self) -> dict:
+        return {
+            **self.stats,
+            "default": self.default.name,
+            "namespaces": {namespace: codec.name for namespace, codec in self.namespaces.items()},
+            "ratio": round(self.stats["bytes_out"] / self.stats["bytes_in"], 4) if self.stats["bytes_in"] else None,
+        }
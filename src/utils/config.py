@@ -14,6 +14,94 @@ class Config(BaseSettings):
     #super super admin details for dspace 
     base_username:str
     base_password:str
+    #fraction of the dspace jwt lifetime after which the admin tokens are refreshed in the background
+    dspace_token_refresh_fraction: float = 0.75
+    #per-user dspace sessions (cookie jars) kept around to reuse their csrf cookie
+    dspace_session_pool_size: int = 256
+    dspace_session_idle_timeout: int = 900
+    #page size and number of pages prefetched when walking paginated dspace collections
+    dspace_page_size: int = 100
+    dspace_read_ahead: int = 1
+    #users per text/uri-list request and concurrent requests when linking users to a group in bulk
+    dspace_membership_batch_size: int = 100
+    dspace_membership_concurrency: int = 4
+    #in-process L1 in front of redis, 0 entries or bytes turns it off; ttls in seconds per key namespace
+    l1_cache_max_entries: int = 10000
+    l1_cache_max_bytes: int = 16 * 1024 * 1024
+    l1_cache_default_ttl: float = 5
+    l1_cache_ttls: dict = {
+        "dspace_group": 30,
+        "dspace_group_members": 10,
+        "dspace_group_search": 10,
+    }
+    #codec of cached values: json, orjson, msgpack or auto (orjson if installed), per key namespace in cache_codecs;
+    #encoded values of at least cache_compress_threshold bytes are zlib compressed, 0 turns compression off
+    cache_codec: str = "auto"
+    cache_codecs: dict = {}
+    cache_compress_threshold: int = 4096
+    cache_compress_level: int = 1
+    #key namespaces /dspace/clear-cache drops by default, revocations, DSpace tokens, locks and import checkpoints stay;
+    #keys per SCAN/UNLINK batch when invalidating a namespace or tag and the pause between batches in seconds
+    cache_clearable_namespaces: list = ["dspace_group", "dspace_group_members", "dspace_group_search", "dspace_csrf", "dspace_authz"]
+    cache_invalidate_batch_size: int = 1000
+    cache_invalidate_pause: float = 0.0
+    #per-worker bloom filter of revoked jwt ids: expected revocations, target false positive rate,
+    #seconds between full rebuilds and approximate length of the revocation stream the workers tail
+    revocation_filter_capacity: int = 100_000
+    revocation_filter_fp_rate: float = 0.001
+    revocation_filter_rebuild_interval: int = 3600
+    revocation_stream_maxlen: int = 100_000
+    #stampede protection of get_or_fetch_cache: XFetch beta (higher refreshes earlier, 0 turns early refresh off),
+    #ttl of a key's fill lock and how long a miss waits for another worker's fill before fetching itself, in seconds
+    cache_xfetch_beta: float = 1.0
+    cache_fill_lock_ttl: float = 10
+    cache_fill_wait: float = 5
+    #read-through cache of dspace group lookups
+    dspace_group_cache_ttl: int = 600
+    dspace_group_cache_max_members: int = 5000
+    #byte cap of the in-memory etag cache of dspace GET responses, 0 turns it off
+    dspace_http_cache_max_bytes: int = 32 * 1024 * 1024
+    #seconds a dspace authorization answer (may this eperson download/upload to that object) is cached
+    dspace_authz_cache_ttl: int = 60
+    #share one upstream request between identical concurrent dspace GETs
+    dspace_coalesce_gets: bool = False
+    #circuit breaker and aimd concurrency limit per dspace endpoint class
+    dspace_breaker_failure_threshold: int = 5
+    dspace_breaker_recovery_timeout: float = 30
+    dspace_limit_initial: int = 20
+    dspace_limit_max: int = 40
+    dspace_latency_target: float = 1.0
+    dspace_limit_queue_timeout: float = 10
+    #outbox dispatcher draining role -> dspace group writes
+    dspace_outbox_batch_size: int = 50
+    dspace_outbox_poll_interval: float = 5
+    dspace_outbox_max_attempts: int = 10
+    dspace_outbox_concurrency: int = 4
+    #bulk csv user import, rows per batch, concurrent eperson creations, pause between batches and checkpoint lifetime
+    user_import_batch_size: int = 200
+    user_import_concurrency: int = 4
+    user_import_batch_pause: float = 0.5
+    user_import_checkpoint_ttl: int = 7 * 24 * 60 * 60
+    #seconds between checks of the redis version key of the role -> dspace group map
+    role_group_poll_interval: float = 5
+    #streaming bitstream uploads, memory per upload stays around one chunk
+    upload_chunk_size: int = 1024 * 1024
+    upload_max_bytes: int = 4 * 1024 * 1024 * 1024
+    upload_max_concurrency: int = 8
+    upload_max_per_user: int = 2
+    upload_queue_timeout: float = 30
+    #socket read timeout for dspace bitstream transfers, which outlive the normal 30s request timeout
+    dspace_transfer_timeout: float = 300
+    #local disk cache of popular bitstream downloads, shared by the workers; each enforces max_bytes on its own
+    download_cache_dir: str = "cache/bitstreams"
+    download_cache_max_bytes: int = 10 * 1024 * 1024 * 1024
+    download_cache_max_file_bytes: int = 1024 * 1024 * 1024
+    download_cache_min_hits: int = 2
+    download_chunk_size: int = 256 * 1024
+    #mirror of dspace items kept in postgres, interval 0 disables the background sync
+    item_sync_interval: float = 300
+    item_sync_page_size: int = 100
+    item_sync_full_every: int = 24
 
     model_config = SettingsConfigDict(
         case_sensitive=False,
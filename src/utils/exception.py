@@ -24,7 +24,8 @@ from src.v1.base.exception import (
     NotActive, 
     BaseExceptionClass,
     DSpaceError, 
-    AuthorizationError
+    AuthorizationError,
+    TooManyRequests
     
     
 )
@@ -259,6 +260,20 @@ def register_error_handlers(app: FastAPI):
         )
     )
 
+    app.add_exception_handler(
+        TooManyRequests,
+        create_exception_handler(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            initial_detail={
+                "status": "error",
+                "message": "Too many requests, try again later",
+                "error_code": "too_many_requests",
+                "data": None,
+                "role": None
+            }
+        )
+    )
+
     app.add_exception_handler(
         ServerError,
         create_exception_handler(
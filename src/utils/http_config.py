@@ -1,4 +1,12 @@
+import re
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Optional
+from urllib.parse import urlsplit
 import aiohttp
+from src.utils.config import config
+from src.utils.metrics import metrics
 from src.utils.log import setup_logger
 logger = setup_logger(__name__, "http_setup.log")
 
@@ -7,7 +15,26 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# path segments that identify a single resource, collapsed so metrics stay per endpoint
+_ID_SEGMENT = re.compile(
+    r"^(?:[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}|\d+)$"
+)
+_BASE_PATH = urlsplit(config.base_url).path.rstrip("/")
+
+
+@lru_cache(maxsize=2048)
+def endpoint_template(path: str) -> str:
+    """/server/api/eperson/groups/<uuid>/epersons -> eperson/groups/{id}/epersons"""
+    if _BASE_PATH and path.startswith(_BASE_PATH):
+        path = path[len(_BASE_PATH):]
+    return "/".join("{id}" if _ID_SEGMENT.match(segment) else segment for segment in path.strip("/").split("/"))
+
+
 async def on_request_start(session, trace_config_ctx, params):
+    trace_config_ctx.start = time.perf_counter()
+    trace_config_ctx.headers_sent = None
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
     logger.debug("=== REQUEST SENT ===")
     logger.debug(f"METHOD: {params.method}")
     logger.debug(f"URL: {params.url}")
@@ -26,49 +53,173 @@ async def on_request_start(session, trace_config_ctx, params):
     # logger.debug(f"BODY SENT: {request_body}")
 
 
+async def on_connection_queued_start(session, trace_config_ctx, params):
+    trace_config_ctx.queued = time.perf_counter()
+
+
+async def on_connection_queued_end(session, trace_config_ctx, params):
+    # time spent waiting for a free slot in the connector pool (limit / limit_per_host)
+    metrics.observe("dspace_pool_queue_seconds", time.perf_counter() - trace_config_ctx.queued)
+
+
+async def on_connection_create_start(session, trace_config_ctx, params):
+    trace_config_ctx.connecting = time.perf_counter()
+
+
+async def on_connection_create_end(session, trace_config_ctx, params):
+    metrics.observe("dspace_connect_seconds", time.perf_counter() - trace_config_ctx.connecting)
+    metrics.inc("dspace_connections", "new")
+
+
+async def on_connection_reuseconn(session, trace_config_ctx, params):
+    metrics.inc("dspace_connections", "reused")
+
+
+async def on_dns_resolvehost_start(session, trace_config_ctx, params):
+    trace_config_ctx.resolving = time.perf_counter()
+
+
+async def on_dns_resolvehost_end(session, trace_config_ctx, params):
+    metrics.observe("dspace_dns_seconds", time.perf_counter() - trace_config_ctx.resolving)
+
+
+async def on_request_headers_sent(session, trace_config_ctx, params):
+    trace_config_ctx.headers_sent = time.perf_counter()
+
+
+def _observe_request(trace_config_ctx, method: str, url, status: str):
+    # total covers pool wait, dns, connect, upload and waiting on DSpace, up to the response headers
+    now = time.perf_counter()
+    labels = (method, endpoint_template(url.path), status)
+    metrics.observe("dspace_request_seconds", now - trace_config_ctx.start, *labels)
+    if trace_config_ctx.headers_sent is not None:
+        metrics.observe("dspace_ttfb_seconds", now - trace_config_ctx.headers_sent, *labels)
+
+
 async def on_request_end(session, trace_config_ctx, params):
+    _observe_request(trace_config_ctx, params.method, params.url, str(params.response.status))
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
     logger.debug("=== RESPONSE RECEIVED ===")
     logger.debug(f"STATUS: {params.response.status}")
     logger.debug(f"RESPONSE HEADERS: {params.response.headers}")
     logger.debug(f"RESPONSE CONTENT-TYPE: {params.response.headers.get('Content-Type')}")
 
 
+async def on_request_exception(session, trace_config_ctx, params):
+    _observe_request(trace_config_ctx, params.method, params.url, type(params.exception).__name__)
+
+
 # Attach trace config
 trace_config = aiohttp.TraceConfig()
 trace_config.on_request_start.append(on_request_start)
 trace_config.on_request_end.append(on_request_end)
+trace_config.on_request_exception.append(on_request_exception)
+trace_config.on_request_headers_sent.append(on_request_headers_sent)
+trace_config.on_connection_queued_start.append(on_connection_queued_start)
+trace_config.on_connection_queued_end.append(on_connection_queued_end)
+trace_config.on_connection_create_start.append(on_connection_create_start)
+trace_config.on_connection_create_end.append(on_connection_create_end)
+trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+trace_config.on_dns_resolvehost_start.append(on_dns_resolvehost_start)
+trace_config.on_dns_resolvehost_end.append(on_dns_resolvehost_end)
 
  #on_request_prepare is required to capture request body because aiohttp does not expose it in params directly.
 
 
 
 class HttpConfig:
+    """
+    Owns the aiohttp sessions used to talk to DSpace.
+
+    Every session shares one TCPConnector, so connection pooling stays global.
+    Callers acting on behalf of a user pass a `principal` to get a session with
+    its own cookie jar, which keeps the DSpace CSRF cookie of one user from
+    overwriting another's. Those sessions live in a bounded LRU pool and are
+    dropped after sitting idle for `session_idle_timeout` seconds.
+    """
     _instance = None
     _session = None
+    _connector = None
 
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
+            cls._instance._principal_sessions = OrderedDict()  # principal -> (session, last_used)
+            cls._instance.pool_size = config.dspace_session_pool_size
+            cls._instance.session_idle_timeout = config.dspace_session_idle_timeout
+            cls._instance.stats = {"pool_hits": 0, "pool_misses": 0, "pool_evictions": 0}
         return cls._instance
 
-    async def get_session(self):
-        if self._session is None or self._session.closed:
-            timeout = aiohttp.ClientTimeout(total=30)
-
+    def _get_connector(self) -> aiohttp.TCPConnector:
+        if self._connector is None or self._connector.closed:
             #Adjusting the TCP Connector may yield different performance levels in production
-            connector = aiohttp.TCPConnector(limit=60, limit_per_host=40)
-
-
-            self._session = aiohttp.ClientSession(
-                trace_configs=[trace_config],
-                timeout=timeout,
-                connector=connector
-            )
-        return self._session
+            self._connector = aiohttp.TCPConnector(limit=60, limit_per_host=40)
+        return self._connector
+
+    def _new_session(self) -> aiohttp.ClientSession:
+        timeout = aiohttp.ClientTimeout(total=30)
+        return aiohttp.ClientSession(
+            trace_configs=[trace_config],
+            timeout=timeout,
+            connector=self._get_connector(),
+            connector_owner=False,  # the connector outlives any single session
+            cookie_jar=aiohttp.CookieJar(),
+        )
+
+    async def get_session(self, principal: Optional[str] = None) -> aiohttp.ClientSession:
+        if principal is None:
+            if self._session is None or self._session.closed:
+                self._session = self._new_session()
+            return self._session
+
+        await self._evict_idle()
+        now = time.monotonic()
+        entry = self._principal_sessions.get(principal)
+        if entry is not None and not entry[0].closed:
+            self.stats["pool_hits"] += 1
+            self._principal_sessions[principal] = (entry[0], now)
+            self._principal_sessions.move_to_end(principal)
+            return entry[0]
+
+        self.stats["pool_misses"] += 1
+        session = self._new_session()
+        self._principal_sessions[principal] = (session, now)
+        while len(self._principal_sessions) > self.pool_size:
+            _, (evicted, _) = self._principal_sessions.popitem(last=False)
+            self.stats["pool_evictions"] += 1
+            await evicted.close()
+        return session
+
+    async def drop_session(self, principal: str):
+        """Forget the cookies held for `principal`, e.g. after DSpace rejected its CSRF cookie."""
+        entry = self._principal_sessions.pop(principal, None)
+        if entry is not None:
+            await entry[0].close()
+
+    async def _evict_idle(self):
+        # the pool is ordered by last use, so idle sessions are always at the front
+        cutoff = time.monotonic() - self.session_idle_timeout
+        while self._principal_sessions:
+            principal, (session, last_used) = next(iter(self._principal_sessions.items()))
+            if last_used > cutoff:
+                break
+            del self._principal_sessions[principal]
+            self.stats["pool_evictions"] += 1
+            await session.close()
+
+    def pool_stats(self) -> dict:
+        return {**self.stats, "pool_size": len(self._principal_sessions), "pool_capacity": self.pool_size}
 
     async def close(self):
+        while self._principal_sessions:
+            _, (session, _) = self._principal_sessions.popitem()
+            await session.close()
         if self._session and not self._session.closed:
             await self._session.close()
             self._session = None  # reset so it can be recreated
+        if self._connector and not self._connector.closed:
+            await self._connector.close()
+            self._connector = None
 
 http_client = HttpConfig()
\ No newline at end of file
@@ -0,0 +1,213 @@
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+from src.utils.log import setup_logger
+logger = setup_logger(__name__, "local_cache.log")
+
+INVALIDATION_CHANNEL = "cache:invalidate"
+# message meaning "drop everything"
+ALL_KEYS = "*"
+
+
+def namespace_marker(namespace: str) -> str:
+    """Invalidation entry standing for every key of `namespace`."""
+    return f"{namespace}:*"
+
+
+class LocalCache():
+    """
+    Per-process L1 in front of redis for the helpers in redis_client.
+
+    Holds the encoded values redis returned, so every hit is decoded into a fresh
+    object and callers can't mutate each other's results. Entries expire after the
+    TTL of their namespace (the key up to the first ':'), and the least recently used
+    ones are evicted past `max_entries` or `max_bytes`.
+
+    Writes and deletes through redis_client are published on the `cache:invalidate`
+    channel and every worker's listener drops those keys. The L1 only answers while
+    that listener is subscribed: a process without one (a CLI script) or one whose
+    subscription dropped goes straight to redis, and a reconnect starts from empty,
+    since invalidations may have been missed in between.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        max_bytes: int,
+        default_ttl: float,
+        namespace_ttls: Optional[Dict[str, float]] = None,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.namespace_ttls = namespace_ttls or {}
+        self.current_bytes = 0
+        self._entries: "OrderedDict[str, Tuple[Optional[bytes], float]]" = OrderedDict()
+        # bumped by every invalidation, a read that raced one must not be cached
+        self.generation = 0
+        self._listening = False
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {
+            "l1_hits": 0,
+            "l1_misses": 0,
+            "l2_hits": 0,
+            "l2_misses": 0,
+            "evictions": 0,
+            "invalidations": 0,
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.max_bytes > 0 and self._listening
+
+    def ttl(self, key: str) -> float:
+        namespace = key.split(":", 1)[0] if ":" in key else ""
+        return self.namespace_ttls.get(namespace, self.default_ttl)
+
+    # ============ Entries ============
+    def _fresh(self, key: str) -> Optional[Tuple[Optional[bytes], float]]:
+        entry = self._entries.get(key)
+        if entry is not None and entry[1] < time.monotonic():
+            self._remove(key)
+            return None
+        return entry
+
+    def get(self, key: str) -> Optional[bytes]:
+        """The cached encoded value of `key`, None on a miss."""
+        if not self.enabled:
+            return None
+        entry = self._fresh(key)
+        if entry is None or entry[0] is None:
+            self.stats["l1_misses"] += 1
+            return None
+        self._entries.move_to_end(key)
+        self.stats["l1_hits"] += 1
+        return entry[0]
+
+    def exists(self, key: str) -> bool:
+        """True when `key` is known to exist in redis, False means ask redis."""
+        if not self.enabled:
+            return False
+        entry = self._fresh(key)
+        if entry is None:
+            self.stats["l1_misses"] += 1
+            return False
+        self._entries.move_to_end(key)
+        self.stats["l1_hits"] += 1
+        return True
+
+    def put(self, key: str, raw: Optional[bytes], generation: int):
+        """
+        Caches the encoded value of `key`, or with raw=None only the fact that it exists.
+        `generation` is self.generation from before redis was read.
+        """
+        ttl = self.ttl(key)
+        size = len(key) + len(raw or b"")
+        if not self.enabled or ttl <= 0 or size > self.max_bytes or generation != self.generation:
+            return
+        self._remove(key)
+        self._entries[key] = (raw, time.monotonic() + ttl)
+        self.current_bytes += size
+        while self._entries and (len(self._entries) > self.max_entries or self.current_bytes > self.max_bytes):
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.stats["evictions"] += 1
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.current_bytes -= len(key) + len(entry[0] or b"")
+
+    def discard(self, keys: Iterable[str]):
+        self.generation += 1
+        for key in keys:
+            if key.endswith(":*"):
+                prefix = key[:-1]
+                for cached in [cached for cached in self._entries if cached.startswith(prefix)]:
+                    self._remove(cached)
+            else:
+                self._remove(key)
+
+    def clear(self):
+        self.generation += 1
+        self._entries.clear()
+        self.current_bytes = 0
+
+    def record_l2(self, hit: bool):
+        self.stats["l2_hits" if hit else "l2_misses"] += 1
+
+    # ============ Cross-worker Invalidation ============
+    async def publish(self, redis, keys: Iterable[str]):
+        """Drops `keys` here and tells the other workers to do the same."""
+        keys = list(keys)
+        if ALL_KEYS in keys:
+            self.clear()
+        else:
+            self.discard(keys)
+        try:
+            await redis.publish(INVALIDATION_CHANNEL, json.dumps(keys))
+        except Exception as e:
+            logger.error(f"Failed to publish cache invalidation for {keys}: {e}")
+
+    def start(self, redis):
+        if self.max_entries <= 0 or self.max_bytes <= 0:
+            logger.info("L1 cache disabled")
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._listen(redis))
+
+    async def stop(self):
+        self._listening = False
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.clear()
+
+    async def _listen(self, redis):
+        while True:
+            pubsub = redis.pubsub()
+            try:
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                # anything cached before this point may have missed its invalidation
+                self.clear()
+                self._listening = True
+                logger.info(f"L1 cache listening on {INVALIDATION_CHANNEL}")
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    keys = json.loads(message["data"])
+                    self.stats["invalidations"] += 1
+                    if ALL_KEYS in keys:
+                        self.clear()
+                    else:
+                        self.discard(keys)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"L1 cache invalidation listener failed, bypassing L1 until it reconnects: {e}")
+            finally:
+                self._listening = False
+                self.clear()
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+            await asyncio.sleep(1)
+
+    def snapshot(self) -> dict:
+        l1_lookups = self.stats["l1_hits"] + self.stats["l1_misses"]
+        l2_lookups = self.stats["l2_hits"] + self.stats["l2_misses"]
+        return {
+            **self.stats,
+            "l1_hit_ratio": round(self.stats["l1_hits"] / l1_lookups, 4) if l1_lookups else None,
+            "l2_hit_ratio": round(self.stats["l2_hits"] / l2_lookups, 4) if l2_lookups else None,
+            "entries": len(self._entries),
+            "bytes": self.current_bytes,
+            "listening": self._listening,
+        }
@@ -0,0 +1,82 @@
+from bisect import bisect_left
+from typing import Dict, Tuple
+
+# upper bounds in seconds, the last bucket catches everything slower
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram():
+    """Fixed-bucket histogram, observing a value is a bisect and two additions."""
+
+    __slots__ = ("buckets", "counts", "count", "total")
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+
+    def quantile(self, q: float) -> float | None:
+        """Upper bound of the bucket holding the q-th observation (an over-estimate by at most one bucket)."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return self.buckets[index] if index < len(self.buckets) else float("inf")
+        return float("inf")
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": round(self.total, 6),
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "buckets": {
+                **{str(bound): count for bound, count in zip(self.buckets, self.counts)},
+                "+Inf": self.counts[-1],
+            },
+        }
+
+
+class MetricsRegistry():
+    """Process-local histograms and counters, keyed by name and a tuple of label values."""
+
+    def __init__(self):
+        self.histograms: Dict[Tuple, Histogram] = {}
+        self.counters: Dict[Tuple, int] = {}
+
+    def observe(self, name: str, value: float, *labels: str):
+        key = (name, *labels)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram()
+        histogram.observe(value)
+
+    def inc(self, name: str, *labels: str, amount: int = 1):
+        key = (name, *labels)
+        self.counters[key] = self.counters.get(key, 0) + amount
+
+    def snapshot(self) -> dict:
+        histograms: Dict[str, list] = {}
+        for (name, *labels), histogram in self.histograms.items():
+            histograms.setdefault(name, []).append({"labels": labels, **histogram.snapshot()})
+        counters: Dict[str, list] = {}
+        for (name, *labels), value in self.counters.items():
+            counters.setdefault(name, []).append({"labels": labels, "value": value})
+        return {"histograms": histograms, "counters": counters}
+
+    def reset(self):
+        self.histograms.clear()
+        self.counters.clear()
+
+
+metrics = MetricsRegistry()
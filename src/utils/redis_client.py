@@ -1,8 +1,16 @@
 # redis_client.py
+import asyncio
 import json
+import math
+import os
+import random
+import time
 import redis.asyncio as redis
-from typing import Optional
+from redis.exceptions import ResponseError
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
 from src.utils.config import config
+from src.utils.codec import CacheCodecs, CodecError
+from src.utils.local_cache import INVALIDATION_CHANNEL, LocalCache, namespace_marker
 
 from src.utils.log import setup_logger
 logger = setup_logger(__name__, "redis.log")
@@ -11,13 +19,49 @@ CACHE_TTL = 300
 REDIS_URL = config.redis_url
 
 _redis: Optional[redis.Redis] = None
+# cached values are encoded bytes, so the cache helpers use a connection that doesn't decode
+_binary_redis: Optional[redis.Redis] = None
+
+codecs = CacheCodecs(
+    default=config.cache_codec,
+    namespaces=config.cache_codecs,
+    compress_threshold=config.cache_compress_threshold,
+    compress_level=config.cache_compress_level,
+)
+
+# L1 in front of redis, serves reads once start_local_cache() has its invalidation listener up
+local_cache = LocalCache(
+    max_entries=config.l1_cache_max_entries,
+    max_bytes=config.l1_cache_max_bytes,
+    default_ttl=config.l1_cache_default_ttl,
+    namespace_ttls=config.l1_cache_ttls,
+)
+
+# ============ Keys and Tags ============
+# keys are "<namespace>:<id>", so a namespace can be dropped on its own (invalidate_namespace)
+REVOKED = "revoked"
+DSPACE_TOKENS = "dspace_tokens"
+DSPACE_CSRF = "dspace_csrf"
+DSPACE_AUTHZ = "dspace_authz"
+# a tag is a set of keys under "tag:<name>", filled by set_cache(..., tags=) (invalidate_tag)
+TAG_PREFIX = "tag:"
+
+
+def cache_key(namespace: str, *parts) -> str:
+    return ":".join((namespace, *(str(part) for part in parts)))
+
+
+def tag_key(tag: str) -> str:
+    return TAG_PREFIX + tag
+
 
 async def setup_redis() -> redis.Redis:
-    global _redis
+    global _redis, _binary_redis
     if _redis is None:
         # logger.info(f"Initializing Redis connection to {REDIS_URL}")
         try:
             _redis = redis.from_url(REDIS_URL, decode_responses=True)
+            _binary_redis = redis.from_url(REDIS_URL, decode_responses=False)
             # logger.info("Redis connection established successfully")
         except Exception as e:
             logger.error(f"Failed to initialize Redis connection: {str(e)}")
@@ -30,34 +74,187 @@ async def get_redis() -> redis.Redis:
         raise RuntimeError("Redis has not been initialized. Call setup_redis() first.")
     return _redis
 
+async def get_binary_redis() -> redis.Redis:
+    if _binary_redis is None:
+        logger.error("Redis connection not initialized")
+        raise RuntimeError("Redis has not been initialized. Call setup_redis() first.")
+    return _binary_redis
+
+async def start_local_cache():
+    local_cache.start(await get_redis())
 
-async def get_or_fetch_cache(key: str, fetch_callback, ttl: int = CACHE_TTL):
+async def stop_local_cache():
+    await local_cache.stop()
+
+async def _read(redis_conn: redis.Redis, key: str) -> Optional[bytes]:
+    """Encoded value of `key`, from L1 when it has it, else from redis (then kept in L1)."""
+    cached = local_cache.get(key)
+    if cached is not None:
+        return cached
+    generation = local_cache.generation
+    cached = await redis_conn.get(key)
+    local_cache.record_l2(bool(cached))
+    if cached:
+        local_cache.put(key, cached, generation)
+    return cached
+
+
+# ============ Stampede-safe Read-through ============
+# get_or_fetch_cache stores {ENVELOPE_MARKER: 1, "value", "delta", "expiry"}: the value, how long
+# fetching it took and when it expires. Anything else under a key is a plain value (set_cache).
+ENVELOPE_MARKER = "__xfetch__"
+FILL_LOCK_PREFIX = "lock:fill:"
+FILL_POLL_INTERVAL = 0.05
+
+# fills running in this process by key, concurrent misses of one worker share a single fetch
+_fills: Dict[str, asyncio.Future] = {}
+fill_stats = {
+    "hits": 0,
+    "misses": 0,
+    "fetches": 0,
+    "early_refreshes": 0,
+    "coalesced": 0,
+    "lock_waits": 0,
+    "lock_timeouts": 0,
+}
+
+
+def _unwrap(cached: bytes) -> Tuple[Any, Optional[float], Optional[float]]:
+    """(value, delta, expiry) of a cached payload, delta and expiry are None for a plain value."""
+    data = codecs.decode(cached)
+    if isinstance(data, dict) and data.get(ENVELOPE_MARKER) == 1:
+        return data["value"], data["delta"], data["expiry"]
+    return data, None, None
+
+
+def _expires_early(delta: Optional[float], expiry: Optional[float], beta: float) -> bool:
+    """
+    XFetch: true with a probability that grows as `expiry` nears, and sooner for values
+    that took longer (`delta` seconds) to fetch. 1 - random() keeps log() away from 0.
+    """
+    if delta is None or expiry is None or beta <= 0:
+        return False
+    return time.time() - delta * beta * math.log(1.0 - random.random()) >= expiry
+
+
+async def _lock_fill(redis_conn: redis.Redis, key: str) -> bool:
+    return bool(await redis_conn.set(
+        FILL_LOCK_PREFIX + key, "1", nx=True, px=int(config.cache_fill_lock_ttl * 1000)
+    ))
+
+
+async def _shared_fill(key: str, fill: Callable[[], Awaitable[Any]]):
+    inflight = _fills.get(key)
+    if inflight is not None:
+        fill_stats["coalesced"] += 1
+        # shield so a cancelled caller doesn't cancel the fill for the others waiting on it
+        return await asyncio.shield(inflight)
+    inflight = asyncio.ensure_future(fill())
+    _fills[key] = inflight
+    inflight.add_done_callback(lambda future: _fills.pop(key, None) if _fills.get(key) is future else None)
+    return await asyncio.shield(inflight)
+
+
+async def _fill(redis_conn: redis.Redis, key: str, fetch_callback, ttl: int, locked: bool = True):
+    """
+    Fetches the value, then writes it, releases the fill lock and tells the L1s in one
+    round trip. The MULTI makes the value visible in the same instant the lock goes away.
+    """
+    lock = FILL_LOCK_PREFIX + key
+    started = time.monotonic()
     try:
-        redis = await get_redis()
-        logger.debug(f"Attempting to get cached data for key: {key}")
+        fresh = await fetch_callback()
+    except Exception:
+        if locked:
+            # let the next caller try instead of everyone waiting out the lock ttl
+            await redis_conn.delete(lock)
+        raise
+    fill_stats["fetches"] += 1
+    payload = codecs.encode(key, {
+        ENVELOPE_MARKER: 1,
+        "value": fresh,
+        "delta": round(time.monotonic() - started, 6),
+        "expiry": time.time() + ttl,
+    })
+    async with redis_conn.pipeline(transaction=True) as pipe:
+        pipe.set(key, payload, ex=ttl)
+        if locked:
+            pipe.delete(lock)
+        pipe.publish(INVALIDATION_CHANNEL, json.dumps([key]))
+        await pipe.execute()
+    local_cache.discard([key])
+    return fresh
+
 
-        cached = await redis.get(key)
+async def _fill_on_miss(redis_conn: redis.Redis, key: str, fetch_callback, ttl: int):
+    if await _lock_fill(redis_conn, key):
+        return await _fill(redis_conn, key, fetch_callback, ttl)
+
+    # another worker is fetching it, wait for its value rather than asking upstream too
+    fill_stats["lock_waits"] += 1
+    deadline = time.monotonic() + config.cache_fill_wait
+    while time.monotonic() < deadline:
+        await asyncio.sleep(FILL_POLL_INTERVAL)
+        async with redis_conn.pipeline(transaction=False) as pipe:
+            pipe.get(key)
+            # the lock is free again without a value when the other fill failed
+            pipe.set(FILL_LOCK_PREFIX + key, "1", nx=True, px=int(config.cache_fill_lock_ttl * 1000))
+            cached, locked = await pipe.execute()
         if cached:
-            logger.debug(f"Cache hit for key: {key}, value {cached}")
-            return json.loads(cached)
+            if locked:
+                await redis_conn.delete(FILL_LOCK_PREFIX + key)
+            return _unwrap(cached)[0]
+        if locked:
+            return await _fill(redis_conn, key, fetch_callback, ttl)
 
-        # fetch fresh data
-        logger.debug("Cache miss, fetching fresh data...")
-        fresh = await fetch_callback()
-        logger.debug(f"Fetched fresh data: {fresh}")
+    fill_stats["lock_timeouts"] += 1
+    logger.warning(f"Gave up waiting on the fill of {key} after {config.cache_fill_wait}s, fetching it here")
+    return await _fill(redis_conn, key, fetch_callback, ttl, locked=False)
 
-        # set cache
-        await redis.set(key, json.dumps(fresh), ex=ttl)
 
-        # verify immediately
-        verify = await redis.get(key)
-        if not verify:
-            logger.error(f"Key {key} failed to write to cache!")
-            raise RuntimeError(f"Failed to cache data for key {key}")
-        else:
-            logger.debug(f"Key {key} written successfully and readable: {verify}")
+async def get_or_fetch_cache(key: str, fetch_callback, ttl: int = CACHE_TTL):
+    """
+    Cached value of `key`, filled from `fetch_callback()` for `ttl` seconds on a miss.
+
+    A miss takes the key's fill lock and writes the fetched value with a single SET, so
+    concurrent misses, in this worker or any other, cause one upstream call: the rest
+    share it or wait for its value. Values are stored with how long they took to fetch,
+    and every hit draws XFetch's early refresh, so a hot key is normally refetched by one
+    caller shortly before it expires while the others keep reading the old value.
+    """
+    try:
+        redis = await get_binary_redis()
+        logger.debug(f"Attempting to get cached data for key: {key}")
 
-        return fresh
+        cached = await _read(redis, key)
+        try:
+            value, delta, expiry = _unwrap(cached) if cached else (None, None, None)
+        except CodecError as e:
+            # written by a worker with a codec we lack, refetch and overwrite it
+            logger.warning(f"Can't decode cached {key}, refetching: {e}")
+            cached = None
+        if cached:
+            fill_stats["hits"] += 1
+            if key in _fills or not _expires_early(delta, expiry, config.cache_xfetch_beta):
+                return value
+            # this caller drew the early refresh, unless another worker already holds the fill
+            if not await _lock_fill(redis, key):
+                return value
+            if key in _fills:
+                # a fill started here while the lock was taken, joining it would never release ours
+                await redis.delete(FILL_LOCK_PREFIX + key)
+                return value
+            fill_stats["early_refreshes"] += 1
+            logger.debug(f"Refreshing {key} ahead of its expiry")
+            try:
+                return await _shared_fill(key, lambda: _fill(redis, key, fetch_callback, ttl))
+            except Exception as e:
+                logger.warning(f"Early refresh of {key} failed, serving the cached value: {e}")
+                return value
+
+        logger.debug("Cache miss, fetching fresh data...")
+        fill_stats["misses"] += 1
+        return await _shared_fill(key, lambda: _fill_on_miss(redis, key, fetch_callback, ttl))
     except json.JSONDecodeError as e:
         logger.error(f"Failed to decode JSON for key {key}: {str(e)}")
         raise
@@ -65,26 +262,25 @@ async def get_or_fetch_cache(key: str, fetch_callback, ttl: int = CACHE_TTL):
         logger.error(f"Error in get_or_fetch_cache for key {key}: {str(e)}")
         raise
 
-async def set_cache(key: str, data, ttl: int = CACHE_TTL) -> bool:
+async def set_cache(key: str, data, ttl: int = CACHE_TTL, tags: Sequence[str] = ()) -> bool:
     """
-    Store `data` (JSON-serializable) under `key` with expiration `ttl` seconds.
-    Returns True on success, False on failure.
+    Store `data` (JSON-serializable) under `key` with expiration `ttl` seconds, and add
+    `key` to every tag in `tags`. Returns True on success, False on failure.
     """
-    try:
-        redis_conn = await get_redis()
-        payload = json.dumps(data)
-        await redis_conn.set(key, payload, ex=ttl)
-        logger.debug(f"Set cache for key={key} ttl={ttl} payload={payload}")
-        return True
-    except Exception as e:
-        logger.error(f"Failed to write cache for key {key}: {e}")
-        return False
+    return await set_many({key: data}, ttl=ttl, tags=tags)
     
 async def key_exist(key: str) -> bool:
     try:
+        if local_cache.exists(key):
+            return True
         redis = await get_redis()
+        generation = local_cache.generation
         exist = await redis.exists(key)
+        local_cache.record_l2(bool(exist))
         logger.debug(f"Key {key} exists: {bool(exist)}")
+        # only a key that exists is remembered, a cached "no" could hide a key written since
+        if exist:
+            local_cache.put(key, None, generation)
         return bool(exist)
     except Exception as e:
         logger.error(f"Error checking if key {key} exists: {str(e)}")
@@ -97,29 +293,229 @@ async def get_from_cache(key: str):
     Returns the deserialized data if found, None otherwise.
     """
     try:
-        redis = await get_redis()
+        redis = await get_binary_redis()
         logger.debug(f"Attempting to get cached data for key: {key}")
 
-        cached = await redis.get(key)
+        cached = await _read(redis, key)
         if cached:
-            logger.debug(f"Cache hit for key: {key}, value {cached}")
-            return json.loads(cached)
+            logger.debug(f"Cache hit for key: {key} ({len(cached)} bytes)")
+            return _unwrap(cached)[0]
 
         logger.debug(f"Cache miss for key: {key}")
         return None
-    except json.JSONDecodeError as e:
-        logger.error(f"Failed to decode cached JSON for key {key}: {str(e)}")
+    except (ValueError, CodecError) as e:
+        logger.error(f"Failed to decode cached value for key {key}: {str(e)}")
         return None
     except Exception as e:
         logger.error(f"Error retrieving cache for key {key}: {str(e)}")
         return None
 
-async def clear_cache() -> bool:
+async def delete_cache(*keys: str) -> int:
+    """
+    Remove the given keys. Returns how many existed, 0 on failure.
+    """
+    if not keys:
+        return 0
+    try:
+        redis = await get_redis()
+        deleted = await redis.delete(*keys)
+        await local_cache.publish(redis, keys)
+        logger.debug(f"Deleted {deleted} key(s): {keys}")
+        return deleted
+    except Exception as e:
+        logger.error(f"Error deleting keys {keys}: {str(e)}")
+        return 0
+
+async def clear_cache(namespaces: Optional[Iterable[str]] = None) -> Dict[str, int]:
+    """
+    Drops `namespaces` (config.cache_clearable_namespaces by default), returning how many
+    keys each had. Revocations, DSpace tokens, locks and the like are never touched
+    unless asked for by name.
+    """
+    cleared = {}
+    for namespace in namespaces or config.cache_clearable_namespaces:
+        cleared[namespace] = await invalidate_namespace(namespace)
+    logger.info(f"Redis cache cleared: {cleared}")
+    return cleared
+
+
+# ============ Invalidation ============
+async def _unlink(redis_conn: redis.Redis, keys: List[str], marker: Optional[str] = None) -> int:
+    """UNLINKs a batch (freed off redis' main thread) and drops it from every L1."""
+    async with redis_conn.pipeline(transaction=False) as pipe:
+        pipe.unlink(*keys)
+        pipe.publish(INVALIDATION_CHANNEL, json.dumps([marker] if marker else keys))
+        unlinked, _ = await pipe.execute()
+    local_cache.discard([marker] if marker else keys)
+    return unlinked
+
+
+async def _in_batches(keys, redis_conn: redis.Redis, marker: Optional[str] = None) -> int:
+    batch_size = config.cache_invalidate_batch_size
+    batch: List[str] = []
+    unlinked = 0
+    async for key in keys:
+        batch.append(key)
+        if len(batch) >= batch_size:
+            unlinked += await _unlink(redis_conn, batch, marker)
+            batch = []
+            # spread the work out so other clients' commands get in between the batches
+            await asyncio.sleep(config.cache_invalidate_pause)
+    if batch:
+        unlinked += await _unlink(redis_conn, batch, marker)
+    return unlinked
+
+
+async def invalidate_namespace(namespace: str) -> int:
+    """
+    Deletes every "<namespace>:*" key with SCAN and batched UNLINK, never KEYS or a
+    blocking DEL. Costs a walk of the whole keyspace, so prefer a tag when one fits.
+    Every L1 drops the namespace once per batch. Returns the number of keys deleted.
+    """
+    try:
+        redis = await get_redis()
+        started = time.perf_counter()
+        keys = redis.scan_iter(match=f"{namespace}:*", count=config.cache_invalidate_batch_size)
+        unlinked = await _in_batches(keys, redis, marker=namespace_marker(namespace))
+        logger.info(f"Invalidated {unlinked} key(s) of namespace {namespace} in {time.perf_counter() - started:.2f}s")
+        return unlinked
+    except Exception as e:
+        logger.error(f"Error invalidating namespace {namespace}: {str(e)}")
+        return 0
+
+
+async def invalidate_tag(tag: str) -> int:
+    """
+    Deletes every key tagged `tag`. The tag set is renamed away first, so keys tagged
+    while this runs land in a fresh set instead of being lost. Returns the number of
+    keys deleted.
+    """
     try:
         redis = await get_redis()
-        await redis.flushdb()
-        logger.info("Redis cache cleared successfully")
+        started = time.perf_counter()
+        claimed = f"{tag_key(tag)}:invalidating:{os.getpid()}:{time.monotonic_ns()}"
+        try:
+            await redis.rename(tag_key(tag), claimed)
+        except ResponseError:
+            # no such tag, nothing was tagged since the last invalidation
+            return 0
+        keys = redis.sscan_iter(claimed, count=config.cache_invalidate_batch_size)
+        unlinked = await _in_batches(keys, redis)
+        await redis.unlink(claimed)
+        logger.info(f"Invalidated {unlinked} key(s) tagged {tag} in {time.perf_counter() - started:.2f}s")
+        return unlinked
+    except Exception as e:
+        logger.error(f"Error invalidating tag {tag}: {str(e)}")
+        return 0
+
+
+# ============ Batched Access ============
+def _decoded(key: str, cached: bytes):
+    """Value of a cached payload, None (a miss) when it can't be decoded."""
+    try:
+        return _unwrap(cached)[0]
+    except (ValueError, CodecError) as e:
+        logger.warning(f"Can't decode cached {key}, treating it as a miss: {e}")
+        return None
+
+
+async def get_many(
+    keys: Iterable[str],
+    fetch_many: Optional[Callable[[List[str]], Awaitable[Dict[str, Any]]]] = None,
+    ttl: int = CACHE_TTL,
+    ttls: Optional[Dict[str, int]] = None,
+) -> Dict[str, Any]:
+    """
+    Cached values of `keys`, read with one MGET for the keys the L1 doesn't have.
+
+    Misses are left out of the result unless `fetch_many` is given: it is then awaited
+    once with the list of missing keys and returns {key: value} for those it found,
+    which are cached through set_many (`ttls` per key, `ttl` otherwise) and merged in.
+    """
+    keys = list(dict.fromkeys(keys))
+    found: Dict[str, Any] = {}
+    remote = []
+    for key in keys:
+        cached = local_cache.get(key)
+        value = _decoded(key, cached) if cached is not None else None
+        if value is None:
+            remote.append(key)
+        else:
+            found[key] = value
+    if remote:
+        try:
+            redis = await get_binary_redis()
+            generation = local_cache.generation
+            for key, cached in zip(remote, await redis.mget(remote)):
+                local_cache.record_l2(bool(cached))
+                value = _decoded(key, cached) if cached else None
+                if value is not None:
+                    found[key] = value
+                    local_cache.put(key, cached, generation)
+        except Exception as e:
+            # same as get_from_cache: a redis failure reads as misses
+            logger.error(f"Error retrieving {len(remote)} cached key(s): {str(e)}")
+
+    missing = [key for key in keys if key not in found]
+    if missing and fetch_many is not None:
+        fresh = {key: value for key, value in (await fetch_many(missing)).items() if value is not None}
+        await set_many(fresh, ttl=ttl, ttls=ttls)
+        found.update(fresh)
+    return {key: found[key] for key in keys if key in found}
+
+
+async def set_many(
+    items: Dict[str, Any],
+    ttl: int = CACHE_TTL,
+    ttls: Optional[Dict[str, int]] = None,
+    tags: Sequence[str] = (),
+) -> bool:
+    """
+    set_cache for several keys in one pipelined round trip, with the L1 invalidation.
+    MSET can't expire keys, so it's one SET EX per key. `ttls` overrides `ttl` per key.
+    """
+    if not items:
+        return True
+    ttls = ttls or {}
+    try:
+        redis_conn = await get_binary_redis()
+        async with redis_conn.pipeline(transaction=False) as pipe:
+            for key, value in items.items():
+                pipe.set(key, codecs.encode(key, value), ex=ttls.get(key, ttl))
+            longest = max(ttls.get(key, ttl) for key in items)
+            for tag in tags:
+                pipe.sadd(tag_key(tag), *items)
+                # a tag set lives as long as its longest lived key (NX and GT need redis 7)
+                pipe.expire(tag_key(tag), longest, nx=True)
+                pipe.expire(tag_key(tag), longest, gt=True)
+            pipe.publish(INVALIDATION_CHANNEL, json.dumps(list(items)))
+            await pipe.execute()
+        local_cache.discard(items)
+        logger.debug(f"Set cache for {len(items)} key(s)")
         return True
     except Exception as e:
-        logger.error(f"Error clearing Redis cache: {str(e)}")
+        logger.error(f"Failed to write cache for {len(items)} key(s): {e}")
         return False
+
+
+async def exists_many(keys: Iterable[str]) -> Dict[str, bool]:
+    """key_exist for several keys, one pipelined EXISTS per key the L1 doesn't know."""
+    keys = list(dict.fromkeys(keys))
+    result = {key: True for key in keys if local_cache.exists(key)}
+    remote = [key for key in keys if key not in result]
+    if remote:
+        try:
+            redis = await get_redis()
+            generation = local_cache.generation
+            async with redis.pipeline(transaction=False) as pipe:
+                for key in remote:
+                    pipe.exists(key)
+                counts = await pipe.execute()
+            for key, count in zip(remote, counts):
+                local_cache.record_l2(bool(count))
+                result[key] = bool(count)
+                if count:
+                    local_cache.put(key, None, generation)
+        except Exception as e:
+            logger.error(f"Error checking if {len(remote)} key(s) exist: {str(e)}")
+    return {key: result.get(key, False) for key in keys}
@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends, status
 from .service import SuperAdminService, AdminService
 from src.utils.db import get_session
 from sqlalchemy.ext.asyncio import AsyncSession
-from .schema import CreatePermission, CreateRole, ValidatePermissions
+from .schema import CreatePermission, CreateRole, UpdateRole, ValidatePermissions
 from src.utils.response import success_response
 from src.utils.log import setup_logger
 logger = setup_logger(__name__, file_path="admin.log")
@@ -48,6 +48,18 @@ super_admin_service:SuperAdminService = Depends(get_super_admin_service)
     )
     return response
 
+@super_admin_router.patch("/update-role/{role_name}")
+#auth decorator here
+async def update_role(role_name: str, data: UpdateRole,
+super_admin_service:SuperAdminService = Depends(get_super_admin_service)
+):
+    role = await super_admin_service.update_role(role_name, data)
+    response = success_response(
+        status_code=status.HTTP_200_OK,
+        data = role.to_dict()
+    )
+    return response
+
 @super_admin_router.get("/fetch-role")
 #auth decorator here
 async def fetch_all_roles(
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List 
+from typing import List, Optional
 
 class CreatePermission(BaseModel):
     name: str 
@@ -14,6 +14,13 @@ class CreateRole(BaseModel):
     class Config:
         from_attributes = True
     
+class UpdateRole(BaseModel):
+    description: Optional[str] = None
+    # name of the role's dspace group, the role name itself is fixed
+    group_name: Optional[str] = None
+    class Config:
+        from_attributes = True
+
 class ValidatePermissions(BaseModel):
     permissions: List[CreatePermission]
     class Config:
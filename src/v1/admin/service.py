@@ -1,5 +1,6 @@
 from typing import List, Any
-from src.v1.model import User, Role, Permission, PermissionType
+from src.v1.model import User, Role, Permission, PermissionType, OutboxOperation
+from src.v1.dspace.outbox import enqueue_group_write, outbox_dispatcher
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, update
 from src.v1.base.exception import (
@@ -8,7 +9,7 @@ from src.v1.base.exception import (
     NotFoundError,
     AuthorizationError
 )
-from .schema import CreatePermission, CreateRole, ValidatePermissions
+from .schema import CreatePermission, CreateRole, UpdateRole, ValidatePermissions
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from src.utils.log import setup_logger
 logger = setup_logger(__name__, file_path="admin.log")
@@ -106,7 +107,13 @@ class SuperAdminService():
                 permissions = existing_permissions
             )
             self.db.add(new_role)
+            #the dspace group is created by the outbox dispatcher, committed atomically with the role
+            await enqueue_group_write(self.db, new_role, OutboxOperation.CREATE_GROUP, {
+                "name": role_data.name,
+                "metadata": {"dc.description": [{"value": role_data.description}]},
+            })
             await self.db.commit()
+            outbox_dispatcher.notify()
             
             logger.debug(f"Role object created: {new_role.to_dict()}")
             return new_role
@@ -119,6 +126,36 @@ class SuperAdminService():
             logger.error(f"Unexpected error creating role '{role_data.name}': {str(e)}")
             raise
         
+    async def update_role(self, role_name: str, role_data: UpdateRole) -> Role:
+        try:
+            logger.debug(f"Starting to update role: {role_name}")
+            role = await self.check_if_roles_exist(role_name)
+            if not role:
+                logger.warning(f"Role '{role_name}' not found")
+                raise NotFoundError(f"Role '{role_name}' does not exist")
+
+            #changes to mirror on the dspace group
+            group_changes = {}
+            if role_data.description is not None and role_data.description != role.description:
+                role.description = role_data.description
+                group_changes["metadata"] = {"dc.description": [{"value": role_data.description}]}
+            if role_data.group_name:
+                group_changes["name"] = role_data.group_name
+
+            if group_changes:
+                await enqueue_group_write(self.db, role, OutboxOperation.UPDATE_GROUP, group_changes)
+            await self.db.commit()
+            if group_changes:
+                outbox_dispatcher.notify()
+
+            logger.info(f"Role '{role_name}' updated, dspace changes queued: {list(group_changes)}")
+            return role
+        except NotFoundError:
+            raise
+        except SQLAlchemyError as e:
+            logger.error(f"Database error updating role '{role_name}': {str(e)}")
+            raise DatabaseError(f"Error updating role: {str(e)}")
+
     async def fetch_one_role(self, role_name: str) -> Role | None:
         try:
             logger.debug(f"Fetching role: {role_name}")
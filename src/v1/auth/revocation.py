@@ -0,0 +1,200 @@
+import asyncio
+import hashlib
+import math
+import time
+from typing import Optional
+from src.utils.config import config
+from src.utils.redis_client import CACHE_TTL, REVOKED, cache_key, get_redis, key_exist
+from src.utils.log import setup_logger
+logger = setup_logger(__name__, "auth_revocation.log")
+
+# jti -> token expiry, what a filter is rebuilt from
+INDEX_KEY = "revocations:index"
+# every revocation, tailed by the workers to keep their filters current
+STREAM_KEY = "revocations:stream"
+
+
+class BloomFilter():
+    """Fixed size Bloom filter sized for `capacity` items at `fp_rate` false positives."""
+
+    def __init__(self, capacity: int, fp_rate: float):
+        self.capacity = max(capacity, 1)
+        self.fp_rate = fp_rate
+        self.size = max(int(-self.capacity * math.log(fp_rate) / math.log(2) ** 2), 8)
+        self.hashes = max(round(self.size / self.capacity * math.log(2)), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        # double hashing: k positions from the two halves of one digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+    def add(self, item: str):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def expected_fp_rate(self) -> float:
+        return (1 - math.exp(-self.hashes * self.count / self.size)) ** self.hashes
+
+
+class RevocationFilter():
+    """
+    Per-worker Bloom filter of revoked JWT ids in front of the `revoked:<jti>` keys.
+
+    A jti the filter has never seen is not revoked, and the check returns without
+    touching redis; only possible positives are confirmed with an EXISTS. Revoking
+    writes the key, the `revocations:index` sorted set (jti by token expiry) and an
+    entry on the `revocations:stream` stream in one transaction. Every worker tails
+    that stream into its filter, so other workers learn of a revocation within one
+    XREAD. The filter is rebuilt from the index at startup, every `rebuild_interval`
+    seconds and when it outgrows its capacity, which also sheds expired jtis.
+
+    Until the first build, and whenever the stream can't be read, every check goes
+    to redis as before.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 100_000,
+        fp_rate: float = 0.001,
+        rebuild_interval: float = 3600,
+        stream_maxlen: int = 100_000,
+        block_ms: int = 5000,
+    ):
+        self.capacity = capacity
+        self.fp_rate = fp_rate
+        self.rebuild_interval = rebuild_interval
+        self.stream_maxlen = stream_maxlen
+        self.block_ms = block_ms
+        self._filter = BloomFilter(capacity, fp_rate)
+        self._ready = False
+        self._task: Optional[asyncio.Task] = None
+        self.rebuilt_at: Optional[float] = None
+        self.stats = {
+            "checks": 0,
+            "skipped": 0,  # answered by the filter alone
+            "confirmed": 0,  # possible positives that were revoked
+            "false_positives": 0,
+            "revoked": 0,
+            "streamed": 0,
+            "rebuilds": 0,
+        }
+
+    # ============ Checks ============
+    async def is_revoked(self, jti: str) -> bool:
+        self.stats["checks"] += 1
+        if self._ready and jti not in self._filter:
+            self.stats["skipped"] += 1
+            return False
+        revoked = await key_exist(cache_key(REVOKED, jti))
+        if self._ready:
+            self.stats["confirmed" if revoked else "false_positives"] += 1
+        return revoked
+
+    async def revoke(self, jti: str, expires_at: float):
+        """Revokes `jti` until `expires_at` (the token's exp, as a unix timestamp)."""
+        # never shorter than revocations used to last
+        expires_at = max(expires_at, time.time() + CACHE_TTL)
+        redis = await get_redis()
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.set(cache_key(REVOKED, jti), "", ex=max(int(expires_at - time.time()), 1))
+            pipe.zadd(INDEX_KEY, {jti: expires_at})
+            pipe.xadd(STREAM_KEY, {"jti": jti}, maxlen=self.stream_maxlen, approximate=True)
+            await pipe.execute()
+        self._filter.add(jti)
+        self.stats["revoked"] += 1
+        logger.info(f"{jti} has been revoked")
+
+    # ============ Building ============
+    async def rebuild(self) -> str:
+        """Builds a fresh filter from the index, returns the stream id to tail from."""
+        redis = await get_redis()
+        started = time.perf_counter()
+        # the stream position is read first, revocations made while the index is read get replayed
+        latest = await redis.xrevrange(STREAM_KEY, count=1)
+        last_id = latest[0][0] if latest else "0-0"
+        await redis.zremrangebyscore(INDEX_KEY, "-inf", time.time())
+        revoked = await redis.zcard(INDEX_KEY)
+        # room to grow until the next rebuild without losing the target rate
+        bloom = BloomFilter(max(self.capacity, 2 * revoked), self.fp_rate)
+        async for jti, _ in redis.zscan_iter(INDEX_KEY, count=1000):
+            bloom.add(jti)
+        self._filter = bloom
+        self._ready = True
+        self.rebuilt_at = time.monotonic()
+        self.stats["rebuilds"] += 1
+        logger.info(
+            f"revocation filter rebuilt with {bloom.count} jti(s) in {time.perf_counter() - started:.2f}s, "
+            f"{len(bloom.bits)} bytes, {bloom.hashes} hashes, expected fp rate {bloom.expected_fp_rate():.6f}"
+        )
+        return last_id
+
+    def _stale(self) -> bool:
+        return (
+            time.monotonic() - self.rebuilt_at >= self.rebuild_interval
+            or self._filter.count > self._filter.capacity
+        )
+
+    # ============ Background Loop ============
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self._ready = False
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                last_id = await self.rebuild()
+                redis = await get_redis()
+                while not self._stale():
+                    entries = await redis.xread({STREAM_KEY: last_id}, count=1000, block=self.block_ms)
+                    for _, messages in entries or []:
+                        for message_id, fields in messages:
+                            self._filter.add(fields["jti"])
+                            self.stats["streamed"] += 1
+                            last_id = message_id
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # revocations may be missed while the stream is down, check redis until rebuilt
+                self._ready = False
+                logger.error(f"revocation filter sync failed, checking redis until it is rebuilt: {e}")
+                await asyncio.sleep(1)
+
+    def snapshot(self) -> dict:
+        bloom = self._filter
+        negatives = self.stats["checks"] - self.stats["confirmed"]
+        return {
+            **self.stats,
+            "ready": self._ready,
+            "items": bloom.count,
+            "capacity": bloom.capacity,
+            "bytes": len(bloom.bits),
+            "hashes": bloom.hashes,
+            "target_fp_rate": bloom.fp_rate,
+            "expected_fp_rate": round(bloom.expected_fp_rate(), 8),
+            "observed_fp_rate": round(self.stats["false_positives"] / negatives, 8) if negatives else None,
+        }
+
+
+revocation_filter = RevocationFilter(
+    capacity=config.revocation_filter_capacity,
+    fp_rate=config.revocation_filter_fp_rate,
+    rebuild_interval=config.revocation_filter_rebuild_interval,
+    stream_maxlen=config.revocation_stream_maxlen,
+)
@@ -1,6 +1,6 @@
 from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, status
-from src.utils.redis_client import set_cache
+from src.v1.auth.revocation import revocation_filter
 from src.v1.auth.service import AccessTokenBearer, RefreshTokenBearer, auth_service
 from src.v1.auth.schema import CreateUser
 from src.utils.response import success_response
@@ -37,12 +37,7 @@ async def get_new_tokens_token(token_details:dict = Depends(RefreshTokenBearer()
         )
         
         #blacklist the refresh token 
-        jti = token_details["jti"]
-        await set_cache(
-            key= str(jti),
-            data=""
-        )
-        logger.info(f"{jti} has been revoked")
+        await revocation_filter.revoke(token_details["jti"], expiry_timestamp)
         tokens = {
             "access_token": access_token,
             "refresh_token": refresh_token
@@ -58,11 +53,7 @@ async def get_new_tokens_token(token_details:dict = Depends(RefreshTokenBearer()
 
 @auth_router.get("/logout")
 async def revoke_token(token_details:dict = Depends(AccessTokenBearer())):
-    jti = token_details["jti"]
-    await set_cache(
-        key= str(jti),
-        data=""
-    )
+    await revocation_filter.revoke(token_details["jti"], token_details["exp"])
     return success_response(
         message="Logged Out Successfully",
         status_code=status.HTTP_200_OK,
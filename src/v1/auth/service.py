@@ -1,14 +1,19 @@
 from datetime import datetime, timedelta
 import uuid
+from typing import Optional, Sequence
 from passlib.context import CryptContext
 from fastapi import Depends, Request
 import jwt
+from sqlalchemy.ext.asyncio import AsyncSession
 from src.utils.config import config
-from src.v1.base.exception import TokenExpired
+from src.utils.db import get_session
+from src.v1.model import User
+from src.v1.model.roles import Role_Enum
+from src.v1.base.exception import AuthorizationError, TokenExpired
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from src.v1.base.exception import InvalidToken
 from .schema import Token
-from src.utils.redis_client import key_exist, set_cache
+from src.v1.auth.revocation import revocation_filter
 from src.utils.log import setup_logger
 logger = setup_logger(__name__, "auth_service.log")
 
@@ -138,7 +143,7 @@ class TokenService(HTTPBearer):
             raise InvalidToken("No data found in token")
 
         #check if token in  blacklist 
-        if await key_exist(key=token_data["jti"]):
+        if await revocation_filter.is_revoked(token_data["jti"]):
             raise InvalidToken("Token has been revoked, get new token") 
         # Allow child to validate token type (access or refresh)
         self.verify_token_type(token_data)
@@ -179,4 +184,50 @@ class RefreshTokenBearer(TokenService):
 
 
 
-    
\ No newline at end of file
+    
+
+
+class PermissionChecker():
+    """
+    Route dependency on top of AccessTokenBearer that loads the token's user and returns it.
+
+    With `roles`, the user needs one of them (is_admin counts as the admin role); with
+    `permission`, one of their roles has to grant it. Super admins pass every check.
+
+    Usage:
+        @router.post("/items/sync")
+        async def sync(user: User = Depends(PermissionChecker(roles=(Role_Enum.ADMIN,)))):
+            ...
+
+    Raises:
+        InvalidToken: If the user of the token no longer exists or was deleted.
+        AuthorizationError: If the user lacks the role or permission.
+    """
+
+    def __init__(self, permission: Optional[str] = None, roles: Sequence[str] = ()):
+        self.permission = permission
+        self.roles = set(roles)
+
+    async def __call__(
+        self,
+        token_details: dict = Depends(AccessTokenBearer()),
+        db: AsyncSession = Depends(get_session),
+    ) -> User:
+        user = await db.get(User, uuid.UUID(str(token_details["user"]["id"])))
+        if user is None or user.is_deleted:
+            raise InvalidToken("User of this token no longer exists")
+
+        role_names = {str(role.name) for role in user.roles}
+        if user.is_admin:
+            role_names.add(Role_Enum.ADMIN)
+        if Role_Enum.SUPER_ADMIN in role_names:
+            return user
+        if self.roles and not self.roles & role_names:
+            logger.warning(f"user {user.id} lacks any of the roles {sorted(self.roles)}")
+            raise AuthorizationError("You do not have the role required for this action")
+        if self.permission and self.permission not in {
+            permission.name for role in user.roles for permission in role.permissions
+        }:
+            logger.warning(f"user {user.id} lacks the {self.permission} permission")
+            raise AuthorizationError(f"You do not have the '{self.permission}' permission")
+        return user
@@ -57,8 +57,18 @@ class NotActive(BaseExceptionClass):
 class AuthorizationError(BaseExceptionClass):
     pass
 
-class DSpaceError(BaseExceptionClass):
+class TooManyRequests(BaseExceptionClass):
     pass
+
+class DSpaceError(BaseExceptionClass):
+    def __init__(self, message: str | None = None, status: int | None = None):
+        # http status DSpace answered with, None when the request never got a response
+        self.status = status
+        super().__init__(message)
     # def __init__(self, message: str | None = None):
     #     self.message = message or "Unexpected error occurred, check logs"
-    #     super().__init__(self.message)
\ No newline at end of file
+    #     super().__init__(self.message)
+
+class DSpaceUnavailable(DSpaceError):
+    # raised before calling DSpace, the circuit breaker or concurrency limit already judged it overloaded
+    pass
@@ -0,0 +1,116 @@
+import json
+from typing import Any, Awaitable, Callable, Dict, List
+from src.utils.config import config
+from src.utils.redis_client import delete_cache, get_from_cache, get_many, invalidate_tag, set_cache, set_many
+from src.utils.log import setup_logger
+logger = setup_logger(__name__, "dspace_group_cache.log")
+
+
+class GroupCache():
+    """
+    Read-through redis cache for DSpace group lookups.
+
+    Keys:
+        dspace_group:<group_id>            -> fetch_single_group
+        dspace_group_members:<group_id>    -> fetch_users_in_a_group
+        dspace_group_search:<query>        -> search_group_by_name (normalized query)
+
+    Every key is tagged `dspace_groups`, which drops all of them at once. Search results
+    can't be mapped back to the groups they contain, so search keys are also tagged
+    `dspace_group_search` and dropped together whenever a group is created, renamed or
+    deleted.
+    """
+
+    TAG = "dspace_groups"
+    SEARCH_TAG = "dspace_group_search"
+
+    def __init__(self, ttl: int = None, max_members: int = None):
+        self.ttl = ttl or config.dspace_group_cache_ttl
+        # member lists bigger than this are served straight from DSpace instead of cached
+        self.max_members = max_members or config.dspace_group_cache_max_members
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    # ============ Keys ============
+    @staticmethod
+    def group_key(group_id) -> str:
+        return f"dspace_group:{group_id}"
+
+    @staticmethod
+    def members_key(group_id) -> str:
+        return f"dspace_group_members:{group_id}"
+
+    @staticmethod
+    def search_key(query) -> str:
+        if isinstance(query, dict):
+            normalized = json.dumps(query, sort_keys=True, default=str).lower()
+        else:
+            normalized = " ".join(str(query).lower().split())
+        return f"dspace_group_search:{normalized}"
+
+    # ============ Reads ============
+    async def read(self, operation: str, key: str, fetch: Callable[[], Awaitable[Any]]):
+        counters = self.stats.setdefault(operation, {"hits": 0, "misses": 0})
+        cached = await get_from_cache(key)
+        if cached is not None:
+            counters["hits"] += 1
+            logger.debug(f"{operation} cache hit: {key}")
+            return cached
+
+        counters["misses"] += 1
+        value = await fetch()
+        if self._cacheable(value):
+            await set_cache(key, value, ttl=self.ttl, tags=self._tags(key))
+        return value
+
+    async def read_many(
+        self,
+        operation: str,
+        keys: Dict[Any, str],
+        fetch_many: Callable[[List[Any]], Awaitable[Dict[Any, Any]]],
+    ) -> Dict[Any, Any]:
+        """
+        read() for several ids at once. `keys` maps each id to its cache key; the cached
+        ones come from one MGET and the rest from a single fetch_many(ids) call.
+        """
+        counters = self.stats.setdefault(operation, {"hits": 0, "misses": 0})
+        cached = await get_many(keys.values())
+        found = {id_: cached[key] for id_, key in keys.items() if key in cached}
+        missing = [id_ for id_ in keys if id_ not in found]
+        counters["hits"] += len(found)
+        counters["misses"] += len(missing)
+        if missing:
+            fetched = await fetch_many(missing)
+            await set_many(
+                {keys[id_]: value for id_, value in fetched.items() if value is not None and self._cacheable(value)},
+                ttl=self.ttl,
+                tags=[self.TAG],
+            )
+            found.update(fetched)
+        return found
+
+    def _cacheable(self, value) -> bool:
+        return not (isinstance(value, list) and len(value) > self.max_members)
+
+    def _tags(self, key: str) -> List[str]:
+        if key.startswith("dspace_group_search:"):
+            return [self.TAG, self.SEARCH_TAG]
+        return [self.TAG]
+
+    # ============ Invalidation ============
+    async def invalidate_group(self, group_id):
+        """A group's own data changed (renamed or deleted)."""
+        await delete_cache(self.group_key(group_id))
+
+    async def invalidate_members(self, group_id):
+        await delete_cache(self.members_key(group_id))
+
+    async def invalidate_searches(self):
+        """Any group was created, renamed or deleted, so any search may now return something else."""
+        invalidated = await invalidate_tag(self.SEARCH_TAG)
+        logger.debug(f"Invalidated {invalidated} group search key(s)")
+
+    async def invalidate_all(self):
+        return await invalidate_tag(self.TAG)
+
+
+group_cache = GroupCache()
@@ -1,13 +1,21 @@
 import asyncio
+import copy
+import hashlib
+from contextlib import asynccontextmanager
+from functools import partial
 from datetime import datetime, timedelta, timezone
 import aiohttp
-from typing import Dict, Any, Optional 
+from collections import deque
+from typing import AsyncIterable, AsyncIterator, Dict, Any, Optional 
 from src.utils.config import config
 from src.utils.http_config import http_client
+from src.v1.dspace.http_cache import HttpCache
+from src.v1.dspace.resilience import DspaceResilience
 import json
 from src.utils.log import setup_logger
 from src.v1.base.exception import (
-    DSpaceError
+    DSpaceError,
+    DSpaceUnavailable,
 )
 import logging 
 from tenacity import (
@@ -15,11 +23,16 @@ from tenacity import (
     retry,
     stop_after_attempt,
     wait_exponential,
-    retry_if_exception,
     before_sleep_log,
 )
 logger = setup_logger(__name__, "client.log")
 
+# only these are safe to send again when the first attempt may have reached DSpace
+IDEMPOTENT_METHODS = ("GET", "HEAD")
+
+# cookie DSpace pairs with the DSPACE-XSRF-TOKEN header, its value is the csrf token itself
+CSRF_COOKIE = "DSPACE-XSRF-COOKIE"
+
 def log_retry_details(retry_state):
     """Logs the exact cause of failure before Tenacity sleeps for the next attempt."""
     exc = retry_state.outcome.exception()
@@ -34,35 +47,124 @@ def log_retry_details(retry_state):
 #predicate function for retry
 def is_retryable(exc: Exception) -> bool:
     """Check if the error warrants a retry."""
+    # the breaker or limiter turned the call away, retrying only adds to the pile up
+    if isinstance(exc, DSpaceUnavailable):
+        return False
+
     # Retry on connectivity or timeout issues
     if isinstance(exc, (asyncio.TimeoutError, aiohttp.ClientConnectionError)):
         return True
     
     # Retry on specific HTTP status codes
-    if isinstance(exc, aiohttp.ClientResponseError):
+    if isinstance(exc, (aiohttp.ClientResponseError, DSpaceError)) and exc.status is not None:
         # 429: Too Many Requests, 5xx: Server Errors
         return exc.status == 429 or exc.status >= 500
         
     return False
 
+def should_retry(retry_state) -> bool:
+    """
+    Retry predicate of _send_request: a retryable error on an idempotent request, and
+    only while the circuit of the endpoint is closed. Once DSpace is known to be
+    overloaded the call fails fast instead of queueing more attempts behind it.
+    """
+    exc = retry_state.outcome.exception()
+    if exc is None or not is_retryable(exc):
+        return False
+    # _send_request(self, http_method, endpoint, ...)
+    args, kwargs = retry_state.args, retry_state.kwargs
+    client = args[0]
+    http_method = kwargs.get("http_method", args[1] if len(args) > 1 else "")
+    endpoint = kwargs.get("endpoint", args[2] if len(args) > 2 else "")
+    if http_method.upper() not in IDEMPOTENT_METHODS:
+        return False
+    return not client.resilience.overloaded(endpoint)
+
 class DspaceClient:
     """This module handles making requests to DSpace to access its infrastructure"""
 
-    def __init__(self):
+    def __init__(self, http_cache: Optional[HttpCache] = None, coalesce_gets: bool = False):
         logger.info("Initializing DSpace client")
         self.base_url = config.base_url
         logger.debug(f"Base URL configured as: {self.base_url}")
+        self.stats = {"csrf_fetched": 0, "csrf_reused": 0, "coalesced_gets": 0}
+        # identical concurrent GETs share one upstream request when enabled
+        self.coalesce_gets = coalesce_gets
+        self._inflight_gets: Dict[tuple, asyncio.Future] = {}
+        # optional conditional GET cache, revalidates with ETag / Last-Modified
+        self.http_cache = http_cache
+        # circuit breaker and adaptive concurrency limit per endpoint class
+        self.resilience = DspaceResilience()
+
+    async def _make_request(
+        self,
+        http_method: str,
+        endpoint: str,
+        query_params: Dict = None,
+        data: Dict = None,
+        req_headers: Optional[Dict]=None,
+        jwt_token: str = None,
+        principal: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Make HTTP request to DSpace API. With `coalesce_gets` on, a GET identical to one
+        already in flight (same url, query, headers and caller identity) waits for that
+        request instead of going upstream again, and every caller gets its own copy of
+        the parsed result. Writes are never coalesced.
+        """
+        request = dict(
+            http_method=http_method,
+            endpoint=endpoint,
+            query_params=query_params,
+            data=data,
+            req_headers=req_headers,
+            jwt_token=jwt_token,
+            principal=principal,
+        )
+        if not self.coalesce_gets or http_method.upper() != "GET":
+            return await self._send_request(**request)
+
+        identity = principal or (hashlib.sha256(jwt_token.encode()).hexdigest() if jwt_token else "")
+        key = (
+            endpoint,
+            tuple(sorted((str(k), str(v)) for k, v in (query_params or {}).items())),
+            tuple(sorted((req_headers or {}).items())),
+            identity,
+        )
+        inflight = self._inflight_gets.get(key)
+        if inflight is not None:
+            self.stats["coalesced_gets"] += 1
+            logger.debug(f"joining in-flight GET {endpoint}")
+            return self._copy_result(await asyncio.shield(inflight))
+
+        inflight = asyncio.ensure_future(self._send_request(**request))
+        self._inflight_gets[key] = inflight
+        inflight.add_done_callback(partial(self._clear_inflight_get, key))
+        # shield so a cancelled caller doesn't cancel the request for the others waiting on it
+        return self._copy_result(await asyncio.shield(inflight))
+
+    @staticmethod
+    def _copy_result(result: tuple) -> tuple:
+        # the callers sharing a request must not see each other's changes to the body
+        body, headers = result
+        return copy.deepcopy(body), headers.copy()
+
+    def _clear_inflight_get(self, key: tuple, future: asyncio.Future):
+        if self._inflight_gets.get(key) is future:
+            del self._inflight_gets[key]
+        if not future.cancelled():
+            future.exception()
 
     #retry logic  
     @retry(
-        retry=retry_if_exception(is_retryable), # takes the exception and pass it to the predicate function passed, which retries based on logic
+        retry=should_retry, # gets the retry state (exception and call arguments), retries idempotent calls on transient errors
         wait=wait_exponential(multiplier=1, min=2, max=30), #exponetial backoff
         stop=stop_after_attempt(4), # number of attempts before giving up.
         before_sleep=log_retry_details, #log failures that are going to be retried.
         after=after_log(logger, logging.DEBUG), #log after a call that failed
         reraise=True #ee the exception your code encountered at the end of the stack trace (where it is most visible)
     )
-    async def _make_request(
+    async def _send_request(
         self,
         http_method: str,
         endpoint: str,
@@ -72,10 +174,11 @@ class DspaceClient:
         req_headers: Optional[Dict]=None,
         jwt_token: str = None,
         # xrsf_token:str=None 
+        principal: Optional[str] = None,
     ) -> Dict[str, Any]:
-        """Make HTTP request to DSpace API"""
+        """Make HTTP request to DSpace API, using the cookie jar of `principal` when given"""
 
-        self.session = await http_client.get_session()
+        session = await http_client.get_session(principal)
         url = f"{self.base_url}/{endpoint}"
         http_method = http_method.upper()
 
@@ -89,6 +192,13 @@ class DspaceClient:
         if jwt_token:
             headers["Authorization"] = jwt_token
             
+        # revalidate a cached response instead of downloading it again
+        cache_key, cached = None, None
+        if self.http_cache is not None and http_method == "GET":
+            cache_key = self.http_cache.key(url, query_params, principal, jwt_token)
+            cached = self.http_cache.get(cache_key)
+            if cached is not None:
+                headers.update(self.http_cache.conditional_headers(cached))
 
 
         # ================= REQUEST DATA =================
@@ -101,11 +211,12 @@ class DspaceClient:
 
         #handle query param
         if query_params:
-            request_kwargs["payload"] = query_params
+            request_kwargs["params"] = query_params
         # Handle content type
         content_type = headers.get("Content-Type", "").lower()
         if http_method in ("POST", "PUT", "PATCH"):
-            if content_type == "application/x-www-form-urlencoded":
+            #form bodies and uri lists are sent as is, everything else is json encoded
+            if content_type in ("application/x-www-form-urlencoded", "text/uri-list"):
                 request_kwargs["data"] = data
             else:
                 request_kwargs["json"] = data
@@ -121,15 +232,26 @@ class DspaceClient:
         # logger.debug(f"Request cookies: {request_kwargs.get("cookies")}")
 
 
-        async with self.session.request(**request_kwargs) as response:
-            logger.info(f"Total cookies in jar: {len(self.session.cookie_jar)}")
-            for cookie in self.session.cookie_jar:
-                logger.info(f"Name: {cookie.key}")
-                logger.info(f"Value: {cookie.value}")
-                logger.info(f"Domain: {cookie['domain']}")
-                logger.info("-" * 10)
-            response_headers = dict(response.headers)
-            return await self._handle_response(response, response_headers)
+        # fails fast while the circuit for this endpoint class is open
+        async with self.resilience.guard(endpoint):
+            async with session.request(**request_kwargs) as response:
+                logger.info(f"Total cookies in jar: {len(session.cookie_jar)}")
+                for cookie in session.cookie_jar:
+                    logger.info(f"Name: {cookie.key}")
+                    logger.info(f"Value: {cookie.value}")
+                    logger.info(f"Domain: {cookie['domain']}")
+                    logger.info("-" * 10)
+                if response.status == 304 and cached is not None:
+                    logger.debug(f"Not modified, serving cached response for: {url}")
+                    return self.http_cache.revalidated(cache_key, cached, response.headers)
+
+                response_headers = dict(response.headers)
+                result = await self._handle_response(response, response_headers)
+                if cache_key is not None and response.status == 200:
+                    # the body was already read while parsing, read() just hands back the buffered bytes
+                    body_size = len(await response.read())
+                    self.http_cache.store(cache_key, result[0], response.headers, body_size)
+                return result
 
         # except Exception as e:
         #     logger.error(f"Unexpected error during API request: {str(e)}", exc_info=True)
@@ -137,6 +259,72 @@ class DspaceClient:
 
 
 
+    # ================= Streaming Transfers =================
+    async def upload_bitstream(
+        self,
+        endpoint: str,
+        chunks: AsyncIterable[bytes],
+        filename: str,
+        content_type: str = "application/octet-stream",
+        properties: Optional[Dict[str, Any]] = None,
+        req_headers: Optional[Dict] = None,
+        jwt_token: str = None,
+        principal: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        POST a multipart/form-data bitstream upload to DSpace, sending the file part with
+        chunked transfer encoding straight from `chunks`. The body can only be read once,
+        so unlike _make_request this is never retried.
+        """
+        session = await http_client.get_session(principal)
+        url = f"{self.base_url}/{endpoint}"
+        headers = {**req_headers} if req_headers else {}
+        if jwt_token:
+            headers["Authorization"] = jwt_token
+
+        with aiohttp.MultipartWriter("form-data") as form:
+            if properties is not None:
+                part = form.append_json(properties)
+                part.set_content_disposition("form-data", name="properties")
+            part = form.append(aiohttp.payload.AsyncIterablePayload(chunks, content_type=content_type))
+            part.set_content_disposition("form-data", name="file", filename=filename)
+
+        # the 30s session timeout would cut large files off, only stalls are timed out here
+        timeout = aiohttp.ClientTimeout(total=None, sock_connect=30, sock_read=config.dspace_transfer_timeout)
+        logger.info(f"Streaming bitstream {filename} to: {url}")
+        async with self.resilience.guard(endpoint, adaptive=False):
+            async with session.post(url, data=form, headers=headers, timeout=timeout) as response:
+                return await self._handle_response(response, dict(response.headers))
+
+    @asynccontextmanager
+    async def stream(
+        self,
+        endpoint: str,
+        req_headers: Optional[Dict] = None,
+        jwt_token: str = None,
+        principal: Optional[str] = None,
+        pass_statuses: tuple = (304, 416),
+    ) -> AsyncIterator[aiohttp.ClientResponse]:
+        """
+        GET `endpoint` and yield the open response so the body can be read in chunks.
+        Error statuses raise DSpaceError like _make_request does, except `pass_statuses`
+        (by default 304 Not Modified and 416 Range Not Satisfiable), which the caller
+        relays to its own client.
+        """
+        session = await http_client.get_session(principal)
+        url = f"{self.base_url}/{endpoint}"
+        headers = {**req_headers} if req_headers else {}
+        if jwt_token:
+            headers["Authorization"] = jwt_token
+
+        timeout = aiohttp.ClientTimeout(total=None, sock_connect=30, sock_read=config.dspace_transfer_timeout)
+        logger.info(f"Streaming GET from: {url}")
+        async with self.resilience.guard(endpoint, adaptive=False):
+            async with session.get(url, headers=headers, timeout=timeout) as response:
+                if response.status >= 300 and response.status not in pass_statuses:
+                    await self._handle_response(response, dict(response.headers))
+                yield response
+
     # ================= Helper Method =================
     async def _handle_response(self, response: aiohttp.ClientResponse, headers: Dict[str, Any]):
         """
@@ -174,10 +362,95 @@ class DspaceClient:
             )
 
             # Raise structured error
-            raise DSpaceError()
+            raise DSpaceError(status=e.status)
  
         
-    async def get_csrf_token(self):
+    async def paginate(
+        self,
+        endpoint: str,
+        embedded_key: Optional[str] = None,
+        query_params: Optional[Dict] = None,
+        page_size: Optional[int] = None,
+        read_ahead: Optional[int] = None,
+        jwt_token: Optional[str] = None,
+        principal: Optional[str] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yields the entries of a paginated HAL collection (`_embedded[embedded_key]`) one by one.
+
+        While page N is being consumed, up to `read_ahead` following pages are already
+        being fetched, so at most 1 + read_ahead pages are held in memory at a time
+        regardless of the collection size. When `embedded_key` is omitted the first
+        list found under `_embedded` is used.
+        """
+        page_size = page_size or config.dspace_page_size
+        read_ahead = config.dspace_read_ahead if read_ahead is None else read_ahead
+        base_params = {**(query_params or {}), "size": page_size}
+
+        async def fetch_page(number: int) -> Dict[str, Any]:
+            body, _ = await self._make_request(
+                http_method="get",
+                endpoint=endpoint,
+                query_params={**base_params, "page": number},
+                jwt_token=jwt_token,
+                principal=principal,
+            )
+            return body if isinstance(body, dict) else {}
+
+        def entries(body: Dict[str, Any]):
+            embedded = body.get("_embedded") or {}
+            if embedded_key is not None:
+                return embedded.get(embedded_key) or []
+            return next((value for value in embedded.values() if isinstance(value, list)), [])
+
+        first = await fetch_page(0)
+        total_pages = (first.get("page") or {}).get("totalPages", 1)
+        logger.debug(f"paginating {endpoint}: {total_pages} page(s) of {page_size}")
+
+        pending: deque = deque()
+        next_page = 1
+        try:
+            def schedule():
+                nonlocal next_page
+                while len(pending) < max(read_ahead, 1) and next_page < total_pages:
+                    pending.append(asyncio.create_task(fetch_page(next_page)))
+                    next_page += 1
+
+            if read_ahead:
+                schedule()
+            for entry in entries(first):
+                yield entry
+            del first
+
+            while pending or next_page < total_pages:
+                schedule()
+                body = await pending.popleft()
+                # keep the pipeline full before handing this page to the consumer
+                if read_ahead:
+                    schedule()
+                for entry in entries(body):
+                    yield entry
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def get_csrf_token(self, principal: Optional[str] = None):
+        """
+        Returns the CSRF token to send as X-XSRF-TOKEN. When `principal` still holds a
+        valid DSPACE-XSRF-COOKIE in its own cookie jar, that value is reused and the
+        security/csrf round trip is skipped; `reused` tells the caller which happened.
+        """
+        if principal is not None:
+            session = await http_client.get_session(principal)
+            cookie = session.cookie_jar.filter_cookies(self.base_url).get(CSRF_COOKIE)
+            if cookie is not None and cookie.value:
+                self.stats["csrf_reused"] += 1
+                logger.debug(f"reusing CSRF cookie for {principal}")
+                return {
+                    "DSPACE-XSRF-TOKEN": cookie.value,
+                    "reused": True,
+                }
+
         logger.info("Requesting CSRF token")
         endpoint = "security/csrf"
         
@@ -189,18 +462,18 @@ class DspaceClient:
                 http_method="get",
                 endpoint=endpoint,
                 req_headers=headers, 
+                principal=principal,
             )
+            self.stats["csrf_fetched"] += 1
             
             logger.info("CSRF token retrieved successfully")
-            cookies = self.session.cookie_jar.filter_cookies(self.base_url)
-            cookie_value = list(cookies.values())[0].value
-            self.csrf_token = res_headers.get("DSPACE-XSRF-TOKEN")
-            if not self.csrf_token:
+            csrf_token = res_headers.get("DSPACE-XSRF-TOKEN")
+            if not csrf_token:
                 logger.error("CSRF token not found in response headers")
                 raise DSpaceError("CSRF token not found in response headers")
-            logger.debug(f"cookie value: {cookie_value}")
             session_data = {
-            "DSPACE-XSRF-TOKEN": self.csrf_token,
+            "DSPACE-XSRF-TOKEN": csrf_token,
+            "reused": False,
         }
             return session_data
         
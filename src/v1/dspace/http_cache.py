@@ -0,0 +1,97 @@
+import copy
+import hashlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Mapping, Optional, Tuple
+from multidict import CIMultiDict
+from src.utils.log import setup_logger
+logger = setup_logger(__name__, "dspace_http_cache.log")
+
+# describe the (empty) body of a 304 rather than the resource, never merged into the stored headers
+BODY_HEADERS = ("Content-Length", "Content-Encoding", "Transfer-Encoding")
+
+
+@dataclass
+class CachedResponse:
+    body: Any  # already parsed, every caller that gets a 304 for it gets its own copy
+    headers: CIMultiDict
+    etag: Optional[str]
+    last_modified: Optional[str]
+    size: int
+
+
+class HttpCache():
+    """
+    In-memory validator cache for DSpace GET responses.
+
+    Responses carrying an ETag or Last-Modified are kept per (principal, url, query),
+    revalidated with If-None-Match / If-Modified-Since, and on a 304 a copy of the
+    stored, already-parsed body is served again with the 304's own headers (a fresh
+    csrf token or Authorization, say) over the stored ones. Entries are evicted least recently used
+    first once the stored bodies exceed `max_bytes`.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._entries: "OrderedDict[Tuple, CachedResponse]" = OrderedDict()
+        self.stats = {"revalidated": 0, "misses": 0, "stored": 0, "evictions": 0}
+
+    @staticmethod
+    def key(url: str, query_params: Optional[Dict], principal: Optional[str], jwt_token: Optional[str]) -> Tuple:
+        # the same url can render differently per user, so the identity is part of the key
+        identity = principal or (hashlib.sha256(jwt_token.encode()).hexdigest() if jwt_token else "")
+        query = tuple(sorted((str(k), str(v)) for k, v in (query_params or {}).items()))
+        return identity, url, query
+
+    def get(self, key: Tuple) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats["misses"] += 1
+        return entry
+
+    @staticmethod
+    def conditional_headers(entry: CachedResponse) -> Dict[str, str]:
+        headers = {}
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def revalidated(self, key: Tuple, entry: CachedResponse, headers: Mapping[str, Any]) -> Tuple[Any, CIMultiDict]:
+        """Body and headers for a 304, `headers` being the ones the 304 came with."""
+        self.stats["revalidated"] += 1
+        self._entries.move_to_end(key)
+        # a 304 carries the current headers of the resource, they replace the stored ones
+        entry.headers.update((name, value) for name, value in headers.items() if name.title() not in BODY_HEADERS)
+        entry.etag = entry.headers.get("ETag")
+        entry.last_modified = entry.headers.get("Last-Modified")
+        # callers are free to modify what they get, the stored body must stay as it was
+        return copy.deepcopy(entry.body), entry.headers.copy()
+
+    def store(self, key: Tuple, body: Any, headers: Mapping[str, Any], size: int):
+        # headers is the case-insensitive aiohttp mapping, stored as a case-insensitive copy
+        self.discard(key)
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return
+        if "no-store" in headers.get("Cache-Control", "") or size > self.max_bytes:
+            return
+
+        self._entries[key] = CachedResponse(copy.deepcopy(body), CIMultiDict(headers), etag, last_modified, size)
+        self.current_bytes += size
+        self.stats["stored"] += 1
+        while self.current_bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.current_bytes -= evicted.size
+            self.stats["evictions"] += 1
+
+    def discard(self, key: Tuple):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.current_bytes -= entry.size
+
+    def cache_stats(self) -> dict:
+        return {**self.stats, "entries": len(self._entries), "bytes": self.current_bytes, "max_bytes": self.max_bytes}
@@ -0,0 +1,231 @@
+import asyncio
+from collections import OrderedDict
+from contextlib import aclosing
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+from sqlalchemy import exists, select, func
+from sqlalchemy.orm import aliased
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.utils.config import config
+from src.utils.db import get_async_db_session
+from src.v1.model import Role, DspaceOutbox, OutboxOperation, OutboxStatus
+from src.v1.dspace.schema import CreateGroup
+from src.v1.dspace.service import dspace_group_service
+from src.v1.dspace.role_groups import role_group_map
+from src.utils.log import setup_logger
+logger = setup_logger(__name__, "dspace_outbox.log")
+
+
+class OutboxNotReady(Exception):
+    """The row depends on an earlier write that hasn't reached DSpace yet."""
+
+
+class OutboxDispatcher():
+    """
+    Drains the dspace_outbox table to DSpace in the background.
+
+    Admin endpoints only write the role and its outbox row in one transaction, so
+    they answer at database speed and a DSpace outage never shows up as request
+    latency. Rows are claimed with FOR UPDATE SKIP LOCKED, so several workers can
+    run a dispatcher side by side. Rows of one role are applied in order: a row is
+    only claimed once every earlier row of its role is done, so a failed or backing
+    off row holds back the ones behind it. Different roles run concurrently. A failed
+    row, or one waiting on a group that doesn't exist yet, is retried with exponential
+    backoff until `max_attempts`, after which it is marked failed.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = 50,
+        poll_interval: float = 5,
+        max_attempts: int = 10,
+        concurrency: int = 4,
+        retry_delay: float = 5,
+        max_retry_delay: float = 600,
+    ):
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.concurrency = concurrency
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {
+            "batches": 0,
+            "dispatched": 0,
+            "retries": 0,
+            "deferred": 0,  # waiting on an earlier row of the same role
+            "failed": 0,  # gave up after max_attempts
+        }
+
+    # ============ Background Loop ============
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            logger.info("started DSpace outbox dispatcher")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def notify(self):
+        """Wakes the dispatcher up right away instead of at the next poll."""
+        self._wakeup.set()
+
+    async def _run(self):
+        while True:
+            try:
+                while await self.dispatch_batch():
+                    # rows held back behind the ones just applied may be due now
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"DSpace outbox dispatch failed: {e}", exc_info=True)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    # ============ Dispatch ============
+    async def dispatch_batch(self) -> int:
+        """Claims up to `batch_size` due rows, sends them to DSpace and records the outcome."""
+        earlier = aliased(DspaceOutbox)
+        async with get_async_db_session() as session:
+            result = await session.execute(
+                select(DspaceOutbox)
+                .where(
+                    DspaceOutbox.status == OutboxStatus.PENDING,
+                    DspaceOutbox.next_attempt_at <= func.now(),
+                    # an earlier write of the same role that isn't through yet goes first
+                    ~exists().where(
+                        earlier.role_id == DspaceOutbox.role_id,
+                        earlier.status != OutboxStatus.DONE,
+                        earlier.created_at < DspaceOutbox.created_at,
+                    ),
+                )
+                .order_by(DspaceOutbox.created_at)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            rows = result.scalars().all()
+            if not rows:
+                return 0
+
+            by_role: Dict = OrderedDict()
+            for row in rows:
+                by_role.setdefault(row.role_id, []).append(row)
+            roles = {
+                role.id: role
+                for role in (await session.execute(select(Role).where(Role.id.in_(by_role)))).scalars().all()
+            }
+
+            semaphore = asyncio.Semaphore(self.concurrency)
+
+            async def apply_role(role_id, role_rows: List[DspaceOutbox]):
+                async with semaphore:
+                    for position, row in enumerate(role_rows):
+                        if not await self._apply(row, roles.get(role_id)):
+                            # keep the order of this role's writes, the rest waits for the next batch
+                            self.stats["deferred"] += len(role_rows) - position - 1
+                            return
+
+            await asyncio.gather(*(apply_role(role_id, role_rows) for role_id, role_rows in by_role.items()))
+            self.stats["batches"] += 1
+            logger.info(f"dispatched DSpace outbox batch of {len(rows)} row(s)")
+
+        # only once the group_ids are committed can other workers pick them up
+        if any(row.operation == OutboxOperation.CREATE_GROUP and row.status == OutboxStatus.DONE for row in rows):
+            await role_group_map.bump()
+        return len(rows)
+
+    async def _apply(self, row: DspaceOutbox, role: Optional[Role]) -> bool:
+        now = datetime.now(timezone.utc)
+        if role is None:
+            row.status = OutboxStatus.FAILED
+            row.last_error = f"role {row.role_id} no longer exists"
+            self.stats["failed"] += 1
+            logger.error(f"dropping outbox row {row.id}: {row.last_error}")
+            return False
+        try:
+            if row.operation == OutboxOperation.CREATE_GROUP:
+                await self._create_group(row, role)
+            elif row.operation == OutboxOperation.UPDATE_GROUP:
+                await self._update_group(row, role)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if isinstance(e, OutboxNotReady):
+                self.stats["deferred"] += 1
+            row.attempts += 1
+            row.last_error = getattr(e, "message", None) or str(e) or type(e).__name__
+            if row.attempts >= self.max_attempts:
+                row.status = OutboxStatus.FAILED
+                self.stats["failed"] += 1
+                logger.error(f"giving up on outbox row {row.id} ({row.operation}) after {row.attempts} attempt(s): {row.last_error}")
+            else:
+                delay = min(self.retry_delay * 2 ** (row.attempts - 1), self.max_retry_delay)
+                row.next_attempt_at = now + timedelta(seconds=delay)
+                self.stats["retries"] += 1
+                logger.warning(f"outbox row {row.id} ({row.operation}) failed, retrying in {delay}s: {row.last_error}")
+            return False
+
+        row.status = OutboxStatus.DONE
+        row.processed_at = now
+        row.last_error = None
+        self.stats["dispatched"] += 1
+        return True
+
+    async def _create_group(self, row: DspaceOutbox, role: Role):
+        if role.group_id:
+            logger.info(f"role {role.name} already has group {role.group_id}, nothing to create")
+            return
+        name = row.payload["name"]
+        # a previous run may have created the group and died before committing the group_id
+        group = None
+        async with aclosing(dspace_group_service.iter_groups_by_name(name)) as candidates:
+            async for candidate in candidates:
+                if candidate.get("name") == name:
+                    group = candidate
+                    break
+        if group is None:
+            group = await dspace_group_service.create_group(CreateGroup(
+                name=name,
+                metadata=row.payload.get("metadata", {}),
+                role_name=role.name,
+            ))
+        role.group_id = group["id"]
+        logger.info(f"role {role.name} linked to DSpace group {role.group_id}")
+
+    async def _update_group(self, row: DspaceOutbox, role: Role):
+        if not role.group_id:
+            raise OutboxNotReady(f"role {role.name} has no DSpace group yet")
+        if row.payload.get("name"):
+            await dspace_group_service.update_group_name(role.group_id, row.payload["name"])
+        if row.payload.get("metadata"):
+            await dspace_group_service.update_metadata(role.group_id, row.payload["metadata"])
+
+
+async def enqueue_group_write(session: AsyncSession, role: Role, operation: OutboxOperation, payload: dict) -> DspaceOutbox:
+    """Adds an outbox row to `session`, it is committed together with the role change."""
+    if role.id is None:
+        # a new role only gets its id on flush
+        await session.flush()
+    row = DspaceOutbox(role_id=role.id, operation=operation, payload=payload)
+    session.add(row)
+    return row
+
+
+outbox_dispatcher = OutboxDispatcher(
+    batch_size=config.dspace_outbox_batch_size,
+    poll_interval=config.dspace_outbox_poll_interval,
+    max_attempts=config.dspace_outbox_max_attempts,
+    concurrency=config.dspace_outbox_concurrency,
+)
@@ -0,0 +1,125 @@
+import asyncio
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set
+from sqlalchemy import select
+from src.utils.config import config
+from src.utils.db import get_async_db_session
+from src.v1.model import Role, User, user_roles
+from src.v1.model.roles import Role_Enum
+from src.v1.dspace.service import dspace_group_service
+from src.utils.log import setup_logger
+logger = setup_logger(__name__, "dspace_reconcile.log")
+
+
+class MembershipReconciler():
+    """
+    Brings DSpace group membership back in line with our user_roles.
+
+    For every role linked to a group, the wanted members (User.dspace_id of the role's
+    users) are compared with the group's current members, paged straight from DSpace
+    rather than the group cache. Only the difference is written: missing members are
+    added in text/uri-list batches, extra ones removed one call each, so a group that
+    hasn't drifted costs its member pages and nothing else.
+
+    Members DSpace has that aren't users of ours at all (added by hand in DSpace, say)
+    are reported but left alone unless `remove_unknown` is set.
+    """
+
+    def __init__(self, concurrency: int = 4, page_size: Optional[int] = None):
+        self.concurrency = concurrency
+        self.page_size = page_size
+
+    async def reconcile(
+        self,
+        dry_run: bool = True,
+        roles: Optional[Iterable[Role_Enum]] = None,
+        remove_unknown: bool = False,
+    ) -> Dict[str, Any]:
+        started = time.perf_counter()
+        async with get_async_db_session() as session:
+            query = select(Role).where(Role.group_id.is_not(None))
+            if roles:
+                query = query.where(Role.name.in_(list(roles)))
+            linked_roles = [(role.id, str(role.name), role.group_id) for role in (await session.execute(query)).scalars()]
+            known = set((await session.execute(select(User.dspace_id))).scalars().all())
+
+        groups = []
+        for role_id, role_name, group_id in linked_roles:
+            groups.append(await self._reconcile_group(role_id, role_name, group_id, known, dry_run, remove_unknown))
+
+        result = {
+            "dry_run": dry_run,
+            "groups": groups,
+            "added": sum(len(group["add"]) for group in groups),
+            "removed": sum(len(group["remove"]) for group in groups),
+            "duration": round(time.perf_counter() - started, 3),
+        }
+        logger.info(
+            f"membership reconcile{' (dry run)' if dry_run else ''}: {len(groups)} group(s), "
+            f"{result['added']} to add, {result['removed']} to remove in {result['duration']}s"
+        )
+        return result
+
+    async def _wanted(self, role_id) -> Set[str]:
+        async with get_async_db_session() as session:
+            result = await session.execute(
+                select(User.dspace_id)
+                .join(user_roles, user_roles.c.user_id == User.id)
+                .where(user_roles.c.role_id == role_id, User.is_deleted.is_(False))
+            )
+            return set(result.scalars().all())
+
+    async def _current(self, group_id: str) -> Set[str]:
+        members = set()
+        async for member in dspace_group_service.iter_users_in_a_group(group_id, page_size=self.page_size):
+            members.add(member.get("id") or member.get("uuid"))
+        return members
+
+    async def _reconcile_group(
+        self,
+        role_id,
+        role_name: str,
+        group_id: str,
+        known: Set[str],
+        dry_run: bool,
+        remove_unknown: bool,
+    ) -> Dict[str, Any]:
+        wanted, current = await asyncio.gather(self._wanted(role_id), self._current(group_id))
+        extra = current - wanted
+        unknown = extra - known
+        report = {
+            "role": role_name,
+            "group_id": group_id,
+            "wanted": len(wanted),
+            "current": len(current),
+            "add": sorted(wanted - current),
+            "remove": sorted(extra if remove_unknown else extra - unknown),
+            "unknown": len(unknown),
+        }
+        if dry_run or not (report["add"] or report["remove"]):
+            return report
+
+        failed: List[Dict[str, Any]] = []
+        if report["add"]:
+            linked = await dspace_group_service.link_users_to_group(group_id, report["add"], concurrency=self.concurrency)
+            failed.extend(linked["failed"])
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def remove(eperson_id: str):
+            async with semaphore:
+                try:
+                    await dspace_group_service.remove_user_in_a_group(group_id, eperson_id)
+                except Exception as e:
+                    failed.append({"user_id": eperson_id, "error": getattr(e, "message", None) or type(e).__name__})
+
+        await asyncio.gather(*(remove(eperson_id) for eperson_id in report["remove"]))
+        report["failed"] = failed
+        logger.info(
+            f"group {group_id} ({role_name}): added {len(report['add'])}, removed {len(report['remove'])}, "
+            f"{len(failed)} failed"
+        )
+        return report
+
+
+membership_reconciler = MembershipReconciler(concurrency=config.dspace_membership_concurrency)
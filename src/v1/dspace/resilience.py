@@ -0,0 +1,232 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from enum import StrEnum
+from typing import Dict
+import aiohttp
+from src.utils.config import config
+from src.v1.base.exception import DSpaceUnavailable
+from src.utils.log import setup_logger
+logger = setup_logger(__name__, "dspace_resilience.log")
+
+
+class CircuitState(StrEnum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+def is_overload(exc: BaseException) -> bool:
+    """Errors that say DSpace is struggling, as opposed to rejecting a bad request."""
+    if isinstance(exc, (asyncio.TimeoutError, aiohttp.ClientConnectionError)):
+        return True
+    status = getattr(exc, "status", None)
+    return status is not None and (status == 429 or status >= 500)
+
+
+class CircuitBreaker():
+    """
+    Stops calling an endpoint class after `failure_threshold` consecutive overload errors.
+
+    closed    -> calls go through, failures are counted
+    open      -> calls fail immediately until `recovery_timeout` has passed
+    half_open -> up to `half_open_max_calls` probe calls go through, one success closes
+                 the circuit again and one failure opens it for another timeout
+    """
+
+    def __init__(self, name: str, failure_threshold: int, recovery_timeout: float, half_open_max_calls: int = 1):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.state = CircuitState.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probes = 0
+        self.rejected = 0
+
+    def before_call(self):
+        if self.state == CircuitState.OPEN and time.monotonic() - self.opened_at >= self.recovery_timeout:
+            logger.info(f"circuit {self.name} half open, probing DSpace")
+            self.state = CircuitState.HALF_OPEN
+            self.probes = 0
+
+        if self.state == CircuitState.OPEN or (
+            self.state == CircuitState.HALF_OPEN and self.probes >= self.half_open_max_calls
+        ):
+            self.rejected += 1
+            raise DSpaceUnavailable(f"DSpace {self.name} is unavailable, circuit open")
+
+        if self.state == CircuitState.HALF_OPEN:
+            self.probes += 1
+
+    def cancel_call(self):
+        # a cancelled probe says nothing about DSpace, give its slot back
+        if self.state == CircuitState.HALF_OPEN and self.probes > 0:
+            self.probes -= 1
+
+    def record_success(self):
+        if self.state != CircuitState.CLOSED:
+            logger.info(f"circuit {self.name} closed")
+        self.state = CircuitState.CLOSED
+        self.failures = 0
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == CircuitState.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != CircuitState.OPEN:
+                logger.warning(f"circuit {self.name} opened after {self.failures} failure(s)")
+            self.state = CircuitState.OPEN
+            self.opened_at = time.monotonic()
+
+    def snapshot(self) -> dict:
+        return {"state": self.state, "consecutive_failures": self.failures, "rejected": self.rejected}
+
+
+class AdaptiveLimiter():
+    """
+    AIMD concurrency limit driven by observed latency.
+
+    Calls faster than `latency_target` grow the limit by about one per `limit`
+    successes; slow calls shrink it by `slow_backoff` and overload errors halve it.
+    Both happen at most once per window: after a decrease, the slow or failed
+    completions of the calls that were already running under the old limit (one
+    old limit's worth) don't shrink it again. Callers over the limit wait up to
+    `queue_timeout` seconds for a slot.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        initial: int,
+        min_limit: int,
+        max_limit: int,
+        latency_target: float,
+        queue_timeout: float,
+        slow_backoff: float = 0.9,
+        failure_backoff: float = 0.5,
+    ):
+        self.name = name
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target = latency_target
+        self.queue_timeout = queue_timeout
+        self.slow_backoff = slow_backoff
+        self.failure_backoff = failure_backoff
+        self.in_flight = 0
+        self.queue_timeouts = 0
+        self.completed = 0
+        # completion count from which the next decrease may apply
+        self._decrease_after = 0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self):
+        async with self._condition:
+            try:
+                await asyncio.wait_for(
+                    self._condition.wait_for(lambda: self.in_flight < int(self.limit)),
+                    timeout=self.queue_timeout,
+                )
+            except asyncio.TimeoutError:
+                self.queue_timeouts += 1
+                raise DSpaceUnavailable(f"DSpace {self.name} concurrency limit reached")
+            self.in_flight += 1
+
+    async def release(self, latency: float, overloaded: bool):
+        self.completed += 1
+        if overloaded or latency > self.latency_target:
+            if self.completed >= self._decrease_after:
+                self._decrease_after = self.completed + int(self.limit)
+                backoff = self.failure_backoff if overloaded else self.slow_backoff
+                self.limit = max(self.min_limit, self.limit * backoff)
+        else:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def snapshot(self) -> dict:
+        return {
+            "limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "queue_timeouts": self.queue_timeouts,
+        }
+
+
+def endpoint_class(endpoint: str) -> str:
+    """Groups endpoints by their first two path segments, e.g. eperson/groups/<id>/epersons -> eperson/groups."""
+    parts = [part for part in endpoint.split("?", 1)[0].split("/") if part]
+    return "/".join(parts[:2]) or "root"
+
+
+class DspaceResilience():
+    """Keeps one circuit breaker and one adaptive limiter per DSpace endpoint class."""
+
+    def __init__(self):
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.limiters: Dict[str, AdaptiveLimiter] = {}
+
+    def _for(self, name: str):
+        if name not in self.breakers:
+            self.breakers[name] = CircuitBreaker(
+                name,
+                failure_threshold=config.dspace_breaker_failure_threshold,
+                recovery_timeout=config.dspace_breaker_recovery_timeout,
+            )
+            self.limiters[name] = AdaptiveLimiter(
+                name,
+                initial=config.dspace_limit_initial,
+                min_limit=1,
+                max_limit=config.dspace_limit_max,
+                latency_target=config.dspace_latency_target,
+                queue_timeout=config.dspace_limit_queue_timeout,
+            )
+        return self.breakers[name], self.limiters[name]
+
+    def overloaded(self, endpoint: str) -> bool:
+        """True while the circuit of this endpoint's class is not closed, i.e. DSpace is known to be struggling."""
+        breaker = self.breakers.get(endpoint_class(endpoint))
+        return breaker is not None and breaker.state != CircuitState.CLOSED
+
+    @asynccontextmanager
+    async def guard(self, endpoint: str, adaptive: bool = True):
+        """
+        Runs a call under the breaker and limiter of its endpoint class. Pass
+        adaptive=False for long transfers, their duration says nothing about how
+        loaded DSpace is and would only drag the limit down.
+        """
+        breaker, limiter = self._for(endpoint_class(endpoint))
+        breaker.before_call()
+        if adaptive:
+            try:
+                await limiter.acquire()
+            except BaseException:
+                breaker.cancel_call()
+                raise
+        started = time.monotonic()
+        overloaded = False
+        try:
+            yield
+        except asyncio.CancelledError:
+            breaker.cancel_call()
+            raise
+        except BaseException as e:
+            overloaded = is_overload(e)
+            if overloaded:
+                breaker.record_failure()
+            else:
+                # the request made it to DSpace and back, the backend itself is fine
+                breaker.record_success()
+            raise
+        else:
+            breaker.record_success()
+        finally:
+            if adaptive:
+                await limiter.release(time.monotonic() - started, overloaded)
+
+    def snapshot(self) -> dict:
+        return {
+            name: {**self.breakers[name].snapshot(), **self.limiters[name].snapshot()}
+            for name in self.breakers
+        }
@@ -0,0 +1,101 @@
+import asyncio
+from types import MappingProxyType
+from typing import Mapping, Optional
+from sqlalchemy import select
+from src.utils.config import config
+from src.utils.db import get_async_db_session
+from src.utils.redis_client import get_redis
+from src.v1.model import Role
+from src.utils.log import setup_logger
+logger = setup_logger(__name__, "dspace_role_groups.log")
+
+
+class RoleGroupMap():
+    """
+    Per-process role name -> DSpace group_id map, so provisioning never queries Role.
+
+    The map is loaded from the roles table at startup and replaced as a whole, never
+    mutated, so readers always see one consistent snapshot. Whoever changes a role's
+    group_id bumps the `role_groups:version` key in redis after committing; every
+    worker polls that key and reloads when it moves.
+    """
+
+    VERSION_KEY = "role_groups:version"
+
+    def __init__(self, poll_interval: float = 5):
+        self.poll_interval = poll_interval
+        self.version: Optional[int] = None
+        self._groups: Mapping[str, str] = MappingProxyType({})
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"reloads": 0, "lookups": 0, "unmapped": 0}
+
+    # ============ Lookups ============
+    def group_id(self, role_name) -> Optional[str]:
+        """DSpace group of a role, None when the role has no group (yet)."""
+        self.stats["lookups"] += 1
+        group_id = self._groups.get(str(role_name))
+        if group_id is None:
+            self.stats["unmapped"] += 1
+        return group_id
+
+    @property
+    def groups(self) -> Mapping[str, str]:
+        return self._groups
+
+    # ============ Loading ============
+    async def load(self):
+        redis = await get_redis()
+        # read the version first, a bump landing mid load then just causes one more reload
+        version = int(await redis.get(self.VERSION_KEY) or 0)
+        async with get_async_db_session() as session:
+            rows = (await session.execute(select(Role.name, Role.group_id))).all()
+        self._groups = MappingProxyType({str(name): group_id for name, group_id in rows if group_id})
+        self.version = version
+        self.stats["reloads"] += 1
+        logger.info(f"loaded DSpace groups of {len(self._groups)} role(s) at version {version}")
+
+    async def refresh(self):
+        """Reloads the map if another process bumped the version since the last load."""
+        redis = await get_redis()
+        version = int(await redis.get(self.VERSION_KEY) or 0)
+        if version != self.version:
+            await self.load()
+
+    async def bump(self):
+        """Call after committing a group_id change, every worker reloads within one poll."""
+        redis = await get_redis()
+        version = await redis.incr(self.VERSION_KEY)
+        logger.info(f"role groups changed, version is now {version}")
+        await self.load()
+
+    # ============ Background Loop ============
+    async def start(self):
+        await self.load()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # keep serving the last good map
+                logger.error(f"role group refresh failed: {e}")
+
+    def snapshot(self) -> dict:
+        return {**self.stats, "version": self.version, "roles": len(self._groups)}
+
+
+role_group_map = RoleGroupMap(poll_interval=config.role_group_poll_interval)
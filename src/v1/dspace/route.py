@@ -1,11 +1,23 @@
 # dspace auth routes
-from fastapi import APIRouter, Depends
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Query
 
 from src.utils.log import setup_logger
-from src.v1.dspace.schema import CreateGroup
-from src.v1.dspace.service import DspaceAuthService, DspaceGroupService
+from src.v1.dspace.schema import CreateGroup, GroupMembers
+from src.v1.dspace.service import DspaceAuthService, DspaceGroupService, admin_token_provider, dspace_client
+from src.utils.http_config import http_client
+from src.utils.metrics import metrics
+from src.v1.dspace.cache import group_cache
+from src.v1.dspace.outbox import outbox_dispatcher
+from src.v1.dspace.role_groups import role_group_map
+from src.v1.dspace.reconcile import membership_reconciler
 from src.v1.auth.schema import CreateUser, Login
-from src.utils.redis_client import clear_cache
+from src.v1.auth.revocation import revocation_filter
+from src.v1.auth.service import PermissionChecker
+from src.v1.model.roles import Role_Enum
+from src.utils.redis_client import clear_cache, codecs, fill_stats, invalidate_namespace, invalidate_tag, local_cache
+from src.utils.config import config
+from src.v1.base.exception import BadRequest
 logger = setup_logger(__name__, "dspace_auth_routes.log")
 
 # auth for implement admin endpoints for testing, or use http client to access this
@@ -54,8 +66,70 @@ async def create_group(
     
 
 
+@dspace_auth_router.post(
+    "/groups/{group_id}/members",
+    tags=["auth"],
+    dependencies=[Depends(PermissionChecker(roles=(Role_Enum.SUPER_ADMIN,)))],
+)
+async def add_group_members(
+    group_id: str,
+    data: GroupMembers,
+    group_service: DspaceGroupService = Depends(get_group_service)):
+    result = await group_service.link_users_to_group(group_id, data.user_ids)
+    logger.info(f"linked {len(result['linked'])} user(s) to group {group_id}, {len(result['failed'])} failed")
+    return result
+
+
+@dspace_auth_router.get("/role-groups")
+#auth decorator here
+async def role_groups(group_service: DspaceGroupService = Depends(get_group_service)):
+    # the DSpace group of every linked role, cached groups are read in one round trip
+    linked = role_group_map.groups
+    groups = await group_service.fetch_groups(list(dict.fromkeys(linked.values())))
+    return {role: groups.get(group_id) for role, group_id in linked.items()}
+
+
+@dspace_auth_router.post(
+    "/reconcile-memberships",
+    dependencies=[Depends(PermissionChecker(roles=(Role_Enum.SUPER_ADMIN,)))],
+)
+async def reconcile_memberships(
+    dry_run: bool = True,
+    remove_unknown: bool = False,
+    role: Optional[List[Role_Enum]] = Query(None),
+):
+    # dry run by default, the response is the diff that would be applied
+    return await membership_reconciler.reconcile(dry_run=dry_run, roles=role, remove_unknown=remove_unknown)
+
+
 @dspace_auth_router.get("/clear-cache")
-async def clear():
-    await clear_cache()
-    return {"msg": "cache cleared"}
-    
\ No newline at end of file
+#auth decorator here
+async def clear(namespace: Optional[str] = None, tag: Optional[str] = None):
+    # by default drops every clearable namespace, never revocations or DSpace tokens
+    if tag:
+        return {"msg": "cache cleared", "tag": tag, "keys": await invalidate_tag(tag)}
+    if namespace:
+        if namespace not in config.cache_clearable_namespaces:
+            raise BadRequest(f"namespace '{namespace}' can't be cleared, expected one of {config.cache_clearable_namespaces}")
+        return {"msg": "cache cleared", "namespace": namespace, "keys": await invalidate_namespace(namespace)}
+    return {"msg": "cache cleared", "keys": await clear_cache()}
+
+
+@dspace_auth_router.get("/stats")
+async def stats():
+    # counters for monitoring how the DSpace integration is behaving under load
+    return {
+        "token_provider": admin_token_provider.stats,
+        "client": dspace_client.stats,
+        "session_pool": http_client.pool_stats(),
+        "group_cache": group_cache.stats,
+        "cache": local_cache.snapshot(),
+        "cache_fill": fill_stats,
+        "cache_codecs": codecs.snapshot(),
+        "http_cache": dspace_client.http_cache.cache_stats() if dspace_client.http_cache else None,
+        "circuits": dspace_client.resilience.snapshot(),
+        "outbox": outbox_dispatcher.stats,
+        "role_groups": role_group_map.snapshot(),
+        "revocation_filter": revocation_filter.snapshot(),
+        "http": metrics.snapshot(),
+    }
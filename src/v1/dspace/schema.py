@@ -25,6 +25,9 @@ class GroupParams(BaseModel):
     group_id: uuid.UUID
     group_name: str
 
+class GroupMembers(BaseModel):
+    user_ids: List[uuid.UUID]
+
 # Minimal test data example
 # test_group_data = CreateGroup(
 #     name="Library Administrators",
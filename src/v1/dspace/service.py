@@ -1,19 +1,36 @@
+import asyncio
 from src.v1.dspace.client import DspaceClient
-from src.utils.redis_client import set_cache, get_or_fetch_cache, get_from_cache
+from src.v1.dspace.http_cache import HttpCache
+from src.utils.http_config import http_client
+from src.utils.redis_client import DSPACE_AUTHZ, DSPACE_CSRF, DSPACE_TOKENS, cache_key, set_cache, get_or_fetch_cache, get_from_cache
 from src.utils.config import config
 from src.v1.auth.schema import Login, CreateUser, EPersonCreate
 from src.utils.log import setup_logger
 from src.v1.base.exception import (
     BadRequest,
-    DSpaceError
+    DSpaceError,
+    NotFoundError
 )
 from src.v1.dspace.schema import CreateGroup
+from src.v1.dspace.cache import group_cache
+from src.v1.dspace.role_groups import role_group_map
+from src.v1.dspace.token_provider import DspaceTokenProvider, token_ttl
 from pydantic import ValidationError
 from enum import Enum
 from functools import partial
 logger = setup_logger(__name__, "dspace_auth_service.log")
 logger_group = setup_logger("dspace_group_service", "dspace_group_service.log")
 
+# statuses that say nothing about the request itself, the same request may well succeed later
+NOT_REJECTIONS = (401, 403, 408, 429)
+
+
+def is_rejection(exc: Exception) -> bool:
+    """DSpace refused the request itself (a 4xx such as 422 for an unknown eperson uri)."""
+    status = getattr(exc, "status", None)
+    return isinstance(exc, DSpaceError) and status is not None and 400 <= status < 500 and status not in NOT_REJECTIONS
+
+
 class HTTPMethod(str, Enum):
     """Enum for HTTP verbs"""
     GET = "get"
@@ -24,7 +41,10 @@ class HTTPMethod(str, Enum):
     HEAD = "head"
     OPTIONS = "options"
 
-dspace_client = DspaceClient()
+dspace_client = DspaceClient(
+    http_cache=HttpCache(config.dspace_http_cache_max_bytes) if config.dspace_http_cache_max_bytes else None,
+    coalesce_gets=config.dspace_coalesce_gets,
+)
 
 class DspaceAuthService():
     """this class handles authentication and authorization for dspace"""
@@ -38,16 +58,6 @@ class DspaceAuthService():
         try:
             
             logger.info(f"Attempting login for user: {email}")
-            #fetch a new token for every login 
-            token = await dspace_client.get_csrf_token()
-            # token:dict = await self._fetch_csrf_token(email)
-            
-            xsrf_token = token.get("DSPACE-XSRF-TOKEN")
-            headers = {
-                "X-XSRF-TOKEN": xsrf_token,
-                "Content-Type": "application/x-www-form-urlencoded",
-            }
-            
             payload = {
                 "email": email,
                 "password": password
@@ -63,14 +73,18 @@ class DspaceAuthService():
             validated_data["user"] = validated_data.pop("email")
             logger.info(f"validated data: {validated_data}")
             
-            
-            req, res_headers = await dspace_client._make_request(
-                http_method=HTTPMethod.POST,
-                endpoint="authn/login",
-                data=validated_data,
-                req_headers=headers,
-                # cookie_data=cookie
-            )
+            #each user logs in through their own cookie jar, so a csrf cookie left by their last login is reused
+            token = await dspace_client.get_csrf_token(principal=email)
+            try:
+                req, res_headers = await self._post_login(email, validated_data, token)
+            except DSpaceError:
+                if not token.get("reused"):
+                    raise
+                #dspace no longer accepts the cookie we kept, start over with a fresh csrf token
+                logger.warning(f"stored CSRF cookie rejected for {email}, fetching a new one")
+                await http_client.drop_session(email)
+                token = await dspace_client.get_csrf_token(principal=email)
+                req, res_headers = await self._post_login(email, validated_data, token)
             logger.info(f"Login successful for user: {email}")
             logger.debug(f"headers: {res_headers}")
             logger.debug(f"res body: {req}")
@@ -78,14 +92,15 @@ class DspaceAuthService():
             #update jwt/header token to from header, so can access for other endpoints
             crsf_token = res_headers.get("DSPACE-XSRF-TOKEN")
             jwt_token = res_headers.get("Authorization")
-            token = await self.status(jwt_token, crsf_token)
+            token = await self.status(jwt_token, crsf_token, principal=email)
             logger.info(f"new token: {token}")
             
             data = {
                 "DSPACE-XSRF-TOKEN":token,
                 "jwt_token": jwt_token 
             }
-            await set_cache(email, data)
+            # cache for as long as the jwt is actually valid rather than a fixed ttl
+            await set_cache(cache_key(DSPACE_TOKENS, email), data, ttl=token_ttl(jwt_token))
             logger.info(f"set cache for: {data}")
             return data
             
@@ -93,10 +108,21 @@ class DspaceAuthService():
             logger.error(f"Login failed for user {email}: {str(e)}")
             raise DSpaceError()
     
+    async def _post_login(self, email: str, validated_data: dict, token: dict):
+        headers = {
+            "X-XSRF-TOKEN": token.get("DSPACE-XSRF-TOKEN"),
+            "Content-Type": "application/x-www-form-urlencoded",
+        }
+        return await dspace_client._make_request(
+            http_method=HTTPMethod.POST,
+            endpoint="authn/login",
+            data=validated_data,
+            req_headers=headers,
+            principal=email,
+        )
+    
     async def register(self, user_data: CreateUser):
         try:
-            self.login_callback = partial(self.login, config.base_username, config.base_password)
-            
             logger.info(f"Attempting to register new user: {user_data.email}")
             
             # base_user = config.base_username
@@ -105,7 +131,7 @@ class DspaceAuthService():
             # Make the request with base credentials to fetch tokens for user creation
             
             #check redis for token to reduce API call
-            tokens:dict = await get_or_fetch_cache(config.base_username, self.login_callback)
+            tokens:dict = await admin_token_provider.get_tokens()
             # tokens: dict = await self.login(base_user, base_password)
             crsf_token = tokens.get("DSPACE-XSRF-TOKEN")
             jwt_token = tokens.get("jwt_token")
@@ -132,7 +158,8 @@ class DspaceAuthService():
                 http_method=HTTPMethod.POST,
                 endpoint="eperson/epersons",
                 data=new_user,
-                jwt_token=jwt_token
+                jwt_token=jwt_token,
+                principal=config.base_username
             )
             
             logger.info(f"User registered successfully: {user_data.email}")
@@ -147,6 +174,19 @@ class DspaceAuthService():
         except Exception as e:
             logger.error(f"Unexpected error during registration for user {user_data.email}: {str(e)}")
             raise DSpaceError()
+
+    async def find_eperson_by_email(self, email: str):
+        """The eperson registered with `email`, None when there is none."""
+        tokens = await admin_token_provider.get_tokens()
+        eperson, _ = await dspace_client._make_request(
+            http_method=HTTPMethod.GET,
+            endpoint="eperson/epersons/search/byEmail",
+            query_params={"email": email},
+            jwt_token=tokens.get("jwt_token"),
+            principal=config.base_username
+        )
+        # dspace answers 204 without a body when nobody has that email
+        return eperson if isinstance(eperson, dict) and eperson.get("id") else None
         
     
 
@@ -155,7 +195,7 @@ class DspaceAuthService():
     async def _fetch_csrf_token(email: str):
         #this methods fetches token from the cache, or make a request to get a new one
         try:
-            token = await get_or_fetch_cache(str(email), dspace_client.get_csrf_token)
+            token = await get_or_fetch_cache(cache_key(DSPACE_CSRF, email), dspace_client.get_csrf_token)
             logger.debug(f"CSRF token fetched for {email}. Token:{token}")
             return token
         except Exception as e:
@@ -201,7 +241,7 @@ class DspaceAuthService():
             logger.error(f"Failed to logout: {str(e)}")
             raise DSpaceError()
     
-    async def status(self, access_token, crsf_token):
+    async def status(self, access_token, crsf_token, principal=None):
         try:
             logger.info("Attempting to fetch authentication status")
             headers = {
@@ -211,7 +251,8 @@ class DspaceAuthService():
             req, res_headers = await dspace_client._make_request(
                 http_method=HTTPMethod.GET,
                 endpoint="authn/status",
-                req_headers=headers
+                req_headers=headers,
+                principal=principal
             )
             logger.info("Authentication status retrieved successfully")
             logger.debug(f"Response headers: {res_headers}")
@@ -225,11 +266,53 @@ class DspaceAuthService():
 
 
 
+class DspaceAuthzService():
+    """
+    Asks DSpace whether an eperson has an authorization feature on an object, so requests
+    made with the super admin's tokens only do what the user could do themselves.
+    Answers are cached for config.dspace_authz_cache_ttl seconds.
+    """
+
+    # feature names of the dspace authorization endpoint
+    CAN_DOWNLOAD = "canDownload"
+    CAN_CREATE_BITSTREAM = "canCreateBitstream"
+
+    async def is_authorized(self, feature: str, object_endpoint: str, eperson_id=None) -> bool:
+        """
+        True when `eperson_id` (anonymous when None) has `feature` on the object at
+        `object_endpoint`, e.g. core/bitstreams/<id>.
+        """
+        return await get_or_fetch_cache(
+            cache_key(DSPACE_AUTHZ, eperson_id or "anonymous", feature, object_endpoint),
+            partial(self._is_authorized, feature, object_endpoint, eperson_id),
+            ttl=config.dspace_authz_cache_ttl,
+        )
+
+    async def _is_authorized(self, feature: str, object_endpoint: str, eperson_id=None) -> bool:
+        query_params = {"uri": f"{config.base_url}/{object_endpoint}", "feature": feature}
+        jwt_token, principal = None, None
+        if eperson_id is not None:
+            # only an admin may ask on behalf of another eperson
+            tokens = await admin_token_provider.get_tokens()
+            jwt_token, principal = tokens.get("jwt_token"), config.base_username
+            query_params["eperson"] = str(eperson_id)
+        body, _ = await dspace_client._make_request(
+            http_method=HTTPMethod.GET,
+            endpoint="authz/authorizations/search/object",
+            query_params=query_params,
+            jwt_token=jwt_token,
+            principal=principal,
+        )
+        # dspace answers 204 without a body when the feature isn't granted
+        authorized = isinstance(body, dict) and bool((body.get("_embedded") or {}).get("authorizations"))
+        logger.debug(f"{eperson_id or 'anonymous'} {'has' if authorized else 'lacks'} {feature} on {object_endpoint}")
+        return authorized
+
+
 class DspaceGroupService():
     """this class handles group operations for dspace"""
     def __init__(self, auth_service: "DspaceAuthService"):
         self.auth_service = auth_service
-        self.login_callback = partial(self.auth_service.login, config.base_username, config.base_password)
 
     
     async def create_group(self, group_data:CreateGroup):
@@ -237,7 +320,7 @@ class DspaceGroupService():
             #groups represents roles
             #it will be an atomic operation to when creating roles from our admin endpoints
             logger_group.info(f"group data: {group_data.model_dump()}")
-            tokens = await get_or_fetch_cache(config.base_username, self.login_callback)
+            tokens = await admin_token_provider.get_tokens()
             crsf_token = tokens.get("DSPACE-XSRF-TOKEN")
             jwt_token = tokens.get("jwt_token")
             header = {
@@ -252,10 +335,12 @@ class DspaceGroupService():
                     endpoint="eperson/groups",
                     data=group_data.model_dump(exclude={"role_name"}),
                     req_headers = header,
-                    jwt_token=jwt_token
+                    jwt_token=jwt_token,
+                    principal=config.base_username
                 )
 
             logger_group.info(f"group created successfully: {group_data.name}")
+            await group_cache.invalidate_searches()
             logger_group.debug(f"Response headers: {res_headers}")
             logger_group.debug(f"Response body: {req}")
 
@@ -270,6 +355,25 @@ class DspaceGroupService():
 
     
     async def fetch_single_group(self, group_id:str):
+        return await group_cache.read(
+            "fetch_single_group",
+            group_cache.group_key(group_id),
+            partial(self._fetch_single_group, group_id)
+        )
+
+    async def fetch_groups(self, group_ids):
+        """fetch_single_group for several groups, with one cache round trip for all of them."""
+        return await group_cache.read_many(
+            "fetch_single_group",
+            {group_id: group_cache.group_key(group_id) for group_id in group_ids},
+            self._fetch_groups
+        )
+
+    async def _fetch_groups(self, group_ids):
+        groups = await asyncio.gather(*(self._fetch_single_group(group_id) for group_id in group_ids))
+        return dict(zip(group_ids, groups))
+
+    async def _fetch_single_group(self, group_id:str):
         try:
             logger_group.info(f"Fetching single group with ID: {group_id}")
             req, res_header = await dspace_client._make_request(
@@ -285,19 +389,33 @@ class DspaceGroupService():
             raise DSpaceError()
     
     async def search_group_by_name(self, query):
+        """Returns every group matching `query`, across all result pages."""
+        return await group_cache.read(
+            "search_group_by_name",
+            group_cache.search_key(query),
+            partial(self._search_group_by_name, query)
+        )
+
+    async def _search_group_by_name(self, query):
+        groups = [group async for group in self.iter_groups_by_name(query)]
+        logger_group.info(f"Group search completed successfully: {len(groups)} group(s)")
+        return groups
+
+    async def iter_groups_by_name(self, query, page_size=None):
+        """Streams the groups matching `query` page by page without loading them all at once."""
         try:
             logger_group.info(f"Searching for group with query: {query}")
-            
-            #make request
-            req, res_header = await dspace_client._make_request(
-                http_method=HTTPMethod.GET,
+            tokens = await admin_token_provider.get_tokens()
+            query_params = query if isinstance(query, dict) else {"query": query}
+            async for group in dspace_client.paginate(
                 endpoint="eperson/groups/search/byMetadata",
-                query_params=query
-            )
-            logger_group.info("Group search completed successfully")
-            logger_group.debug(f"Response headers: {res_header}")
-            logger_group.debug(f"Response body: {req}")
-            return req
+                embedded_key="groups",
+                query_params=query_params,
+                page_size=page_size,
+                jwt_token=tokens.get("jwt_token"),
+                principal=config.base_username
+            ):
+                yield group
         except Exception as e:
             logger_group.error(f"Failed to search group with query {query}: {str(e)}")
             raise DSpaceError()
@@ -306,7 +424,7 @@ class DspaceGroupService():
         try:
             logger_group.info(f"Attempting to delete group with ID: {group_id}")
             #fetch tokens
-            tokens = await get_or_fetch_cache(config.base_username, self.login_callback)
+            tokens = await admin_token_provider.get_tokens()
             crsf_token = tokens.get("DSPACE-XSRF-TOKEN")
             jwt_token = tokens.get("jwt_token")
 
@@ -318,10 +436,14 @@ class DspaceGroupService():
             req, res_headers = await dspace_client._make_request(
                 endpoint=f"eperson/groups/{group_id}",
                 http_method=HTTPMethod.DELETE,
-                jwt_token=jwt_token
+                jwt_token=jwt_token,
+                principal=config.base_username
 
             )
             logger_group.info(f"Group deleted successfully: {group_id}")
+            await group_cache.invalidate_group(group_id)
+            await group_cache.invalidate_members(group_id)
+            await group_cache.invalidate_searches()
             logger_group.debug(f"Response headers: {res_headers}")
             logger_group.debug(f"Response body: {req}")
             return req
@@ -334,7 +456,7 @@ class DspaceGroupService():
         try:
             logger_group.info(f"Attempting to update group name for group ID: {group_id}")
             # Fetch tokens
-            tokens = await get_or_fetch_cache(config.base_username, self.login_callback)
+            tokens = await admin_token_provider.get_tokens()
             crsf_token = tokens.get("DSPACE-XSRF-TOKEN")
             jwt_token = tokens.get("jwt_token")
 
@@ -356,10 +478,13 @@ class DspaceGroupService():
                 http_method=HTTPMethod.PATCH,
                 endpoint=f"eperson/groups/{group_id}",
                 data=patch_data,
-                jwt_token=jwt_token
+                jwt_token=jwt_token,
+                principal=config.base_username
             )
 
             logger_group.info(f"Group name updated successfully for group ID: {group_id}")
+            await group_cache.invalidate_group(group_id)
+            await group_cache.invalidate_searches()
             logger_group.debug(f"Response headers: {res_headers}")
             logger_group.debug(f"Response body: {req}")
             return req
@@ -367,22 +492,70 @@ class DspaceGroupService():
             logger_group.error(f"Failed to update group name for group ID {group_id}: {str(e)}")
             raise DSpaceError()
     
-    async def update_metadata(group_id):
-        #update meta data and group name (PATCH)
-        endpoint:str = f"eperson/groups/{group_id}"
-        pass 
-    
-    async def fetch_users_in_a_group(self, group_id):
+    async def update_metadata(self, group_id, metadata):
+        """Replaces the given metadata fields of a group, e.g. {"dc.description": [{"value": "..."}]}"""
         try:
-            logger_group.info(f"Fetching users in group with ID: {group_id}")
+            logger_group.info(f"Attempting to update metadata for group ID: {group_id}")
+            tokens = await admin_token_provider.get_tokens()
+            crsf_token = tokens.get("DSPACE-XSRF-TOKEN")
+            jwt_token = tokens.get("jwt_token")
+
+            if not crsf_token or not jwt_token:
+                logger_group.error("Failed to obtain required tokens for group metadata update")
+                raise DSpaceError()
+
+            patch_data = [
+                {
+                    "op": "replace",
+                    "path": f"/metadata/{field}",
+                    "value": values
+                }
+                for field, values in metadata.items()
+            ]
+
             req, res_headers = await dspace_client._make_request(
-                http_method=HTTPMethod.GET,
-                endpoint=f"eperson/groups/{group_id}/epersons"
+                http_method=HTTPMethod.PATCH,
+                endpoint=f"eperson/groups/{group_id}",
+                data=patch_data,
+                jwt_token=jwt_token,
+                principal=config.base_username
             )
-            logger_group.info(f"Users in group fetched successfully: {group_id}")
-            logger_group.debug(f"Response headers: {res_headers}")
+
+            logger_group.info(f"Group metadata updated successfully for group ID: {group_id}")
+            await group_cache.invalidate_group(group_id)
+            await group_cache.invalidate_searches()
             logger_group.debug(f"Response body: {req}")
             return req
+        except Exception as e:
+            logger_group.error(f"Failed to update metadata for group ID {group_id}: {str(e)}")
+            raise DSpaceError()
+    
+    async def fetch_users_in_a_group(self, group_id):
+        """Returns every member of the group, across all result pages."""
+        return await group_cache.read(
+            "fetch_users_in_a_group",
+            group_cache.members_key(group_id),
+            partial(self._fetch_users_in_a_group, group_id)
+        )
+
+    async def _fetch_users_in_a_group(self, group_id):
+        users = [user async for user in self.iter_users_in_a_group(group_id)]
+        logger_group.info(f"Users in group fetched successfully: {group_id} ({len(users)} user(s))")
+        return users
+
+    async def iter_users_in_a_group(self, group_id, page_size=None):
+        """Streams the members of a group page by page, memory stays flat however big the group is."""
+        try:
+            logger_group.info(f"Fetching users in group with ID: {group_id}")
+            tokens = await admin_token_provider.get_tokens()
+            async for user in dspace_client.paginate(
+                endpoint=f"eperson/groups/{group_id}/epersons",
+                embedded_key="epersons",
+                page_size=page_size,
+                jwt_token=tokens.get("jwt_token"),
+                principal=config.base_username
+            ):
+                yield user
         except Exception as e:
             logger_group.error(f"Failed to fetch users in group with ID {group_id}: {str(e)}")
             raise DSpaceError()
@@ -391,7 +564,7 @@ class DspaceGroupService():
         try:
             logger_group.info(f"Attempting to link user {user_id} to group {group_id}")
             # Fetch tokens
-            tokens = await get_or_fetch_cache(config.base_username, self.login_callback)
+            tokens = await admin_token_provider.get_tokens()
             crsf_token = tokens.get("DSPACE-XSRF-TOKEN")
             jwt_token = tokens.get("jwt_token")
 
@@ -408,10 +581,12 @@ class DspaceGroupService():
                 endpoint=f"eperson/groups/{group_id}/epersons",
                 data=user_uri,
                 req_headers={"Content-Type": "text/uri-list"},
-                jwt_token=jwt_token
+                jwt_token=jwt_token,
+                principal=config.base_username
             )
 
             logger_group.info(f"User {user_id} linked to group {group_id} successfully")
+            await group_cache.invalidate_members(group_id)
             logger_group.debug(f"Response headers: {res_headers}")
             logger_group.debug(f"Response body: {req}")
             return req
@@ -419,6 +594,80 @@ class DspaceGroupService():
             logger_group.error(f"Failed to link user {user_id} to group {group_id}: {str(e)}")
             raise DSpaceError()
     
+    async def link_users_to_role_group(self, role_name, user_ids, concurrency=None):
+        """
+        link_users_to_group for the DSpace group of `role_name`, resolved in memory without
+        touching the db. Raises NotFoundError when the role has no group.
+        """
+        group_id = role_group_map.group_id(role_name)
+        if group_id is None:
+            logger_group.error(f"Role {role_name} has no DSpace group, cannot link {len(user_ids)} user(s)")
+            raise NotFoundError(f"Role '{role_name}' is not linked to a DSpace group")
+        return await self.link_users_to_group(group_id, user_ids, concurrency=concurrency)
+
+    async def link_users_to_group(self, group_id, user_ids, batch_size=None, concurrency=None):
+        """
+        Links many epersons to a group, sending `batch_size` URIs per text/uri-list request
+        with at most `concurrency` requests in flight. A batch DSpace rejects with a 4xx
+        is split in halves and retried so a single bad id doesn't fail its neighbours;
+        any other error (transport, 5xx, circuit open) fails the whole batch at once.
+
+        Returns {"linked": [user_id, ...], "failed": [{"user_id": ..., "error": ...}, ...]}
+        """
+        batch_size = batch_size or config.dspace_membership_batch_size
+        concurrency = concurrency or config.dspace_membership_concurrency
+        user_ids = list(dict.fromkeys(str(user_id) for user_id in user_ids))
+        logger_group.info(f"Attempting to link {len(user_ids)} user(s) to group {group_id} in batches of {batch_size}")
+
+        tokens = await admin_token_provider.get_tokens()
+        crsf_token = tokens.get("DSPACE-XSRF-TOKEN")
+        jwt_token = tokens.get("jwt_token")
+        if not crsf_token or not jwt_token:
+            logger_group.error("Failed to obtain required tokens for linking users to group")
+            raise DSpaceError()
+
+        semaphore = asyncio.Semaphore(concurrency)
+        linked, failed = [], []
+
+        async def post_batch(batch):
+            user_uris = "\n".join(f"{config.base_url}/eperson/epersons/{user_id}" for user_id in batch)
+            async with semaphore:
+                await dspace_client._make_request(
+                    http_method=HTTPMethod.POST,
+                    endpoint=f"eperson/groups/{group_id}/epersons",
+                    data=user_uris,
+                    req_headers={"Content-Type": "text/uri-list", "X-XSRF-TOKEN": crsf_token},
+                    jwt_token=jwt_token,
+                    principal=config.base_username
+                )
+
+        async def link_batch(batch):
+            try:
+                await post_batch(batch)
+                linked.extend(batch)
+            except Exception as e:
+                error = getattr(e, "message", None) or type(e).__name__
+                if not is_rejection(e):
+                    # DSpace is down, slow or the circuit is open: splitting would only multiply the calls
+                    logger_group.error(f"Failed to link {len(batch)} user(s) to group {group_id}: {str(e)}")
+                    failed.extend({"user_id": user_id, "error": error} for user_id in batch)
+                    return
+                if len(batch) == 1:
+                    logger_group.error(f"Failed to link user {batch[0]} to group {group_id}: {str(e)}")
+                    failed.append({"user_id": batch[0], "error": error})
+                    return
+                logger_group.warning(f"Batch of {len(batch)} rejected for group {group_id}, splitting it to find the bad users")
+                middle = len(batch) // 2
+                await asyncio.gather(link_batch(batch[:middle]), link_batch(batch[middle:]))
+
+        batches = [user_ids[i:i + batch_size] for i in range(0, len(user_ids), batch_size)]
+        await asyncio.gather(*(link_batch(batch) for batch in batches))
+
+        logger_group.info(f"Linked {len(linked)} user(s) to group {group_id}, {len(failed)} failed")
+        if linked:
+            await group_cache.invalidate_members(group_id)
+        return {"linked": linked, "failed": failed}
+
     async def change_users_in_a_group(group_id):
         endpoint:str = f"eperson/groups/{group_id}/epersons" #PUT request
         
@@ -426,7 +675,7 @@ class DspaceGroupService():
         try:
             logger_group.info(f"Attempting to remove user {user_id} from group {group_id}")
             # Fetch tokens
-            tokens = await get_or_fetch_cache(config.base_username, self.login_callback)
+            tokens = await admin_token_provider.get_tokens()
             crsf_token = tokens.get("DSPACE-XSRF-TOKEN")
             jwt_token = tokens.get("jwt_token")
 
@@ -438,10 +687,12 @@ class DspaceGroupService():
             req, res_headers = await dspace_client._make_request(
                 http_method=HTTPMethod.DELETE,
                 endpoint=f"eperson/groups/{group_id}/epersons/{user_id}",
-                jwt_token=jwt_token
+                jwt_token=jwt_token,
+                principal=config.base_username
             )
 
             logger_group.info(f"User {user_id} removed from group {group_id} successfully")
+            await group_cache.invalidate_members(group_id)
             logger_group.debug(f"Response headers: {res_headers}")
             logger_group.debug(f"Response body: {req}")
             return req
@@ -460,4 +711,12 @@ class SubGroup():
 
 
 dspace_auth_service = DspaceAuthService()
+dspace_authz_service = DspaceAuthzService()
 dspace_group_service = DspaceGroupService(dspace_auth_service)
+
+# shared by every service instance so concurrent requests coalesce on one super admin login
+admin_token_provider = DspaceTokenProvider(
+    principal=config.base_username,
+    login_callback=partial(dspace_auth_service.login, config.base_username, config.base_password),
+    refresh_fraction=config.dspace_token_refresh_fraction,
+)
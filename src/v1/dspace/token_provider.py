@@ -0,0 +1,198 @@
+import asyncio
+import time
+import jwt
+from typing import Any, Awaitable, Callable, Dict, Optional
+from redis.exceptions import LockError
+from src.utils.redis_client import CACHE_TTL, DSPACE_TOKENS, cache_key, get_from_cache, get_redis
+from src.utils.log import setup_logger
+logger = setup_logger(__name__, "dspace_token_provider.log")
+
+# seconds shaved off the JWT lifetime so a cached token never reaches DSpace already expired
+EXPIRY_SKEW = 30
+
+
+def jwt_expiry(jwt_token: Optional[str]) -> Optional[float]:
+    """Read the `exp` claim of a DSpace Authorization header ("Bearer <jwt>") without verifying it."""
+    if not jwt_token:
+        return None
+    token = jwt_token.split(" ", 1)[-1]
+    try:
+        claims = jwt.decode(token, options={"verify_signature": False})
+    except jwt.PyJWTError as e:
+        logger.warning(f"could not decode DSpace jwt: {e}")
+        return None
+    exp = claims.get("exp")
+    return float(exp) if exp is not None else None
+
+
+def token_ttl(jwt_token: Optional[str]) -> int:
+    """Cache ttl matching the real lifetime of a DSpace jwt, falling back to CACHE_TTL."""
+    exp = jwt_expiry(jwt_token)
+    if exp is None:
+        return CACHE_TTL
+    return max(int(exp - time.time()) - EXPIRY_SKEW, 1)
+
+
+class DspaceTokenProvider():
+    """
+    Hands out the cached DSpace tokens of one principal (usually the super admin),
+    making sure only one login runs at a time when the cached tokens are missing.
+
+    - inside a worker, concurrent callers share the same in-flight login future
+    - across uvicorn workers, a redis lock lets one worker log in while the
+      others wait and then pick the fresh tokens up from the cache
+    - once started, a background task logs in again after `refresh_fraction` of
+      the jwt lifetime has passed, so requests keep finding warm tokens in the cache
+    """
+
+    def __init__(
+        self,
+        principal: str,
+        login_callback: Callable[[], Awaitable[Dict[str, Any]]],
+        lock_timeout: int = 30,
+        lock_wait: int = 35,
+        refresh_fraction: float = 0.75,
+        retry_delay: int = 5,
+    ):
+        self.principal = principal
+        self.login_callback = login_callback
+        self.cache_key = cache_key(DSPACE_TOKENS, principal)
+        self.lock_key = f"lock:dspace_login:{principal}"
+        self.lock_timeout = lock_timeout  # how long a crashed holder can keep the lock
+        self.lock_wait = lock_wait  # how long a waiter blocks before logging in itself
+        self.refresh_fraction = refresh_fraction
+        self.retry_delay = retry_delay  # first backoff after a failed background refresh
+        self._inflight: Optional[asyncio.Future] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self.stats = {
+            "cache_hits": 0,
+            "logins": 0,
+            "background_refreshes": 0,
+            "background_refresh_failures": 0,
+            "coalesced_local": 0,  # callers that joined another coroutine's login
+            "coalesced_remote": 0,  # logins skipped because another worker did it
+        }
+
+    async def get_tokens(self) -> Dict[str, Any]:
+        tokens = await get_from_cache(self.cache_key)
+        if tokens:
+            self.stats["cache_hits"] += 1
+            return tokens
+
+        if self._inflight is not None and not self._inflight.done():
+            self.stats["coalesced_local"] += 1
+            logger.debug(f"joining in-flight DSpace login for {self.principal}")
+            # shield so a cancelled waiter doesn't cancel the login for everybody else
+            return await asyncio.shield(self._inflight)
+
+        self._inflight = asyncio.ensure_future(self._acquire_tokens())
+        self._inflight.add_done_callback(self._clear_inflight)
+        return await asyncio.shield(self._inflight)
+
+    def _clear_inflight(self, future: asyncio.Future):
+        if self._inflight is future:
+            self._inflight = None
+        # mark the exception as retrieved when nobody was left waiting on it
+        if not future.cancelled():
+            future.exception()
+
+    async def _acquire_tokens(self, min_expiry: Optional[float] = None) -> Dict[str, Any]:
+        try:
+            redis = await get_redis()
+        except RuntimeError:
+            logger.warning("redis not initialized, logging in to DSpace without a lock")
+            return await self._login()
+
+        lock = redis.lock(self.lock_key, timeout=self.lock_timeout, blocking_timeout=self.lock_wait)
+        acquired = False
+        try:
+            acquired = await lock.acquire()
+        except Exception as e:
+            logger.error(f"failed to acquire DSpace login lock for {self.principal}: {e}")
+
+        try:
+            if not acquired:
+                logger.warning(f"timed out waiting on DSpace login lock for {self.principal}")
+
+            # another worker may have logged in while we were waiting on the lock
+            tokens = await get_from_cache(self.cache_key)
+            if tokens and self._fresh_enough(tokens, min_expiry):
+                self.stats["coalesced_remote"] += 1
+                logger.debug(f"DSpace tokens for {self.principal} refreshed by another worker")
+                return tokens
+
+            return await self._login()
+        finally:
+            if acquired:
+                try:
+                    await lock.release()
+                except LockError as e:
+                    logger.warning(f"DSpace login lock for {self.principal} expired before release: {e}")
+
+    async def _login(self) -> Dict[str, Any]:
+        # the login callback is expected to write the tokens to the cache itself
+        tokens = await self.login_callback()
+        self.stats["logins"] += 1
+        logger.info(f"logged in to DSpace as {self.principal}")
+        return tokens
+
+    @staticmethod
+    def _fresh_enough(tokens: Dict[str, Any], min_expiry: Optional[float]) -> bool:
+        if min_expiry is None:
+            return True
+        exp = jwt_expiry(tokens.get("jwt_token"))
+        return exp is not None and exp > min_expiry
+
+    # ============ Background Refresh ============
+    def start(self):
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+            logger.info(f"started background DSpace token refresh for {self.principal}")
+
+    async def stop(self):
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+
+    def _refresh_delay(self, tokens: Dict[str, Any]) -> float:
+        exp = jwt_expiry(tokens.get("jwt_token"))
+        lifetime = (exp - time.time()) if exp is not None else CACHE_TTL
+        return max(lifetime * self.refresh_fraction, 1)
+
+    async def _refresh_loop(self):
+        # first run warms the cache through the normal path
+        tokens = None
+        delay = 0
+        failures = 0
+        while True:
+            await asyncio.sleep(delay)
+            try:
+                tokens = await (self.refresh(tokens) if tokens else self.get_tokens())
+                failures = 0
+                delay = self._refresh_delay(tokens)
+                logger.debug(f"next DSpace token refresh for {self.principal} in {delay:.0f}s")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # requests still fall back to a synchronous login once the cached tokens expire
+                failures += 1
+                self.stats["background_refresh_failures"] += 1
+                delay = min(self.retry_delay * 2 ** (failures - 1), 300)
+                logger.error(f"background DSpace token refresh failed for {self.principal}, retrying in {delay}s: {e}")
+
+    async def refresh(self, current: Dict[str, Any]) -> Dict[str, Any]:
+        """Log in again ahead of expiry, unless another worker already replaced `current`."""
+        if self._inflight is not None and not self._inflight.done():
+            return await asyncio.shield(self._inflight)
+
+        # cached tokens expiring later than ours were already renewed by another worker
+        min_expiry = jwt_expiry(current.get("jwt_token")) or time.time()
+        self._inflight = asyncio.ensure_future(self._acquire_tokens(min_expiry=min_expiry))
+        self._inflight.add_done_callback(self._clear_inflight)
+        tokens = await asyncio.shield(self._inflight)
+        self.stats["background_refreshes"] += 1
+        return tokens
@@ -1,5 +1,7 @@
 from .users import Resource, User, MetaData
 from .roles import Role, Permission, role_permissions, user_roles, PermissionType
+from .outbox import DspaceOutbox, OutboxOperation, OutboxStatus
+from .items import RepositoryItem, SyncWatermark
 __all__=[
     "Resource",
     "Role",
@@ -8,5 +10,10 @@ __all__=[
     "Permission",
     "role_permissions",
     "user_roles",
-    "PermissionType"
+    "PermissionType",
+    "DspaceOutbox",
+    "OutboxOperation",
+    "OutboxStatus",
+    "RepositoryItem",
+    "SyncWatermark"
 ]
\ No newline at end of file
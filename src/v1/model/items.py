@@ -0,0 +1,39 @@
+from datetime import datetime
+from sqlalchemy import JSON, Boolean, DateTime, Index, Integer, String, Text
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import Mapped, mapped_column
+from src.v1.base.model import BaseModel
+
+
+#local copy of the dspace item fields we display, id is the dspace item uuid
+class RepositoryItem(BaseModel):
+    __table_args__ = (
+        Index("ix_repository_items_type_year", "item_type", "issued_year"),
+        Index("ix_repository_items_search_vector", "search_vector", postgresql_using="gin"),
+    )
+
+    handle: Mapped[str] = mapped_column(String, nullable=True, index=True)
+    title: Mapped[str] = mapped_column(String, nullable=True)
+    authors: Mapped[list] = mapped_column(JSON, nullable=False, default=list)
+    abstract: Mapped[str] = mapped_column(Text, nullable=True)
+    subjects: Mapped[list] = mapped_column(JSON, nullable=False, default=list)
+    item_type: Mapped[str] = mapped_column(String, nullable=True)
+    date_issued: Mapped[str] = mapped_column(String, nullable=True)
+    issued_year: Mapped[int] = mapped_column(Integer, nullable=True, index=True)
+    withdrawn: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+    #full dspace metadata map, for the detail view
+    dspace_metadata: Mapped[dict] = mapped_column(JSON, nullable=False, default=dict)
+    dspace_last_modified: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, index=True)
+    #last sync run that saw the item in dspace, full runs soft delete what they didn't see
+    last_seen_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=True)
+    #weighted title/authors/abstract vector, written by the sync on every insert and update
+    search_vector: Mapped[str] = mapped_column(TSVECTOR, nullable=True, deferred=True)
+
+
+#progress of a sync job, so a run only asks dspace for what changed since the previous one
+class SyncWatermark(BaseModel):
+    name: Mapped[str] = mapped_column(String, nullable=False, unique=True, index=True)
+    watermark: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=True)
+    runs: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    last_run_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=True)
+    last_result: Mapped[dict] = mapped_column(JSON, nullable=True)
@@ -0,0 +1,36 @@
+import uuid
+from datetime import datetime
+from sqlalchemy import JSON, DateTime, ForeignKey, Index, Integer, String, Enum as SqlEnum, func
+from sqlalchemy.orm import Mapped, mapped_column
+from src.v1.base.model import BaseModel
+from enum import StrEnum
+
+
+class OutboxOperation(StrEnum):
+    CREATE_GROUP = "create_group"
+    UPDATE_GROUP = "update_group"
+
+
+class OutboxStatus(StrEnum):
+    PENDING = "pending"
+    DONE = "done"
+    FAILED = "failed"  # gave up after too many attempts, needs a look
+
+
+#DSpace writes recorded in the same transaction as the role change, drained by OutboxDispatcher
+class DspaceOutbox(BaseModel):
+    __tablename__ = "dspace_outbox"
+    __table_args__ = (
+        Index("ix_dspace_outbox_status_next_attempt_at", "status", "next_attempt_at"),
+    )
+
+    role_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("roles.id"), nullable=False, index=True)
+    operation: Mapped[OutboxOperation] = mapped_column(
+        SqlEnum(OutboxOperation, name="outbox_operation_enum"), nullable=False)
+    payload: Mapped[dict] = mapped_column(JSON, nullable=False, default=dict)
+    status: Mapped[OutboxStatus] = mapped_column(
+        SqlEnum(OutboxStatus, name="outbox_status_enum"), nullable=False, default=OutboxStatus.PENDING)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    last_error: Mapped[str] = mapped_column(String, nullable=True)
+    next_attempt_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=func.now())
+    processed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=True)
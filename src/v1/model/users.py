@@ -1,4 +1,5 @@
-from sqlalchemy import JSON, Boolean, DateTime, ForeignKey, String, Enum as SqlEnum, Integer, Float, func
+import uuid
+from sqlalchemy import JSON, BigInteger, Boolean, DateTime, ForeignKey, String, Enum as SqlEnum, Integer, Float, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship, backref
 from datetime import datetime
 from src.v1.base.model import BaseModel
@@ -24,8 +25,16 @@ class User(BaseModel):
     )
 
 
+#a bitstream uploaded to DSpace through the streaming upload endpoint
 class Resource(BaseModel):
-    pass
+    bitstream_id: Mapped[str] = mapped_column(String, nullable=False, unique=True, index=True)
+    bundle_id: Mapped[str] = mapped_column(String, nullable=False, index=True)
+    filename: Mapped[str] = mapped_column(String, nullable=False)
+    content_type: Mapped[str] = mapped_column(String, nullable=True)
+    size_bytes: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    checksum_md5: Mapped[str] = mapped_column(String(32), nullable=False)
+    checksum_sha256: Mapped[str] = mapped_column(String(64), nullable=False)
+    uploaded_by: Mapped[uuid.UUID] = mapped_column(ForeignKey("users.id"), nullable=True, index=True)
 
 class MetaData(BaseModel):
     pass
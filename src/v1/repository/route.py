@@ -0,0 +1,71 @@
+import uuid
+from typing import Optional
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.utils.db import get_session
+from src.utils.response import success_response
+from src.v1.auth.service import PermissionChecker
+from src.v1.model import SyncWatermark
+from src.v1.model.roles import Role_Enum
+from .schema import ItemDetail, ItemSort
+from .service import ItemService
+from .sync import SYNC_NAME, item_sync
+from src.utils.log import setup_logger
+logger = setup_logger(__name__, "repository_route.log")
+
+
+def get_item_service(db: AsyncSession = Depends(get_session)):
+    return ItemService(db=db)
+
+
+item_router = APIRouter(prefix="/items", tags=["items"])
+
+
+@item_router.get("/")
+async def list_items(
+    page: int = Query(1, ge=1),
+    size: int = Query(20, ge=1, le=100),
+    item_type: Optional[str] = None,
+    year: Optional[int] = None,
+    sort: ItemSort = ItemSort.RECENT,
+    item_service: ItemService = Depends(get_item_service),
+):
+    items = await item_service.list_items(page=page, size=size, item_type=item_type, year=year, sort=sort)
+    return success_response(status_code=200, data=items)
+
+
+@item_router.get("/search")
+async def search_items(
+    q: str = Query(..., min_length=1, max_length=200),
+    page: int = Query(1, ge=1, le=500),
+    size: int = Query(20, ge=1, le=100),
+    item_type: Optional[str] = None,
+    year: Optional[int] = None,
+    item_service: ItemService = Depends(get_item_service),
+):
+    results = await item_service.search_items(q=q, page=page, size=size, item_type=item_type, year=year)
+    return success_response(status_code=200, data=results)
+
+
+@item_router.post("/sync", dependencies=[Depends(PermissionChecker(roles=(Role_Enum.ADMIN,)))])
+async def run_item_sync(full: bool = False):
+    result = await item_sync.run(full=full or None)
+    return success_response(status_code=200, data=result)
+
+
+@item_router.get("/sync/stats")
+async def item_sync_stats(db: AsyncSession = Depends(get_session)):
+    state = await db.scalar(select(SyncWatermark).where(SyncWatermark.name == SYNC_NAME))
+    return success_response(status_code=200, data={
+        "watermark": state.watermark if state else None,
+        "runs": state.runs if state else 0,
+        "last_run_at": state.last_run_at if state else None,
+        "last_result": state.last_result if state else None,
+    })
+
+
+@item_router.get("/{item_id}")
+async def fetch_item(item_id: uuid.UUID, item_service: ItemService = Depends(get_item_service)):
+    item = await item_service.fetch_item(item_id)
+    return success_response(status_code=200, data=ItemDetail.model_validate(item).model_dump())
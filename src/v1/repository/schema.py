@@ -0,0 +1,34 @@
+import uuid
+from datetime import datetime
+from enum import StrEnum
+from pydantic import BaseModel
+from typing import List, Optional
+
+
+class ItemSort(StrEnum):
+    RECENT = "recent"
+    YEAR = "year"
+
+
+class ItemSummary(BaseModel):
+    id: uuid.UUID
+    handle: Optional[str] = None
+    title: Optional[str] = None
+    authors: List[str] = []
+    item_type: Optional[str] = None
+    date_issued: Optional[str] = None
+    issued_year: Optional[int] = None
+    class Config:
+        from_attributes = True
+
+
+class SearchHit(ItemSummary):
+    rank: float
+
+
+class ItemDetail(ItemSummary):
+    abstract: Optional[str] = None
+    subjects: List[str] = []
+    withdrawn: bool = False
+    dspace_metadata: dict = {}
+    dspace_last_modified: Optional[datetime] = None
@@ -0,0 +1,28 @@
+from typing import Iterable, Optional
+from sqlalchemy import Text, cast, func, literal_column
+from sqlalchemy.sql.elements import ColumnElement
+
+# text search configuration used both to build the index and to parse queries, they must match
+SEARCH_CONFIG = literal_column("'english'::regconfig")
+
+
+def _weighted(value: Optional[str], weight: str) -> ColumnElement:
+    return func.setweight(func.to_tsvector(SEARCH_CONFIG, cast(value or "", Text)), literal_column(f"'{weight}'"))
+
+
+def search_vector(title: Optional[str], authors: Iterable[str], abstract: Optional[str]) -> ColumnElement:
+    """
+    tsvector for an item, title hits rank above author hits, which rank above abstract hits.
+    Assigned to RepositoryItem.search_vector on insert/update so postgres computes it in the
+    same statement as the row write.
+    """
+    return (
+        _weighted(title, "A")
+        .op("||")(_weighted(" ".join(authors or []), "B"))
+        .op("||")(_weighted(abstract, "C"))
+    )
+
+
+def search_query(text: str) -> ColumnElement:
+    """tsquery for what a user typed: quoted phrases, OR and -word are understood, bad syntax never errors."""
+    return func.websearch_to_tsquery(SEARCH_CONFIG, cast(text, Text))
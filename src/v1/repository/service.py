@@ -0,0 +1,122 @@
+import uuid
+from typing import Optional
+from sqlalchemy import select, func
+from sqlalchemy.orm import load_only
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.v1.model import RepositoryItem
+from src.v1.base.exception import NotFoundError
+from .schema import ItemSort, ItemSummary, SearchHit
+from .search import search_query
+from src.utils.log import setup_logger
+logger = setup_logger(__name__, "repository_service.log")
+
+
+class ItemService():
+    """Read side of the item mirror, nothing here calls DSpace."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    def _filters(self, item_type: Optional[str], year: Optional[int]) -> list:
+        filters = [RepositoryItem.deleted_at.is_(None), RepositoryItem.withdrawn.is_(False)]
+        if item_type:
+            filters.append(RepositoryItem.item_type == item_type)
+        if year:
+            filters.append(RepositoryItem.issued_year == year)
+        return filters
+
+    async def list_items(
+        self,
+        page: int = 1,
+        size: int = 20,
+        item_type: Optional[str] = None,
+        year: Optional[int] = None,
+        sort: ItemSort = ItemSort.RECENT,
+    ) -> dict:
+        filters = self._filters(item_type, year)
+        if sort == ItemSort.YEAR:
+            order_by = (RepositoryItem.issued_year.desc().nulls_last(), RepositoryItem.id)
+        else:
+            order_by = (RepositoryItem.dspace_last_modified.desc(), RepositoryItem.id)
+
+        total = await self.db.scalar(select(func.count()).select_from(RepositoryItem).where(*filters))
+        result = await self.db.execute(
+            select(RepositoryItem).where(*filters).order_by(*order_by).offset((page - 1) * size).limit(size)
+        )
+        return {
+            "items": [ItemSummary.model_validate(item).model_dump() for item in result.scalars()],
+            "page": page,
+            "size": size,
+            "total": total,
+        }
+
+    async def search_items(
+        self,
+        q: str,
+        page: int = 1,
+        size: int = 20,
+        item_type: Optional[str] = None,
+        year: Optional[int] = None,
+    ) -> dict:
+        """
+        Full text search over title, authors and abstract, best match first.
+
+        Matching uses the GIN index on search_vector. Facet counts by type and year come
+        from one GROUPING SETS pass over the same matches, so the page and its facets cost
+        two index scans rather than three.
+        """
+        query = search_query(q)
+        filters = [*self._filters(item_type, year), RepositoryItem.search_vector.op("@@")(query)]
+        rank = func.ts_rank_cd(RepositoryItem.search_vector, query).label("rank")
+
+        result = await self.db.execute(
+            select(RepositoryItem, rank)
+            .options(load_only(
+                RepositoryItem.handle, RepositoryItem.title, RepositoryItem.authors, RepositoryItem.item_type,
+                RepositoryItem.date_issued, RepositoryItem.issued_year,
+            ))
+            .where(*filters)
+            .order_by(rank.desc(), RepositoryItem.id)
+            .offset((page - 1) * size)
+            .limit(size)
+        )
+        hits = [
+            SearchHit(**ItemSummary.model_validate(item).model_dump(), rank=item_rank).model_dump()
+            for item, item_rank in result.all()
+        ]
+
+        facets = {"item_type": {}, "year": {}}
+        total = 0
+        facet_rows = await self.db.execute(
+            select(
+                RepositoryItem.item_type,
+                RepositoryItem.issued_year,
+                func.grouping(RepositoryItem.item_type).label("by_year"),
+                func.count().label("count"),
+            )
+            .where(*filters)
+            .group_by(func.grouping_sets(RepositoryItem.item_type, RepositoryItem.issued_year))
+        )
+        for row in facet_rows:
+            # grouping(item_type) is 1 on the rows of the year grouping set
+            if row.by_year:
+                facets["year"][str(row.issued_year) if row.issued_year else "unknown"] = row.count
+            else:
+                facets["item_type"][row.item_type or "unknown"] = row.count
+                total += row.count
+
+        return {
+            "items": hits,
+            "facets": facets,
+            "page": page,
+            "size": size,
+            "total": total,
+        }
+
+    async def fetch_item(self, item_id: uuid.UUID) -> RepositoryItem:
+        item = await self.db.scalar(
+            select(RepositoryItem).where(RepositoryItem.id == item_id, RepositoryItem.deleted_at.is_(None))
+        )
+        if item is None:
+            raise NotFoundError(f"Item '{item_id}' does not exist")
+        return item
@@ -0,0 +1,246 @@
+import asyncio
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from redis.exceptions import LockError
+from sqlalchemy import select, update, or_, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.utils.config import config
+from src.utils.db import get_async_db_session
+from src.utils.redis_client import get_redis
+from src.v1.model import RepositoryItem, SyncWatermark
+from src.v1.dspace.service import dspace_client
+from .search import search_vector
+from src.utils.log import setup_logger
+logger = setup_logger(__name__, "item_sync.log")
+
+SYNC_NAME = "dspace_items"
+
+
+def as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is None:
+        return None
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+def solr_date(value: datetime) -> str:
+    """Solr date literal, e.g. 2024-01-10T10:11:12.345Z"""
+    return as_utc(value).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+
+
+def metadata_values(metadata: Dict[str, Any], field: str) -> List[str]:
+    return [entry.get("value") for entry in metadata.get(field) or [] if entry.get("value")]
+
+
+def parse_item(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Maps a DSpace item to RepositoryItem column values."""
+    metadata = item.get("metadata") or {}
+    date_issued = next(iter(metadata_values(metadata, "dc.date.issued")), None)
+    year = date_issued[:4] if date_issued else None
+    return {
+        "handle": item.get("handle"),
+        "title": next(iter(metadata_values(metadata, "dc.title")), None) or item.get("name"),
+        "authors": metadata_values(metadata, "dc.contributor.author"),
+        "abstract": next(iter(metadata_values(metadata, "dc.description.abstract")), None),
+        "subjects": metadata_values(metadata, "dc.subject"),
+        "item_type": next(iter(metadata_values(metadata, "dc.type")), None),
+        "date_issued": date_issued,
+        "issued_year": int(year) if year and year.isdigit() else None,
+        "withdrawn": bool(item.get("withdrawn", False)),
+        "dspace_metadata": metadata,
+        "dspace_last_modified": as_utc(datetime.fromisoformat(item["lastModified"])),
+    }
+
+
+class ItemSync():
+    """
+    Keeps repository_items in step with the items DSpace discovery shows anonymous users.
+
+    An incremental run asks discovery for items with lastModified at or after the stored
+    watermark, oldest first, and upserts only the ones newer than the local copy. Paging
+    uses the last timestamp seen as a cursor rather than page numbers, so items modified
+    while the run is in progress can't shift an unseen item past the current page. Discovery
+    never returns deleted items, so every `full_every`-th run (and the first one) walks all
+    items and soft deletes mirror rows it didn't see. A redis lock keeps workers from
+    syncing at the same time.
+    """
+
+    def __init__(self, page_size: int = 100, interval: float = 300, full_every: int = 24, lock_timeout: int = 300):
+        self.page_size = page_size
+        self.interval = interval
+        self.full_every = full_every
+        self.lock_key = "lock:item_sync"
+        self.lock_timeout = lock_timeout
+        self._task: Optional[asyncio.Task] = None
+        self.last_result: Optional[Dict[str, Any]] = None
+
+    # ============ Background Loop ============
+    def start(self):
+        if self.interval <= 0:
+            logger.info("background item sync disabled")
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"started background item sync every {self.interval}s")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.run()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"item sync failed: {e}", exc_info=True)
+            await asyncio.sleep(self.interval)
+
+    # ============ Sync ============
+    async def run(self, full: Optional[bool] = None) -> Dict[str, Any]:
+        """Runs one sync and returns its counts, `full` forces (or skips) a full walk."""
+        redis = await get_redis()
+        lock = redis.lock(self.lock_key, timeout=self.lock_timeout)
+        if not await lock.acquire(blocking=False):
+            logger.info("item sync already running in another worker")
+            return {"skipped": True, "reason": "another sync is running"}
+        try:
+            return await self._sync(full, lock)
+        finally:
+            try:
+                await lock.release()
+            except LockError as e:
+                logger.warning(f"item sync lock expired before release: {e}")
+
+    async def _sync(self, full: Optional[bool], lock) -> Dict[str, Any]:
+        async with get_async_db_session() as session:
+            state = await self._watermark(session)
+            watermark, runs = as_utc(state.watermark), state.runs
+        if full is None:
+            full = watermark is None or runs % self.full_every == 0
+
+        started = datetime.now(timezone.utc)
+        result = {"full": full, "added": 0, "updated": 0, "unchanged": 0, "deleted": 0, "pages": 0}
+        cursor = None if full else watermark
+        page = 0
+        newest = watermark
+        logger.info(f"item sync starting ({'full' if full else f'since {watermark}'})")
+
+        while True:
+            items = await self._fetch_page(cursor, page)
+            if not items:
+                break
+            async with get_async_db_session() as session:
+                counts = await self._upsert(session, items, started)
+            for key, value in counts.items():
+                result[key] += value
+            result["pages"] += 1
+            await lock.reacquire()
+
+            last_modified = as_utc(datetime.fromisoformat(items[-1]["lastModified"]))
+            newest = max(newest, last_modified) if newest else last_modified
+            if len(items) < self.page_size:
+                break
+            if cursor is not None and last_modified == cursor:
+                # a whole page sharing the cursor timestamp, step through it by page number
+                page += 1
+            else:
+                cursor, page = last_modified, 0
+
+        async with get_async_db_session() as session:
+            if full:
+                result["deleted"] = await self._soft_delete_unseen(session, started, seen=result["pages"] > 0)
+            state = await self._watermark(session)
+            state.watermark = newest
+            state.runs += 1
+            state.last_run_at = started
+            state.last_result = result
+
+        self.last_result = result
+        logger.info(f"item sync finished: {result}")
+        return result
+
+    async def _watermark(self, session: AsyncSession) -> SyncWatermark:
+        state = await session.scalar(select(SyncWatermark).where(SyncWatermark.name == SYNC_NAME))
+        if state is None:
+            state = SyncWatermark(name=SYNC_NAME, runs=0)
+            session.add(state)
+            await session.flush()
+        return state
+
+    async def _fetch_page(self, cursor: Optional[datetime], page: int) -> List[Dict[str, Any]]:
+        query_params = {
+            "dsoType": "ITEM",
+            "sort": "lastModified,ASC",
+            "size": self.page_size,
+            "page": page,
+        }
+        if cursor is not None:
+            query_params["query"] = f"lastModified:[{solr_date(cursor)} TO *]"
+        # anonymous on purpose, the mirror must only hold what the public can see
+        body, _ = await dspace_client._make_request(
+            http_method="get",
+            endpoint="discover/search/objects",
+            query_params=query_params,
+        )
+        search_result = (body.get("_embedded") or {}).get("searchResult") or {}
+        objects = (search_result.get("_embedded") or {}).get("objects") or []
+        return [obj["_embedded"]["indexableObject"] for obj in objects if obj.get("_embedded", {}).get("indexableObject")]
+
+    async def _upsert(self, session: AsyncSession, items: List[Dict[str, Any]], seen_at: datetime) -> Dict[str, int]:
+        counts = {"added": 0, "updated": 0, "unchanged": 0}
+        ids = [uuid.UUID(item["uuid"]) for item in items]
+        existing = {
+            row.id: row
+            for row in (await session.execute(select(RepositoryItem).where(RepositoryItem.id.in_(ids)))).scalars()
+        }
+        for item_id, item in zip(ids, items):
+            values = parse_item(item)
+            values["search_vector"] = search_vector(values["title"], values["authors"], values["abstract"])
+            row = existing.get(item_id)
+            if row is None:
+                session.add(RepositoryItem(id=item_id, last_seen_at=seen_at, **values))
+                existing[item_id] = True
+                counts["added"] += 1
+            elif row is True:
+                continue  # listed twice in one page
+            elif row.deleted_at is not None or as_utc(row.dspace_last_modified) < values["dspace_last_modified"]:
+                for key, value in values.items():
+                    setattr(row, key, value)
+                row.deleted_at = None
+                counts["updated"] += 1
+            else:
+                counts["unchanged"] += 1
+        # unchanged rows still need to be marked as seen for the deletion sweep
+        await session.execute(
+            update(RepositoryItem).where(RepositoryItem.id.in_(ids)).values(last_seen_at=seen_at)
+        )
+        return counts
+
+    async def _soft_delete_unseen(self, session: AsyncSession, started: datetime, seen: bool) -> int:
+        if not seen:
+            # an empty discovery index (e.g. mid reindex) must not wipe the mirror
+            logger.warning("full item sync saw no items in DSpace, skipping the deletion sweep")
+            return 0
+        result = await session.execute(
+            update(RepositoryItem)
+            .where(
+                RepositoryItem.deleted_at.is_(None),
+                or_(RepositoryItem.last_seen_at.is_(None), RepositoryItem.last_seen_at < started),
+            )
+            .values(deleted_at=func.now())
+        )
+        return result.rowcount
+
+
+item_sync = ItemSync(
+    page_size=config.item_sync_page_size,
+    interval=config.item_sync_interval,
+    full_every=config.item_sync_full_every,
+)
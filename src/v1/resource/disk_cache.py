@@ -0,0 +1,222 @@
+import asyncio
+import json
+import os
+import uuid
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Optional
+from src.utils.log import setup_logger
+logger = setup_logger(__name__, "bitstream_cache.log")
+
+# how many distinct bitstreams the popularity counter remembers
+MAX_TRACKED = 10_000
+
+
+@dataclass
+class CachedFile:
+    bitstream_id: str
+    size: int
+    etag: Optional[str]
+    content_type: Optional[str]
+    content_disposition: Optional[str]
+
+
+class BitstreamDiskCache():
+    """
+    Size-capped LRU cache of bitstream content on local disk.
+
+    A bitstream's content never changes in DSpace (a new version is a new bitstream),
+    so a cached file stays valid until it is evicted. Only bitstreams requested at
+    least `min_hits` times are written, so one-off downloads don't churn the cache.
+    Each file sits next to a small json sidecar with its headers, which lets the
+    index be rebuilt from the directory after a restart.
+
+    Every worker keeps its own index over the shared directory and enforces
+    `max_bytes` on its own, so the directory can grow to about one cap per worker.
+    A worker may also evict a file another worker still has indexed; lookups check
+    the file is still there and drop the entry when it isn't.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, max_file_bytes: int, min_hits: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_file_bytes = max_file_bytes
+        self.min_hits = min_hits
+        self.current_bytes = 0
+        self._entries: "OrderedDict[str, CachedFile]" = OrderedDict()
+        self._requests: "OrderedDict[str, int]" = OrderedDict()
+        self._writing = set()
+        self.stats = {"hits": 0, "misses": 0, "stored": 0, "evictions": 0, "aborted_writes": 0, "evicted_elsewhere": 0}
+        self._loading: Optional[asyncio.Task] = None
+
+    def path(self, bitstream_id: str) -> str:
+        return os.path.join(self.directory, bitstream_id)
+
+    def _meta_path(self, bitstream_id: str) -> str:
+        return os.path.join(self.directory, f"{bitstream_id}.json")
+
+    async def load(self):
+        """
+        Rebuilds the index in a thread so the directory scan doesn't block the event
+        loop. Runs at startup; concurrent callers share the one scan.
+        """
+        if self._loading is None:
+            self._loading = asyncio.ensure_future(asyncio.to_thread(self._load))
+        await asyncio.shield(self._loading)
+
+    def _load(self):
+        """Rebuilds the index from disk, oldest access first, and clears out half-written files."""
+        os.makedirs(self.directory, exist_ok=True)
+        metas = []
+        for name in os.listdir(self.directory):
+            full = os.path.join(self.directory, name)
+            if name.endswith(".part"):
+                os.remove(full)
+            elif name.endswith(".json"):
+                metas.append((os.stat(full).st_mtime, full))
+        for _, meta_path in sorted(metas):
+            if os.path.basename(meta_path)[:-len(".json")] in self._entries:
+                # committed by this worker before the scan got to it
+                continue
+            try:
+                with open(meta_path) as f:
+                    entry = CachedFile(**json.load(f))
+                if os.path.getsize(self.path(entry.bitstream_id)) != entry.size:
+                    raise ValueError("size mismatch")
+            except (OSError, ValueError, TypeError) as e:
+                logger.warning(f"dropping unreadable cache entry {meta_path}: {e}")
+                self._remove_files(os.path.basename(meta_path)[:-len(".json")])
+                continue
+            self._entries[entry.bitstream_id] = entry
+            self.current_bytes += entry.size
+        logger.info(f"bitstream cache loaded {len(self._entries)} file(s), {self.current_bytes} bytes")
+        self._evict()
+
+    async def get(self, bitstream_id: str) -> Optional[CachedFile]:
+        await self.load()
+        entry = self._entries.get(bitstream_id)
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+        if not await asyncio.to_thread(self._touch, bitstream_id):
+            # another worker sharing the directory evicted it, stream from DSpace instead
+            self._drop(bitstream_id)
+            self.stats["misses"] += 1
+            self.stats["evicted_elsewhere"] += 1
+            return None
+        self.stats["hits"] += 1
+        self._entries.move_to_end(bitstream_id)
+        return entry
+
+    def _touch(self, bitstream_id: str) -> bool:
+        """Bumps the sidecar mtime, which keeps the LRU order across restarts. False when the files are gone."""
+        try:
+            os.utime(self._meta_path(bitstream_id))
+        except FileNotFoundError:
+            return False
+        return os.path.isfile(self.path(bitstream_id))
+
+    def _drop(self, bitstream_id: str):
+        entry = self._entries.pop(bitstream_id, None)
+        if entry is not None:
+            self.current_bytes -= entry.size
+
+    def should_store(self, bitstream_id: str, size: Optional[int]) -> bool:
+        """Counts a full download of `bitstream_id`, True once it is popular enough to keep on disk."""
+        count = self._requests.pop(bitstream_id, 0) + 1
+        self._requests[bitstream_id] = count
+        if len(self._requests) > MAX_TRACKED:
+            self._requests.popitem(last=False)
+        if bitstream_id in self._writing or count < self.min_hits:
+            return False
+        return size is None or size <= self.max_file_bytes
+
+    def writer(self, entry: CachedFile) -> "CacheWriter":
+        self._writing.add(entry.bitstream_id)
+        return CacheWriter(self, entry)
+
+    def _add(self, entry: CachedFile):
+        old = self._entries.pop(entry.bitstream_id, None)
+        if old is not None:
+            self.current_bytes -= old.size
+        self._entries[entry.bitstream_id] = entry
+        self.current_bytes += entry.size
+        self.stats["stored"] += 1
+        self._requests.pop(entry.bitstream_id, None)
+        self._evict()
+
+    def _evict(self):
+        while self.current_bytes > self.max_bytes and self._entries:
+            bitstream_id, evicted = self._entries.popitem(last=False)
+            self.current_bytes -= evicted.size
+            self.stats["evictions"] += 1
+            self._remove_files(bitstream_id)
+
+    def _remove_files(self, bitstream_id: str):
+        for path in (self.path(bitstream_id), self._meta_path(bitstream_id)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def cache_stats(self) -> dict:
+        return {
+            **self.stats,
+            "entries": len(self._entries),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+            "writing": len(self._writing),
+        }
+
+
+class CacheWriter():
+    """Writes one download into a temp file and moves it into the cache once it is complete."""
+
+    def __init__(self, cache: BitstreamDiskCache, entry: CachedFile):
+        self.cache = cache
+        self.entry = entry
+        self.size = 0
+        self.temp_path = os.path.join(cache.directory, f"{entry.bitstream_id}.{uuid.uuid4().hex}.part")
+        self._file = None
+        self._closed = False
+
+    async def write(self, chunk: bytes):
+        # disk writes run in a thread so a slow disk doesn't stall the event loop
+        if self._file is None:
+            os.makedirs(self.cache.directory, exist_ok=True)
+            self._file = await asyncio.to_thread(open, self.temp_path, "wb")
+        self.size += len(chunk)
+        if self.size > self.cache.max_file_bytes:
+            raise ValueError("bitstream is larger than the cache file limit")
+        await asyncio.to_thread(self._file.write, chunk)
+
+    async def commit(self):
+        if self._file is None:
+            await self.write(b"")
+        await asyncio.to_thread(self._file.close)
+        self.entry.size = self.size
+        await asyncio.to_thread(self._finalize)
+        self._closed = True
+        self.cache._writing.discard(self.entry.bitstream_id)
+        self.cache._add(self.entry)
+
+    def _finalize(self):
+        os.replace(self.temp_path, self.cache.path(self.entry.bitstream_id))
+        with open(self.cache._meta_path(self.entry.bitstream_id), "w") as f:
+            json.dump(asdict(self.entry), f)
+
+    async def abort(self):
+        if self._closed:
+            return
+        self._closed = True
+        self.cache._writing.discard(self.entry.bitstream_id)
+        self.cache.stats["aborted_writes"] += 1
+        if self._file is not None:
+            await asyncio.to_thread(self._file.close)
+            try:
+                os.remove(self.temp_path)
+            except FileNotFoundError:
+                pass
+        if self.entry.bitstream_id not in self.cache._entries:
+            # a commit that failed half way may have left the file or its sidecar behind
+            self.cache._remove_files(self.entry.bitstream_id)
@@ -0,0 +1,171 @@
+import hashlib
+from typing import AsyncIterator, Dict, List, Optional
+from python_multipart.multipart import MultipartParser, parse_options_header
+from src.v1.base.exception import BadRequest
+
+# form fields are small (title, description, ...), anything bigger is not a field we expect
+MAX_FIELD_BYTES = 64 * 1024
+
+
+def multipart_boundary(content_type: Optional[str]) -> bytes:
+    """Boundary of a multipart/form-data content type header, BadRequest when it isn't one."""
+    mime, options = parse_options_header(content_type or "")
+    boundary = options.get(b"boundary")
+    if mime != b"multipart/form-data" or not boundary:
+        raise BadRequest("expected a multipart/form-data body with a boundary")
+    return boundary
+
+
+class MultipartFileStream():
+    """
+    Incremental multipart/form-data reader for a single file upload.
+
+    The request body is pulled from `body` only as fast as the file is consumed, so a
+    5MB thesis and a 2GB dataset both cost about `chunk_size` bytes of memory. Form
+    fields sent before the file part are available in `fields` once open() returns;
+    the byte count and MD5/SHA-256 of the file are computed while it streams through.
+
+        upload = MultipartFileStream(request.stream(), boundary, chunk_size, max_bytes)
+        await upload.open()
+        async for chunk in upload: ...
+        await upload.finish()
+    """
+
+    def __init__(self, body: AsyncIterator[bytes], boundary: bytes, chunk_size: int, max_bytes: int):
+        self.body = body.__aiter__()
+        self.chunk_size = chunk_size
+        self.max_bytes = max_bytes
+        self.fields: Dict[str, str] = {}
+        self.filename: Optional[str] = None
+        self.content_type: Optional[str] = None
+        self.size = 0
+        self.md5 = hashlib.md5()
+        self.sha256 = hashlib.sha256()
+        # set when the stream failed while someone else (the http client) was pulling from it
+        self.error: Optional[Exception] = None
+
+        self._pending: List[bytes] = []  # file bytes decoded but not handed out yet
+        self._pending_size = 0
+        self._part: Optional[str] = None  # "file", "field" or None between parts
+        self._headers: Dict[bytes, bytes] = {}
+        self._header_field = b""
+        self._header_value = b""
+        self._field_name = ""
+        self._field_value = bytearray()
+        self._file_done = False
+        self._ended = False
+        self._parser = MultipartParser(boundary, callbacks={
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+            "on_end": self._on_end,
+        })
+
+    # ============ Parser Callbacks ============
+    def _on_part_begin(self):
+        self._headers = {}
+        self._field_value = bytearray()
+
+    def _on_header_field(self, data: bytes, start: int, end: int):
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def _on_header_end(self):
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def _on_headers_finished(self):
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        name = options.get(b"name", b"").decode("utf-8", "replace")
+        if b"filename" not in options:
+            self._part = "field"
+            self._field_name = name
+            return
+        if self.filename is not None:
+            raise BadRequest("only one file can be uploaded per request")
+        self._part = "file"
+        self.filename = options[b"filename"].decode("utf-8", "replace") or "upload"
+        self.content_type = self._headers.get(b"content-type", b"application/octet-stream").decode("latin-1")
+
+    def _on_part_data(self, data: bytes, start: int, end: int):
+        chunk = data[start:end]
+        if self._part == "file":
+            self.size += len(chunk)
+            if self.size > self.max_bytes:
+                raise BadRequest(f"file is larger than the {self.max_bytes} byte upload limit")
+            self.md5.update(chunk)
+            self.sha256.update(chunk)
+            self._pending.append(chunk)
+            self._pending_size += len(chunk)
+        elif self._part == "field":
+            self._field_value += chunk
+            if len(self._field_value) > MAX_FIELD_BYTES:
+                raise BadRequest(f"form field '{self._field_name}' is too large")
+
+    def _on_part_end(self):
+        if self._part == "file":
+            self._file_done = True
+        elif self._part == "field":
+            self.fields[self._field_name] = self._field_value.decode("utf-8", "replace")
+        self._part = None
+
+    def _on_end(self):
+        self._ended = True
+
+    # ============ Reading ============
+    async def _feed(self) -> bool:
+        """Pushes the next request body chunk through the parser, False once the body is exhausted."""
+        try:
+            data = await self.body.__anext__()
+        except StopAsyncIteration:
+            return False
+        if data:
+            self._parser.write(data)
+        return True
+
+    def _take(self) -> bytes:
+        data = b"".join(self._pending)
+        self._pending.clear()
+        self._pending_size = 0
+        return data
+
+    async def open(self):
+        """Reads up to the start of the file part, collecting the form fields sent before it."""
+        while self.filename is None:
+            if not await self._feed():
+                raise BadRequest("upload has no file part")
+
+    async def chunks(self) -> AsyncIterator[bytes]:
+        try:
+            while True:
+                if self._pending_size >= self.chunk_size or (self._file_done and self._pending):
+                    yield self._take()
+                elif self._file_done:
+                    return
+                elif not await self._feed():
+                    raise BadRequest("upload body ended before the file was complete")
+        except Exception as e:
+            self.error = e
+            raise
+
+    def __aiter__(self) -> AsyncIterator[bytes]:
+        return self.chunks()
+
+    async def finish(self):
+        """Drains what is left of the body (fields after the file) and checks the upload was complete."""
+        while not self._ended and await self._feed():
+            pass
+        self._parser.finalize()
+        if not self._file_done:
+            raise BadRequest("upload body ended before the file was complete")
+
+    @property
+    def checksums(self) -> Dict[str, str]:
+        return {"md5": self.md5.hexdigest(), "sha256": self.sha256.hexdigest()}
@@ -0,0 +1,55 @@
+import uuid
+from fastapi import APIRouter, Depends, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.utils.db import get_session
+from src.utils.response import success_response
+from src.v1.auth.service import PermissionChecker
+from src.v1.model import User
+from src.v1.model.roles import PermissionType
+from .schema import ResourceOut
+from .service import ResourceService, bitstream_cache, upload_limiter
+from src.utils.log import setup_logger
+logger = setup_logger(__name__, "resource_route.log")
+
+
+def get_resource_service(db: AsyncSession = Depends(get_session)):
+    return ResourceService(db=db)
+
+
+resource_router = APIRouter(prefix="/resources", tags=["resources"])
+
+
+@resource_router.post("/bundles/{bundle_id}/bitstreams")
+async def upload_bitstream(
+    bundle_id: uuid.UUID,
+    request: Request,
+    user: User = Depends(PermissionChecker(PermissionType.CREATE_RESOURCE)),
+    resource_service: ResourceService = Depends(get_resource_service),
+):
+    # the body is read straight from the request stream, declaring File()/Form() params
+    # here would make FastAPI spool the whole upload before this runs
+    resource = await resource_service.upload_bitstream(bundle_id, request, user)
+    return success_response(
+        status_code=status.HTTP_201_CREATED,
+        data=ResourceOut.model_validate(resource).model_dump()
+    )
+
+
+@resource_router.get("/uploads/stats")
+async def upload_stats():
+    return upload_limiter.snapshot()
+
+
+@resource_router.get("/bitstreams/{bitstream_id}/content")
+async def download_bitstream(
+    bitstream_id: uuid.UUID,
+    request: Request,
+    user: User = Depends(PermissionChecker()),
+    resource_service: ResourceService = Depends(get_resource_service),
+):
+    return await resource_service.download_bitstream(bitstream_id, request, user)
+
+
+@resource_router.get("/downloads/stats")
+async def download_stats():
+    return bitstream_cache.cache_stats()
@@ -0,0 +1,19 @@
+import uuid
+from datetime import datetime
+from pydantic import BaseModel
+from typing import Optional
+
+
+class ResourceOut(BaseModel):
+    id: uuid.UUID
+    bitstream_id: str
+    bundle_id: str
+    filename: str
+    content_type: Optional[str] = None
+    size_bytes: int
+    checksum_md5: str
+    checksum_sha256: str
+    uploaded_by: Optional[uuid.UUID] = None
+    created_at: Optional[datetime] = None
+    class Config:
+        from_attributes = True
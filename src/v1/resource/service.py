@@ -0,0 +1,324 @@
+import asyncio
+from contextlib import AsyncExitStack, asynccontextmanager
+from fastapi import Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import SQLAlchemyError
+from src.utils.config import config
+from src.utils.redis_client import get_redis
+from src.v1.model import Resource, User
+from src.v1.base.exception import AuthorizationError, BadRequest, DatabaseError, DSpaceError, NotFoundError, TooManyRequests
+from src.v1.dspace.service import dspace_authz_service, dspace_client, admin_token_provider
+from .multipart import MultipartFileStream, multipart_boundary
+from .disk_cache import BitstreamDiskCache, CachedFile
+from src.utils.log import setup_logger
+logger = setup_logger(__name__, "resource_service.log")
+
+
+class UploadLimiter():
+    """
+    Caps concurrent uploads at `per_worker` for this process and `per_user` per user
+    across all workers. A user over their limit is rejected straight away, a worker
+    at capacity makes the upload wait up to `queue_timeout` seconds for a slot.
+    """
+
+    # a slot counter left behind by a crashed worker frees itself after this long
+    SLOT_TTL = 6 * 60 * 60
+
+    def __init__(self, per_worker: int, per_user: int, queue_timeout: float):
+        self.per_worker = per_worker
+        self.per_user = per_user
+        self.queue_timeout = queue_timeout
+        self._worker_slots = asyncio.Semaphore(per_worker)
+        self.active = 0
+        self.stats = {"started": 0, "rejected_user": 0, "rejected_worker": 0}
+
+    @staticmethod
+    def user_key(user_id: str) -> str:
+        return f"upload_slots:{user_id}"
+
+    @asynccontextmanager
+    async def slot(self, user_id: str):
+        redis = await get_redis()
+        key = self.user_key(user_id)
+        in_use = await redis.incr(key)
+        await redis.expire(key, self.SLOT_TTL)
+        try:
+            if in_use > self.per_user:
+                self.stats["rejected_user"] += 1
+                raise TooManyRequests(f"at most {self.per_user} uploads per user can run at the same time")
+            try:
+                await asyncio.wait_for(self._worker_slots.acquire(), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.stats["rejected_worker"] += 1
+                raise TooManyRequests("the server is busy with other uploads, try again shortly")
+            self.active += 1
+            self.stats["started"] += 1
+            try:
+                yield
+            finally:
+                self.active -= 1
+                self._worker_slots.release()
+        finally:
+            await redis.decr(key)
+
+    def snapshot(self) -> dict:
+        return {**self.stats, "active": self.active, "per_worker": self.per_worker, "per_user": self.per_user}
+
+
+upload_limiter = UploadLimiter(
+    per_worker=config.upload_max_concurrency,
+    per_user=config.upload_max_per_user,
+    queue_timeout=config.upload_queue_timeout,
+)
+
+
+bitstream_cache = BitstreamDiskCache(
+    directory=config.download_cache_dir,
+    max_bytes=config.download_cache_max_bytes,
+    max_file_bytes=config.download_cache_max_file_bytes,
+    min_hits=config.download_cache_min_hits,
+)
+
+# upstream headers relayed to the client on a proxied download
+PROXIED_HEADERS = (
+    "Content-Type",
+    "Content-Length",
+    "Content-Range",
+    "Content-Disposition",
+    "Accept-Ranges",
+    "ETag",
+    "Last-Modified",
+)
+
+
+class ResourceService():
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    # ============ Upload Operations ============
+    async def upload_bitstream(self, bundle_id: str, request: Request, user: User) -> Resource:
+        """
+        Streams the file of a multipart/form-data request into a new bitstream of a
+        DSpace bundle and records it as a Resource. Optional form fields sent before
+        the file: `name` (defaults to the file name) and `description`.
+
+        The upload itself goes out with the super admin's tokens, so DSpace is asked
+        first whether the user's own eperson may add bitstreams to the bundle.
+        """
+        boundary = multipart_boundary(request.headers.get("content-type"))
+        user_id = str(user.id)
+        await self._authorize(dspace_authz_service.CAN_CREATE_BITSTREAM, f"core/bundles/{bundle_id}", user, "bundle")
+        async with upload_limiter.slot(user_id):
+            upload = MultipartFileStream(
+                request.stream(),
+                boundary,
+                chunk_size=config.upload_chunk_size,
+                max_bytes=config.upload_max_bytes,
+            )
+            await upload.open()
+            name = upload.fields.get("name") or upload.filename
+            properties = {"name": name}
+            if upload.fields.get("description"):
+                properties["metadata"] = {"dc.description": [{"value": upload.fields["description"]}]}
+
+            tokens = await admin_token_provider.get_tokens()
+            logger.info(f"user {user_id} uploading {upload.filename} to bundle {bundle_id}")
+            try:
+                bitstream, _ = await dspace_client.upload_bitstream(
+                    endpoint=f"core/bundles/{bundle_id}/bitstreams",
+                    chunks=upload,
+                    filename=upload.filename,
+                    content_type=upload.content_type,
+                    properties=properties,
+                    req_headers={"X-XSRF-TOKEN": tokens.get("DSPACE-XSRF-TOKEN")},
+                    jwt_token=tokens.get("jwt_token"),
+                    principal=config.base_username,
+                )
+            except Exception as e:
+                # a broken request body surfaces through the http client, report it as such
+                if upload.error is not None:
+                    raise upload.error
+                if isinstance(e, DSpaceError):
+                    raise
+                logger.error(f"upload of {upload.filename} to bundle {bundle_id} failed: {e}", exc_info=True)
+                raise DSpaceError(f"upload to DSpace failed: {type(e).__name__}")
+            await upload.finish()
+
+        checksums = upload.checksums
+        await self._verify_checksum(bitstream, checksums["md5"])
+        logger.info(f"uploaded {upload.filename} ({upload.size} bytes, md5 {checksums['md5']}) as bitstream {bitstream.get('id')}")
+
+        try:
+            resource = Resource(
+                bitstream_id=bitstream["id"],
+                bundle_id=str(bundle_id),
+                filename=name,
+                content_type=upload.content_type,
+                size_bytes=upload.size,
+                checksum_md5=checksums["md5"],
+                checksum_sha256=checksums["sha256"],
+                uploaded_by=user.id,
+            )
+            self.db.add(resource)
+            await self.db.commit()
+            return resource
+        except SQLAlchemyError as e:
+            logger.error(f"Database error recording bitstream {bitstream.get('id')}: {str(e)}")
+            raise DatabaseError(f"Error recording upload: {str(e)}")
+
+    @staticmethod
+    async def _authorize(feature: str, object_endpoint: str, user: User, kind: str):
+        try:
+            authorized = await dspace_authz_service.is_authorized(feature, object_endpoint, user.dspace_id)
+        except DSpaceError as e:
+            if e.status == 404:
+                raise NotFoundError(f"{kind.capitalize()} '{object_endpoint.rsplit('/', 1)[-1]}' does not exist")
+            raise
+        if not authorized:
+            logger.warning(f"user {user.id} denied {feature} on {object_endpoint}")
+            raise AuthorizationError(f"You are not allowed to access this {kind}")
+
+    @staticmethod
+    async def _publicly_readable(endpoint: str) -> bool:
+        # the disk cache is shared by every user, embargoed or restricted content stays out of it
+        try:
+            return await dspace_authz_service.is_authorized(dspace_authz_service.CAN_DOWNLOAD, endpoint)
+        except Exception as e:
+            logger.warning(f"could not check anonymous access to {endpoint}, not caching it: {e}")
+            return False
+
+    async def _verify_checksum(self, bitstream: dict, md5: str):
+        """Compares DSpace's checksum with ours and deletes the bitstream when they disagree."""
+        checksum = bitstream.get("checkSum") or {}
+        if (checksum.get("checkSumAlgorithm") or "").upper() != "MD5" or not checksum.get("value"):
+            logger.warning(f"DSpace returned no MD5 for bitstream {bitstream.get('id')}, skipping verification")
+            return
+        if checksum["value"].lower() == md5:
+            return
+
+        logger.error(f"checksum mismatch for bitstream {bitstream.get('id')}: DSpace {checksum['value']}, received {md5}")
+        tokens = await admin_token_provider.get_tokens()
+        try:
+            await dspace_client._make_request(
+                http_method="delete",
+                endpoint=f"core/bitstreams/{bitstream['id']}",
+                req_headers={"X-XSRF-TOKEN": tokens.get("DSPACE-XSRF-TOKEN")},
+                jwt_token=tokens.get("jwt_token"),
+                principal=config.base_username,
+            )
+        except Exception as e:
+            logger.error(f"failed to delete corrupt bitstream {bitstream.get('id')}: {e}")
+        raise BadRequest("uploaded file was corrupted in transit, please upload it again")
+
+    # ============ Download Operations ============
+    async def download_bitstream(self, bitstream_id: str, request: Request, user: User) -> Response:
+        """
+        Serves bitstream content with Range and If-None-Match support.
+
+        Cached bitstreams go out as a FileResponse, which handles ranges itself and
+        uses sendfile when the server offers it, so the bytes skip the event loop.
+        Everything else is proxied from DSpace in chunks, and full downloads of
+        popular bitstreams are written to the disk cache on the way through.
+
+        Content is fetched with the super admin's tokens, so every download, cached
+        or not, first asks DSpace whether the user's own eperson may download the
+        bitstream, and only bitstreams anonymous users may download are cached.
+        """
+        bitstream_id = str(bitstream_id)
+        endpoint = f"core/bitstreams/{bitstream_id}"
+        await self._authorize(dspace_authz_service.CAN_DOWNLOAD, endpoint, user, "bitstream")
+        if_none_match = request.headers.get("if-none-match")
+        range_header = request.headers.get("range")
+
+        entry = await bitstream_cache.get(bitstream_id)
+        if entry is not None:
+            if if_none_match and entry.etag and entry.etag in (tag.strip() for tag in if_none_match.split(",")):
+                return Response(status_code=304, headers={"ETag": entry.etag})
+            headers = {"Accept-Ranges": "bytes"}
+            if entry.etag:
+                headers["ETag"] = entry.etag
+            if entry.content_disposition:
+                headers["Content-Disposition"] = entry.content_disposition
+            return FileResponse(
+                bitstream_cache.path(bitstream_id),
+                media_type=entry.content_type or "application/octet-stream",
+                headers=headers,
+            )
+
+        upstream_headers = {}
+        if range_header:
+            upstream_headers["Range"] = range_header
+            if request.headers.get("if-range"):
+                upstream_headers["If-Range"] = request.headers["if-range"]
+        if if_none_match:
+            upstream_headers["If-None-Match"] = if_none_match
+
+        tokens = await admin_token_provider.get_tokens()
+        stack = AsyncExitStack()
+        try:
+            upstream = await stack.enter_async_context(dspace_client.stream(
+                endpoint=f"{endpoint}/content",
+                req_headers=upstream_headers,
+                jwt_token=tokens.get("jwt_token"),
+                principal=config.base_username,
+            ))
+        except DSpaceError as e:
+            await stack.aclose()
+            if e.status == 404:
+                raise NotFoundError(f"Bitstream '{bitstream_id}' does not exist")
+            raise
+
+        headers = {name: upstream.headers[name] for name in PROXIED_HEADERS if name in upstream.headers}
+        if upstream.status in (304, 416):
+            await stack.aclose()
+            return Response(status_code=upstream.status, headers=headers)
+
+        writer = None
+        if (
+            upstream.status == 200
+            and bitstream_cache.should_store(bitstream_id, upstream.content_length)
+            and await self._publicly_readable(endpoint)
+        ):
+            writer = bitstream_cache.writer(CachedFile(
+                bitstream_id=bitstream_id,
+                size=0,
+                etag=upstream.headers.get("ETag"),
+                content_type=upstream.headers.get("Content-Type"),
+                content_disposition=upstream.headers.get("Content-Disposition"),
+            ))
+
+        async def body():
+            nonlocal writer
+            try:
+                async for chunk in upstream.content.iter_chunked(config.download_chunk_size):
+                    if writer is not None:
+                        try:
+                            await writer.write(chunk)
+                        except (OSError, ValueError) as e:
+                            # caching is best effort, the client still gets its bytes
+                            logger.warning(f"not caching bitstream {bitstream_id}: {e}")
+                            await writer.abort()
+                            writer = None
+                    yield chunk
+                if writer is not None:
+                    try:
+                        await writer.commit()
+                        logger.info(f"cached bitstream {bitstream_id} ({writer.size} bytes)")
+                    except (OSError, ValueError) as e:
+                        logger.warning(f"not caching bitstream {bitstream_id}: {e}")
+            finally:
+                # drops the temp file of an unfinished or failed write, a no-op once committed
+                if writer is not None:
+                    await writer.abort()
+                await stack.aclose()
+
+        # closing the stack again after a finished body is a no-op, this covers clients
+        # that disconnect before the body is ever iterated
+        return StreamingResponse(
+            body(),
+            status_code=upstream.status,
+            headers=headers,
+            background=BackgroundTask(stack.aclose),
+        )
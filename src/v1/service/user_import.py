@@ -0,0 +1,301 @@
+import asyncio
+import csv
+import hashlib
+import json
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from src.utils.config import config
+from src.utils.db import get_async_db_session
+from src.utils.redis_client import get_redis
+from src.v1.auth.schema import CreateUser
+from src.v1.auth.service import password_hash
+from src.v1.base.exception import DSpaceError, NotFoundError
+from src.v1.model import Role, User
+from src.v1.dspace.service import dspace_auth_service, dspace_group_service
+from src.v1.dspace.role_groups import role_group_map
+from src.utils.log import setup_logger
+logger = setup_logger(__name__, "user_import.log")
+
+
+def file_job_id(path: str) -> str:
+    """Import id derived from the file content, so re-running the same file resumes it."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+class UserImport():
+    """
+    Streams a CSV of users (the CreateUser fields as columns) into our db and DSpace.
+
+    Rows are read `batch_size` at a time. Each batch is validated, its epersons are
+    created with at most `concurrency` DSpace calls in flight, the local users are
+    inserted in one transaction, and the new epersons are linked to their role's
+    group. Only then is the batch's last row number written to the redis checkpoint,
+    so after a crash the import picks up at the first unfinished batch. Replaying that
+    batch is safe: users already in our db are skipped, and an eperson left behind in
+    DSpace by the crashed run is looked up by email instead of created again. Skipped
+    users are only linked to the group of a role they already hold. A row whose group
+    link fails also counts as failed, on top of imported or skipped.
+
+    The job keeps off the interactive path's toes: DSpace concurrency is bounded,
+    bcrypt hashing runs in a thread, and it pauses `batch_pause` seconds between
+    batches. Run it through import_users.py so it has a process of its own.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        job_id: Optional[str] = None,
+        batch_size: int = 200,
+        concurrency: int = 4,
+        batch_pause: float = 0.5,
+        checkpoint_ttl: int = 7 * 24 * 60 * 60,
+    ):
+        self.path = path
+        self.job_id = job_id or file_job_id(path)
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.batch_pause = batch_pause
+        self.checkpoint_ttl = checkpoint_ttl
+        self.key = f"user_import:{self.job_id}"
+        self.errors_key = f"user_import:{self.job_id}:errors"
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    # ============ Checkpoints ============
+    async def checkpoint(self) -> Dict[str, Any]:
+        redis = await get_redis()
+        state = await redis.hgetall(self.key)
+        return {
+            "row": int(state.get("row", 0)),
+            "imported": int(state.get("imported", 0)),
+            "skipped": int(state.get("skipped", 0)),
+            "failed": int(state.get("failed", 0)),
+            "finished_at": state.get("finished_at"),
+        }
+
+    async def reset(self):
+        redis = await get_redis()
+        await redis.delete(self.key, self.errors_key)
+
+    async def _save(self, row: int, counts: Dict[str, int], errors: List[Dict[str, Any]]):
+        redis = await get_redis()
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.hset(self.key, "row", row)
+            for name, value in counts.items():
+                pipe.hincrby(self.key, name, value)
+            if errors:
+                pipe.rpush(self.errors_key, *(json.dumps(error) for error in errors))
+            pipe.expire(self.key, self.checkpoint_ttl)
+            pipe.expire(self.errors_key, self.checkpoint_ttl)
+            await pipe.execute()
+
+    async def errors(self, limit: int = 1000) -> List[Dict[str, Any]]:
+        redis = await get_redis()
+        return [json.loads(error) for error in await redis.lrange(self.errors_key, 0, limit - 1)]
+
+    # ============ Import ============
+    def _rows(self, after: int) -> Iterator[Tuple[int, Dict[str, str]]]:
+        with open(self.path, newline="", encoding="utf-8-sig") as f:
+            for number, raw in enumerate(csv.DictReader(f), start=1):
+                if number > after:
+                    yield number, raw
+
+    def _batches(self, after: int) -> Iterator[List[Tuple[int, Dict[str, str]]]]:
+        batch = []
+        for row in self._rows(after):
+            batch.append(row)
+            if len(batch) == self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    async def run(self) -> Dict[str, Any]:
+        state = await self.checkpoint()
+        if state["finished_at"]:
+            logger.info(f"import {self.job_id} already finished at {state['finished_at']}")
+            return await self.report(elapsed=0, rows=0, resumed_from=state["row"])
+        resumed_from = state["row"]
+        if resumed_from:
+            logger.info(f"resuming import {self.job_id} after row {resumed_from}")
+
+        started = time.perf_counter()
+        rows = 0
+        for batch in self._batches(resumed_from):
+            batch_started = time.perf_counter()
+            counts, errors = await self._import_batch(batch)
+            await self._save(batch[-1][0], counts, errors)
+            rows += len(batch)
+            logger.info(
+                f"import {self.job_id}: rows {batch[0][0]}-{batch[-1][0]} {counts}, "
+                f"{len(batch) / (time.perf_counter() - batch_started):.1f} rows/s"
+            )
+            await asyncio.sleep(self.batch_pause)
+
+        redis = await get_redis()
+        await redis.hset(self.key, "finished_at", datetime.now(timezone.utc).isoformat())
+        return await self.report(elapsed=time.perf_counter() - started, rows=rows, resumed_from=resumed_from)
+
+    async def report(self, elapsed: float, rows: int, resumed_from: int) -> Dict[str, Any]:
+        state = await self.checkpoint()
+        return {
+            "job_id": self.job_id,
+            "resumed_from_row": resumed_from,
+            "rows_this_run": rows,
+            "last_row": state["row"],
+            "imported": state["imported"],
+            "skipped": state["skipped"],
+            "failed": state["failed"],
+            "elapsed_s": round(elapsed, 2),
+            "rows_per_s": round(rows / elapsed, 1) if elapsed else None,
+            "errors": await self.errors(),
+        }
+
+    async def _import_batch(self, batch: List[Tuple[int, Dict[str, str]]]):
+        counts = {"imported": 0, "skipped": 0, "failed": 0}
+        errors: List[Dict[str, Any]] = []
+
+        def fail(number: int, email: Optional[str], stage: str, error: str):
+            counts["failed"] += 1
+            errors.append({"row": number, "email": email, "stage": stage, "error": error})
+
+        valid: Dict[str, Tuple[int, CreateUser]] = {}
+        for number, raw in batch:
+            # cells beyond the header land under a None key, they are ignored
+            raw = {key.strip(): (value or "").strip() for key, value in raw.items() if key is not None}
+            try:
+                user = CreateUser(**raw)
+            except ValidationError as e:
+                fail(number, raw.get("email"), "validate", "; ".join(
+                    f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in e.errors()
+                ))
+                continue
+            user.email = user.email.lower()
+            if user.email in valid:
+                fail(number, user.email, "validate", f"duplicate of row {valid[user.email][0]}")
+                continue
+            valid[user.email] = (number, user)
+
+        async with get_async_db_session() as session:
+            existing = {
+                user.email: user
+                for user in (await session.execute(select(User).where(User.email.in_(list(valid))))).scalars().all()
+            }
+            roles = set((await session.execute(select(Role.name))).scalars().all())
+
+        # users from an earlier (crashed) run of this batch still get linked, linking is idempotent.
+        # The csv can't grant anything though: an existing user is only linked to the group of a
+        # role they already hold here, otherwise any row could put them in an admin group
+        to_link: Dict[str, List[Tuple[int, str, str]]] = {}
+        to_create = []
+        for email, (number, user) in valid.items():
+            if email in existing:
+                counts["skipped"] += 1
+                account = existing[email]
+                if user.role in {role.name for role in account.roles}:
+                    to_link.setdefault(str(user.role), []).append((number, email, account.dspace_id))
+                else:
+                    logger.warning(f"row {number}: {email} already exists without role '{user.role}', not linking")
+            elif user.role not in roles:
+                fail(number, email, "validate", f"role '{user.role}' does not exist")
+            else:
+                to_create.append((number, user))
+
+        provisioned = await asyncio.gather(*(self._provision(user) for _, user in to_create), return_exceptions=True)
+        new_users = []
+        for (number, user), result in zip(to_create, provisioned):
+            if isinstance(result, BaseException):
+                fail(number, user.email, "dspace", getattr(result, "message", None) or str(result) or type(result).__name__)
+                continue
+            hashed, eperson_id = result
+            new_users.append((number, user, User(
+                first_name=user.first_name,
+                last_name=user.last_name,
+                password=hashed,
+                email=user.email,
+                dspace_id=eperson_id,
+                dspace_special_group=role_group_map.group_id(user.role) or "",
+            )))
+
+        for number, user, row in await self._insert(new_users, fail):
+            counts["imported"] += 1
+            to_link.setdefault(str(user.role), []).append((number, user.email, row.dspace_id))
+
+        for role_name, members in to_link.items():
+            await self._link(role_name, members, fail)
+        return counts, errors
+
+    async def _provision(self, user: CreateUser) -> Tuple[str, str]:
+        async with self._semaphore:
+            # bcrypt is deliberately slow, keep it off the event loop
+            hashed = await asyncio.to_thread(password_hash, user.password)
+            try:
+                eperson = await dspace_auth_service.register(user)
+            except DSpaceError:
+                # an earlier run may have created the eperson and died before our insert
+                eperson = await dspace_auth_service.find_eperson_by_email(user.email)
+                if eperson is None:
+                    raise
+                logger.info(f"reusing existing eperson {eperson['id']} for {user.email}")
+            return hashed, eperson["id"]
+
+    async def _insert(self, new_users, fail) -> list:
+        """Inserts the batch in one transaction, falling back to one row at a time to isolate a bad row."""
+        if not new_users:
+            return []
+        try:
+            async with get_async_db_session() as session:
+                await self._add(session, new_users)
+            return new_users
+        except IntegrityError:
+            logger.warning(f"batch insert of {len(new_users)} user(s) failed, inserting them one by one")
+
+        inserted = []
+        for entry in new_users:
+            number, user, _ = entry
+            try:
+                async with get_async_db_session() as session:
+                    await self._add(session, [entry])
+                inserted.append(entry)
+            except IntegrityError as e:
+                fail(number, user.email, "database", str(e.orig))
+        return inserted
+
+    @staticmethod
+    async def _add(session, new_users):
+        roles = {role.name: role for role in (await session.execute(select(Role))).scalars().all()}
+        for _, user, row in new_users:
+            row.roles = [roles[user.role]]
+            session.add(row)
+        await session.flush()
+
+    async def _link(self, role_name: str, members: List[Tuple[int, str, str]], fail):
+        rows_by_eperson = {eperson_id: (number, email) for number, email, eperson_id in members}
+        try:
+            result = await dspace_group_service.link_users_to_role_group(
+                role_name, list(rows_by_eperson), concurrency=self.concurrency
+            )
+        except NotFoundError as e:
+            for number, email, _ in members:
+                fail(number, email, "link", e.message)
+            return
+        for failure in result["failed"]:
+            number, email = rows_by_eperson.get(failure["user_id"], (None, None))
+            fail(number, email, "link", failure["error"])
+
+def user_import(path: str, job_id: Optional[str] = None, **overrides) -> UserImport:
+    settings = {
+        "batch_size": config.user_import_batch_size,
+        "concurrency": config.user_import_concurrency,
+        "batch_pause": config.user_import_batch_pause,
+        "checkpoint_ttl": config.user_import_checkpoint_ttl,
+    }
+    settings.update({name: value for name, value in overrides.items() if value is not None})
+    return UserImport(path, job_id=job_id, **settings)
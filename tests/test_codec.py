@@ -0,0 +1,65 @@
+import json
+
+import pytest
+
+from src.utils.codec import CODECS, COMPRESSED, HEADER_BASE, CacheCodecs, Codec, CodecError
+
+VALUE = {
+    "access_token": "Bearer abc",
+    "groups": [{"id": n, "name": f"group {n}", "members": None, "active": n % 2 == 0} for n in range(200)],
+    "page": {"number": 0, "size": 1.5},
+}
+
+
+def available(name: str):
+    if not CODECS[name].available:
+        pytest.skip(f"{name} is not installed")
+    return CODECS[name]
+
+
+@pytest.mark.parametrize("name", ["json", "orjson", "msgpack"])
+@pytest.mark.parametrize("compressed", [False, True])
+def test_round_trip(name, compressed):
+    codec = available(name)
+    codecs = CacheCodecs(default=name, compress_threshold=1 if compressed else 0)
+    encoded = codecs.encode("roles:all", VALUE)
+    assert encoded[0] == HEADER_BASE | codec.id | (COMPRESSED if compressed else 0)
+    assert codecs.decode(encoded) == VALUE
+    # any worker decodes it, whatever its own settings
+    assert CacheCodecs(default="json", compress_threshold=0).decode(encoded) == VALUE
+
+
+def test_small_values_stay_uncompressed():
+    codecs = CacheCodecs(default="json", compress_threshold=4096)
+    encoded = codecs.encode("tokens:admin", {"csrf_token": "x"})
+    assert not encoded[0] & COMPRESSED
+    assert codecs.snapshot()["compressed"] == 0
+
+
+def test_namespace_codec():
+    codecs = CacheCodecs(default="json", namespaces={"roles": "auto"})
+    assert codecs.for_key("roles:all") is CODECS["orjson" if CODECS["orjson"].available else "json"]
+    assert codecs.for_key("tokens:admin") is CODECS["json"]
+    assert codecs.for_key("plain") is CODECS["json"]
+
+
+@pytest.mark.parametrize("raw", [json.dumps(VALUE), json.dumps(VALUE).encode()])
+def test_legacy_json(raw):
+    codecs = CacheCodecs()
+    assert codecs.decode(raw) == VALUE
+    assert codecs.stats["legacy"] == 1
+
+
+def test_unknown_header():
+    with pytest.raises(CodecError):
+        CacheCodecs().decode(bytes((HEADER_BASE | 0x0F,)) + b"{}")
+
+
+def test_unknown_codec_name():
+    with pytest.raises(ValueError):
+        CacheCodecs(default="pickle")
+
+
+def test_codec_is_abstract():
+    with pytest.raises(TypeError):
+        Codec("plain", 9, True)
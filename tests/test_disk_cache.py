@@ -0,0 +1,90 @@
+import json
+import os
+
+import pytest
+
+from src.v1.resource.disk_cache import BitstreamDiskCache, CachedFile
+
+
+def entry(bitstream_id: str) -> CachedFile:
+    return CachedFile(bitstream_id, 0, f'"{bitstream_id}"', "application/pdf", None)
+
+
+async def store(cache: BitstreamDiskCache, bitstream_id: str, content: bytes):
+    writer = cache.writer(entry(bitstream_id))
+    await writer.write(content)
+    await writer.commit()
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return BitstreamDiskCache(str(tmp_path), max_bytes=100, max_file_bytes=60, min_hits=2)
+
+
+def test_only_popular_bitstreams_are_stored(cache):
+    assert not cache.should_store("a", 10)
+    assert cache.should_store("a", 10)
+    assert not cache.should_store("b", 10)
+    # too big for the cache, however popular
+    cache.should_store("c", 61)
+    assert not cache.should_store("c", 61)
+
+
+async def test_hit_after_commit(cache):
+    await store(cache, "a", b"x" * 40)
+    found = await cache.get("a")
+    assert (found.size, found.etag) == (40, '"a"')
+    with open(cache.path("a"), "rb") as f:
+        assert f.read() == b"x" * 40
+    assert await cache.get("b") is None
+    assert cache.stats["hits"] == cache.stats["misses"] == 1
+
+
+async def test_least_recently_used_is_evicted(cache):
+    await store(cache, "a", b"x" * 40)
+    await store(cache, "b", b"x" * 40)
+    await cache.get("a")
+    await store(cache, "c", b"x" * 40)
+    assert await cache.get("b") is None
+    assert not os.path.exists(cache.path("b"))
+    assert await cache.get("a") is not None
+    assert cache.current_bytes == 80
+
+
+async def test_writes_over_the_file_limit_are_aborted(cache):
+    writer = cache.writer(entry("a"))
+    with pytest.raises(ValueError):
+        await writer.write(b"x" * 61)
+    await writer.abort()
+    assert os.listdir(cache.directory) == []
+    assert cache.cache_stats()["writing"] == 0
+
+
+async def test_index_is_rebuilt_from_disk(cache, tmp_path):
+    await store(cache, "a", b"x" * 40)
+    await store(cache, "b", b"x" * 30)
+    # a half written download and an entry whose file doesn't match its sidecar
+    (tmp_path / "c.1234.part").write_bytes(b"x")
+    (tmp_path / "d").write_bytes(b"x" * 5)
+    (tmp_path / "d.json").write_text(json.dumps({**entry("d").__dict__, "size": 50}))
+
+    restarted = BitstreamDiskCache(cache.directory, max_bytes=100, max_file_bytes=60, min_hits=2)
+    await restarted.load()
+    assert sorted(os.listdir(tmp_path)) == ["a", "a.json", "b", "b.json"]
+    assert restarted.current_bytes == 70
+    assert (await restarted.get("b")).size == 30
+
+
+async def test_file_evicted_by_another_worker_is_a_miss(cache):
+    await store(cache, "a", b"x" * 40)
+    other = BitstreamDiskCache(cache.directory, max_bytes=100, max_file_bytes=60, min_hits=2)
+    await other.load()
+    assert await other.get("a") is not None
+
+    await store(cache, "b", b"x" * 40)
+    await store(cache, "c", b"x" * 40)
+    assert not os.path.exists(cache.path("a"))
+
+    assert await other.get("a") is None
+    assert other.current_bytes == 0
+    assert other.stats["evicted_elsewhere"] == 1
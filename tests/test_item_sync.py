@@ -0,0 +1,143 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+
+from src.v1.model import RepositoryItem, SyncWatermark
+from src.v1.repository import sync
+from src.v1.repository.sync import ItemSync, parse_item
+
+START = datetime(2026, 1, 5, 9, 0, tzinfo=timezone.utc)
+
+
+def item_id(n: int) -> str:
+    return f"{n:08x}-aaaa-4aaa-8aaa-aaaaaaaaaaaa"
+
+
+def dspace_item(n: int, modified: datetime, title: str = None) -> dict:
+    return {
+        "uuid": item_id(n),
+        "name": f"item {n}",
+        "handle": f"123456789/{n}",
+        "withdrawn": False,
+        "lastModified": modified.isoformat(),
+        "metadata": {
+            "dc.title": [{"value": title or f"Thesis {n}"}],
+            "dc.contributor.author": [{"value": "Obi, Ada"}, {"value": "Eze, Chidi"}],
+            "dc.date.issued": [{"value": "2024-06-01"}],
+            "dc.type": [{"value": "Thesis"}],
+        },
+    }
+
+
+class FakeDiscovery():
+    """Answers discover/search/objects like DSpace: lastModified range query, sorted, paged."""
+
+    def __init__(self):
+        self.items = {}
+        self.requests = []
+
+    def put(self, item: dict):
+        self.items[item["uuid"]] = item
+
+    async def _make_request(self, http_method, endpoint, query_params=None, **kwargs):
+        self.requests.append(query_params)
+        matches = sorted(self.items.values(), key=lambda item: (item["lastModified"], item["uuid"]))
+        if "query" in query_params:
+            since = datetime.fromisoformat(query_params["query"].split("[", 1)[1].split(" TO", 1)[0].replace("Z", "+00:00"))
+            matches = [item for item in matches if datetime.fromisoformat(item["lastModified"]) >= since]
+        size, page = query_params["size"], query_params["page"]
+        objects = [{"_embedded": {"indexableObject": item}} for item in matches[page * size:(page + 1) * size]]
+        return {"_embedded": {"searchResult": {"_embedded": {"objects": objects}}}}, {}
+
+
+@pytest.fixture
+def discovery(monkeypatch, redis):
+    discovery = FakeDiscovery()
+    monkeypatch.setattr(sync, "dspace_client", discovery)
+    # the weighted tsvector is built by postgres functions, sqlite has none of them
+    monkeypatch.setattr(sync, "search_vector", lambda title, authors, abstract: None)
+    return discovery
+
+
+async def mirrored(db) -> dict:
+    async with db() as session:
+        return {str(row.id): row for row in (await session.execute(select(RepositoryItem))).scalars()}
+
+
+def test_parse_item():
+    values = parse_item(dspace_item(1, START))
+    assert values["title"] == "Thesis 1"
+    assert values["authors"] == ["Obi, Ada", "Eze, Chidi"]
+    assert (values["item_type"], values["issued_year"]) == ("Thesis", 2024)
+    assert values["dspace_last_modified"] == START
+
+
+async def test_first_run_is_full(db, discovery):
+    for n in range(1, 6):
+        discovery.put(dspace_item(n, START + timedelta(minutes=n)))
+    result = await ItemSync(page_size=3).run()
+    # the next page starts at the last timestamp seen, so that item comes back once
+    assert result["full"] and result["pages"] == 3
+    assert (result["added"], result["unchanged"]) == (5, 2)
+    assert len(await mirrored(db)) == 5
+    assert "query" not in discovery.requests[0]
+
+    async with db() as session:
+        state = await session.scalar(select(SyncWatermark))
+        assert sync.as_utc(state.watermark) == START + timedelta(minutes=5)
+        assert state.runs == 1
+
+
+async def test_incremental_run_only_applies_changes(db, discovery):
+    for n in range(1, 4):
+        discovery.put(dspace_item(n, START + timedelta(minutes=n)))
+    items = ItemSync(page_size=10, full_every=100)
+    await items.run()
+
+    discovery.put(dspace_item(2, START + timedelta(hours=1), title="Thesis 2, revised"))
+    discovery.put(dspace_item(4, START + timedelta(hours=2)))
+    discovery.requests.clear()
+    result = await items.run()
+
+    assert not result["full"]
+    assert discovery.requests[0]["query"] == "lastModified:[2026-01-05T09:03:00.000Z TO *]"
+    # item 3 sits on the watermark and comes back once, unchanged
+    assert (result["added"], result["updated"], result["unchanged"]) == (1, 1, 1)
+    rows = await mirrored(db)
+    assert rows[item_id(2)].title == "Thesis 2, revised"
+    assert len(rows) == 4
+
+
+async def test_items_sharing_a_timestamp_are_paged_through(db, discovery):
+    for n in range(1, 8):
+        discovery.put(dspace_item(n, START))
+    result = await ItemSync(page_size=3).run(full=False)
+    assert result["added"] == 7
+    assert len(await mirrored(db)) == 7
+
+
+async def test_full_run_soft_deletes_what_dspace_dropped(db, discovery):
+    for n in range(1, 4):
+        discovery.put(dspace_item(n, START + timedelta(minutes=n)))
+    items = ItemSync(page_size=10)
+    await items.run()
+
+    del discovery.items[item_id(2)]
+    result = await items.run(full=True)
+    assert result["deleted"] == 1
+    rows = await mirrored(db)
+    assert rows[item_id(2)].deleted_at is not None
+    assert rows[item_id(1)].deleted_at is None
+
+    # an empty index (DSpace reindexing) must not wipe the mirror
+    discovery.items.clear()
+    assert (await items.run(full=True))["deleted"] == 0
+
+
+async def test_only_one_worker_syncs_at_a_time(db, discovery, redis):
+    items = ItemSync()
+    lock = redis.lock(items.lock_key, timeout=10)
+    assert await lock.acquire(blocking=False)
+    assert (await items.run())["skipped"]
+    await lock.release()
@@ -0,0 +1,96 @@
+import time
+
+import pytest
+
+from src.utils import redis_client
+from src.utils.local_cache import LocalCache, namespace_marker
+
+
+@pytest.fixture
+def cache():
+    cache = LocalCache(max_entries=3, max_bytes=1000, default_ttl=60, namespace_ttls={"short": 0.05, "off": 0})
+    # what the invalidation listener sets once it's subscribed
+    cache._listening = True
+    return cache
+
+
+def test_disabled_until_listening():
+    cache = LocalCache(max_entries=10, max_bytes=1000, default_ttl=60)
+    cache.put("roles:all", b"v", cache.generation)
+    assert cache.get("roles:all") is None
+    assert not cache.exists("roles:all")
+
+
+def test_put_and_get(cache):
+    cache.put("roles:all", b"v", cache.generation)
+    assert cache.get("roles:all") == b"v"
+    assert cache.stats["l1_hits"] == 1
+
+
+def test_read_that_raced_a_discard_is_not_cached(cache):
+    generation = cache.generation
+    # redis is being read, meanwhile another worker invalidates the key
+    cache.discard(["roles:all"])
+    cache.put("roles:all", b"stale", generation)
+    assert cache.get("roles:all") is None
+
+
+def test_read_that_raced_a_clear_is_not_cached(cache):
+    generation = cache.generation
+    cache.clear()
+    cache.put("roles:all", b"stale", generation)
+    assert cache.get("roles:all") is None
+    cache.put("roles:all", b"fresh", cache.generation)
+    assert cache.get("roles:all") == b"fresh"
+
+
+def test_namespace_marker_discards_the_namespace(cache):
+    cache.put("roles:a", b"1", cache.generation)
+    cache.put("roles:b", b"2", cache.generation)
+    cache.put("tokens:a", b"3", cache.generation)
+    cache.discard([namespace_marker("roles")])
+    assert cache.get("roles:a") is None and cache.get("roles:b") is None
+    assert cache.get("tokens:a") == b"3"
+
+
+def test_ttl_expiry(cache):
+    cache.put("short:a", b"v", cache.generation)
+    cache.put("off:a", b"v", cache.generation)
+    assert cache.get("short:a") == b"v"
+    assert cache.get("off:a") is None
+    time.sleep(0.06)
+    assert cache.get("short:a") is None
+    assert cache.current_bytes == 0
+
+
+def test_lru_eviction(cache):
+    for key in ("k:1", "k:2", "k:3"):
+        cache.put(key, b"v", cache.generation)
+    cache.get("k:1")
+    cache.put("k:4", b"v", cache.generation)
+    assert cache.get("k:2") is None
+    assert cache.get("k:1") == b"v"
+    assert cache.stats["evictions"] == 1
+
+
+def test_byte_limit(cache):
+    cache.put("k:1", b"x" * 600, cache.generation)
+    cache.put("k:2", b"x" * 600, cache.generation)
+    assert cache.get("k:1") is None
+    assert cache.current_bytes == len("k:2") + 600
+    cache.put("k:3", b"x" * 2000, cache.generation)
+    assert cache.get("k:3") is None
+
+
+async def test_write_through_redis_client_invalidates_l1(redis):
+    redis_client.local_cache._listening = True
+    try:
+        await redis_client.set_cache("roles:all", {"admin": ["read"]})
+        assert await redis_client.get_from_cache("roles:all") == {"admin": ["read"]}
+        assert redis_client.local_cache.get("roles:all") is not None
+
+        await redis_client.set_cache("roles:all", {"admin": ["read", "write"]})
+        assert redis_client.local_cache.get("roles:all") is None
+        assert await redis_client.get_from_cache("roles:all") == {"admin": ["read", "write"]}
+    finally:
+        redis_client.local_cache._listening = False
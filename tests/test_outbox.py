@@ -0,0 +1,158 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+
+from src.v1.dspace import outbox
+from src.v1.dspace.outbox import OutboxDispatcher
+from src.v1.model import DspaceOutbox, OutboxOperation, OutboxStatus, Role
+from src.v1.model.roles import Role_Enum
+
+
+class FakeGroups():
+    """Stands in for dspace_group_service, records the DSpace writes in order."""
+
+    def __init__(self):
+        self.calls = []
+        self.fail_creates = 0
+
+    async def iter_groups_by_name(self, query, page_size=None):
+        return
+        yield
+
+    async def create_group(self, group_data):
+        if self.fail_creates:
+            self.fail_creates -= 1
+            raise ConnectionError("DSpace is down")
+        self.calls.append(("create", group_data.name))
+        return {"id": f"group-{group_data.name}"}
+
+    async def update_group_name(self, group_id, new_name):
+        self.calls.append(("rename", group_id, new_name))
+
+    async def update_metadata(self, group_id, metadata):
+        self.calls.append(("metadata", group_id))
+
+
+@pytest.fixture
+def groups(monkeypatch, redis):
+    groups = FakeGroups()
+    monkeypatch.setattr(outbox, "dspace_group_service", groups)
+
+    async def bump():
+        pass
+
+    monkeypatch.setattr(outbox.role_group_map, "bump", bump)
+    return groups
+
+
+@pytest.fixture
+def dispatcher():
+    return OutboxDispatcher(batch_size=10, max_attempts=3, retry_delay=60)
+
+
+def ago(minutes: float) -> datetime:
+    return datetime.now(timezone.utc) - timedelta(minutes=minutes)
+
+
+async def add_rows(db, role_name: str, *rows: dict, group_id: str = None):
+    async with db() as session:
+        role = Role(name=role_name, group_id=group_id)
+        session.add(role)
+        await session.flush()
+        for position, row in enumerate(rows):
+            session.add(DspaceOutbox(
+                role_id=role.id,
+                created_at=ago(10 - position),
+                next_attempt_at=ago(5),
+                **row,
+            ))
+        await session.commit()
+        return role.id
+
+
+async def outbox_rows(db, role_id):
+    async with db() as session:
+        result = await session.execute(
+            select(DspaceOutbox).where(DspaceOutbox.role_id == role_id).order_by(DspaceOutbox.created_at)
+        )
+        return result.scalars().all()
+
+
+async def test_rows_of_a_role_apply_in_order(db, groups, dispatcher):
+    role_id = await add_rows(
+        db,
+        Role_Enum.STUDENT,
+        {"operation": OutboxOperation.CREATE_GROUP, "payload": {"name": "Students"}},
+        {"operation": OutboxOperation.UPDATE_GROUP, "payload": {"name": "Students 2"}},
+        {"operation": OutboxOperation.UPDATE_GROUP, "payload": {"name": "Students 3"}},
+    )
+    while await dispatcher.dispatch_batch():
+        pass
+    assert groups.calls == [
+        ("create", "Students"),
+        ("rename", "group-Students", "Students 2"),
+        ("rename", "group-Students", "Students 3"),
+    ]
+    assert [row.status for row in await outbox_rows(db, role_id)] == [OutboxStatus.DONE] * 3
+
+
+async def test_backing_off_row_holds_back_later_rows(db, groups, dispatcher):
+    role_id = await add_rows(
+        db,
+        Role_Enum.STUDENT,
+        {"operation": OutboxOperation.UPDATE_GROUP, "payload": {"name": "First"}},
+        {"operation": OutboxOperation.UPDATE_GROUP, "payload": {"name": "Second"}},
+        group_id="group-1",
+    )
+    first, _ = await outbox_rows(db, role_id)
+    async with db() as session:
+        row = await session.get(DspaceOutbox, first.id)
+        row.attempts = 1
+        row.next_attempt_at = datetime.now(timezone.utc) + timedelta(minutes=5)
+        await session.commit()
+
+    assert await dispatcher.dispatch_batch() == 0
+    assert groups.calls == []
+
+
+async def test_failed_create_holds_back_updates(db, groups, dispatcher):
+    groups.fail_creates = dispatcher.max_attempts
+    role_id = await add_rows(
+        db,
+        Role_Enum.LECTURER,
+        {"operation": OutboxOperation.CREATE_GROUP, "payload": {"name": "Lecturers"}},
+        {"operation": OutboxOperation.UPDATE_GROUP, "payload": {"name": "Lecturers 2"}},
+    )
+    for _ in range(dispatcher.max_attempts):
+        assert await dispatcher.dispatch_batch() == 1
+        async with db() as session:
+            for row in (await session.execute(select(DspaceOutbox))).scalars():
+                row.next_attempt_at = ago(1)
+            await session.commit()
+
+    create, update = await outbox_rows(db, role_id)
+    assert create.status == OutboxStatus.FAILED and create.attempts == dispatcher.max_attempts
+    assert update.status == OutboxStatus.PENDING and update.attempts == 0
+    assert await dispatcher.dispatch_batch() == 0
+    assert groups.calls == []
+
+
+async def test_update_without_a_group_gives_up(db, groups, dispatcher):
+    role_id = await add_rows(
+        db,
+        Role_Enum.ADMIN,
+        {"operation": OutboxOperation.UPDATE_GROUP, "payload": {"name": "Admins"}},
+    )
+    for attempt in range(1, dispatcher.max_attempts + 1):
+        assert await dispatcher.dispatch_batch() == 1
+        (row,) = await outbox_rows(db, role_id)
+        assert row.attempts == attempt
+        async with db() as session:
+            (await session.get(DspaceOutbox, row.id)).next_attempt_at = ago(1)
+            await session.commit()
+
+    (row,) = await outbox_rows(db, role_id)
+    assert row.status == OutboxStatus.FAILED
+    assert "no DSpace group" in row.last_error
+    assert dispatcher.stats["deferred"] == dispatcher.max_attempts
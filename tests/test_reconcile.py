@@ -0,0 +1,126 @@
+import httpx
+import pytest
+
+from src.main import app
+from src.v1.auth.service import auth_service
+from src.v1.dspace import reconcile, route
+from src.v1.dspace.reconcile import MembershipReconciler
+from src.v1.model import Role, User
+from src.v1.model.roles import Role_Enum
+
+
+def eperson(n: int) -> str:
+    return f"{n:08x}-eeee-4eee-8eee-eeeeeeeeeeee"
+
+
+class FakeGroups():
+    """Stands in for dspace_group_service: group members by group id, records the writes."""
+
+    def __init__(self, members: dict):
+        self.members = {group_id: list(ids) for group_id, ids in members.items()}
+        self.added = []
+        self.removed = []
+
+    async def iter_users_in_a_group(self, group_id, page_size=None):
+        for member in self.members.get(group_id, []):
+            yield {"id": member}
+
+    async def link_users_to_group(self, group_id, user_ids, concurrency=None):
+        self.added.extend((group_id, user_id) for user_id in user_ids)
+        return {"linked": list(user_ids), "failed": []}
+
+    async def remove_user_in_a_group(self, group_id, eperson_id):
+        self.removed.append((group_id, eperson_id))
+
+
+async def add_users(db, role_name: str, group_id: str, *numbers: int, deleted: tuple = ()):
+    async with db() as session:
+        role = Role(name=role_name, group_id=group_id)
+        session.add(role)
+        for n in numbers:
+            session.add(User(
+                first_name="Ada",
+                last_name=f"Obi {n}",
+                email=f"user{n}@unical.edu.ng",
+                password="x",
+                dspace_id=eperson(n),
+                dspace_special_group="",
+                is_deleted=n in deleted,
+                roles=[role],
+            ))
+        await session.commit()
+
+
+@pytest.fixture
+def groups(monkeypatch):
+    def use(members: dict) -> FakeGroups:
+        fake = FakeGroups(members)
+        monkeypatch.setattr(reconcile, "dspace_group_service", fake)
+        return fake
+
+    return use
+
+
+async def test_dry_run_reports_the_diff_only(db, groups):
+    await add_users(db, Role_Enum.STUDENT, "students", 1, 2, 3)
+    # 3 is missing, 4 is one of ours in the wrong group, 99 isn't ours at all
+    fake = groups({"students": [eperson(1), eperson(2), eperson(4), eperson(99)]})
+    async with db() as session:
+        session.add(User(
+            first_name="Chidi", last_name="Eze", email="user4@unical.edu.ng", password="x",
+            dspace_id=eperson(4), dspace_special_group="",
+        ))
+        await session.commit()
+
+    result = await MembershipReconciler().reconcile()
+    (group,) = result["groups"]
+    assert (group["wanted"], group["current"], group["unknown"]) == (3, 4, 1)
+    assert (group["add"], group["remove"]) == ([eperson(3)], [eperson(4)])
+    assert fake.added == fake.removed == []
+
+
+async def test_applies_the_diff(db, groups):
+    await add_users(db, Role_Enum.STUDENT, "students", 1, 2, deleted=(2,))
+    await add_users(db, Role_Enum.LECTURER, "lecturers", 3)
+    fake = groups({"students": [eperson(2), eperson(99)], "lecturers": [eperson(3)]})
+
+    result = await MembershipReconciler().reconcile(dry_run=False, remove_unknown=True)
+    assert (result["added"], result["removed"]) == (1, 2)
+    assert fake.added == [("students", eperson(1))]
+    assert sorted(fake.removed) == [("students", eperson(2)), ("students", eperson(99))]
+
+
+async def test_role_filter(db, groups):
+    await add_users(db, Role_Enum.STUDENT, "students", 1)
+    await add_users(db, Role_Enum.LECTURER, "lecturers", 2)
+    groups({})
+    result = await MembershipReconciler().reconcile(roles=[Role_Enum.LECTURER])
+    assert [group["role"] for group in result["groups"]] == [Role_Enum.LECTURER]
+
+
+async def test_route_validates_the_role_filter(db, redis, monkeypatch):
+    async with db() as session:
+        admin = User(
+            first_name="Super", last_name="Admin", email="super@unical.edu.ng", password="x",
+            dspace_id=eperson(100), dspace_special_group="", is_active=True,
+            roles=[Role(name=Role_Enum.SUPER_ADMIN)],
+        )
+        session.add(admin)
+        await session.commit()
+        token = auth_service.create_access_token(user_data={"id": str(admin.id), "email": admin.email})
+
+    seen = []
+
+    async def fake_reconcile(dry_run, roles, remove_unknown):
+        seen.append(roles)
+        return {"groups": []}
+
+    monkeypatch.setattr(route.membership_reconciler, "reconcile", fake_reconcile)
+    url = "/api/v1/dspace/reconcile-memberships"
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        assert (await client.post(url, params={"role": "student"})).status_code == 401
+        headers = {"Authorization": f"Bearer {token}"}
+        assert (await client.post(url, params={"role": "librarian"}, headers=headers)).status_code == 422
+        response = await client.post(url, params=[("role", "student"), ("role", "lecturer")], headers=headers)
+    assert response.status_code == 200
+    assert seen == [[Role_Enum.STUDENT, Role_Enum.LECTURER]]
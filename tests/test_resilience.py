@@ -0,0 +1,142 @@
+import asyncio
+
+import aiohttp
+import pytest
+
+from src.v1.base.exception import DSpaceUnavailable
+from src.v1.dspace import resilience
+from src.v1.dspace.resilience import AdaptiveLimiter, CircuitBreaker, CircuitState, DspaceResilience
+
+
+class Clock():
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(resilience.time, "monotonic", clock)
+    return clock
+
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker("eperson/groups", failure_threshold=3, recovery_timeout=30)
+
+
+def open_breaker(breaker: CircuitBreaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.before_call()
+        breaker.record_failure()
+
+
+def test_opens_after_threshold(breaker):
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record_failure()
+    assert breaker.state == CircuitState.CLOSED
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == CircuitState.OPEN
+
+
+def test_success_resets_the_count(breaker):
+    for _ in range(2):
+        breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitState.CLOSED
+    assert breaker.failures == 1
+
+
+def test_open_rejects(breaker, clock):
+    open_breaker(breaker)
+    clock.now += 29
+    with pytest.raises(DSpaceUnavailable):
+        breaker.before_call()
+    assert breaker.rejected == 1
+
+
+def test_half_open_probe_success_closes(breaker, clock):
+    open_breaker(breaker)
+    clock.now += 30
+    breaker.before_call()
+    assert breaker.state == CircuitState.HALF_OPEN
+    # only one probe at a time
+    with pytest.raises(DSpaceUnavailable):
+        breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == CircuitState.CLOSED
+    breaker.before_call()
+
+
+def test_half_open_probe_failure_reopens(breaker, clock):
+    open_breaker(breaker)
+    clock.now += 30
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == CircuitState.OPEN
+    assert breaker.opened_at == clock.now
+    clock.now += 29
+    with pytest.raises(DSpaceUnavailable):
+        breaker.before_call()
+
+
+def test_cancelled_probe_gives_its_slot_back(breaker, clock):
+    open_breaker(breaker)
+    clock.now += 30
+    breaker.before_call()
+    breaker.cancel_call()
+    assert breaker.state == CircuitState.HALF_OPEN
+    breaker.before_call()
+    assert breaker.probes == 1
+
+
+async def test_guard_only_counts_overload_errors(clock):
+    dspace = DspaceResilience()
+    endpoint = "eperson/groups/1/epersons"
+    rejected = aiohttp.ClientResponseError(None, (), status=422)
+    for _ in range(10):
+        with pytest.raises(aiohttp.ClientResponseError):
+            async with dspace.guard(endpoint):
+                raise rejected
+    assert not dspace.overloaded(endpoint)
+
+    overloaded = aiohttp.ClientResponseError(None, (), status=503)
+    for _ in range(dspace.breakers["eperson/groups"].failure_threshold):
+        with pytest.raises(aiohttp.ClientResponseError):
+            async with dspace.guard(endpoint):
+                raise overloaded
+    assert dspace.overloaded(endpoint)
+    with pytest.raises(DSpaceUnavailable):
+        async with dspace.guard(endpoint):
+            pass
+    assert dspace.limiters["eperson/groups"].in_flight == 0
+
+
+async def test_limiter_decreases_once_per_window():
+    limiter = AdaptiveLimiter("core/items", initial=20, min_limit=1, max_limit=100, latency_target=1, queue_timeout=1)
+    for _ in range(20):
+        await limiter.acquire()
+    for _ in range(20):
+        await limiter.release(0.1, overloaded=True)
+    assert limiter.limit == 10
+    for _ in range(10):
+        await limiter.acquire()
+        await limiter.release(0.1, overloaded=True)
+    assert limiter.limit == 5
+
+
+async def test_limiter_grows_and_queues():
+    limiter = AdaptiveLimiter("core/items", initial=1, min_limit=1, max_limit=2, latency_target=1, queue_timeout=0.01)
+    await limiter.acquire()
+    with pytest.raises(DSpaceUnavailable):
+        await limiter.acquire()
+    await limiter.release(0.1, overloaded=False)
+    assert limiter.limit == 2
+    await asyncio.gather(limiter.acquire(), limiter.acquire())
+    assert limiter.in_flight == 2
@@ -0,0 +1,83 @@
+import asyncio
+import time
+
+import pytest
+
+from src.utils.redis_client import REVOKED, cache_key
+from src.v1.auth.revocation import INDEX_KEY, STREAM_KEY, BloomFilter, RevocationFilter
+
+
+def test_bloom_sizing():
+    bloom = BloomFilter(100_000, 0.001)
+    assert len(bloom.bits) == 179_720
+    assert bloom.hashes == 10
+
+
+def test_bloom_has_no_false_negatives_and_keeps_its_rate():
+    bloom = BloomFilter(10_000, 0.01)
+    for n in range(10_000):
+        bloom.add(f"revoked-{n}")
+    assert all(f"revoked-{n}" in bloom for n in range(10_000))
+    false_positives = sum(f"valid-{n}" in bloom for n in range(20_000))
+    assert false_positives / 20_000 < 0.02
+    assert bloom.expected_fp_rate() == pytest.approx(0.01, rel=0.1)
+
+
+async def test_unbuilt_filter_checks_redis(redis):
+    revocations = RevocationFilter(capacity=100)
+    await redis.set(cache_key(REVOKED, "jti-1"), "")
+    assert await revocations.is_revoked("jti-1")
+    assert not await revocations.is_revoked("jti-2")
+    assert revocations.stats["skipped"] == 0
+
+
+async def test_revoke_then_rebuild(redis):
+    revocations = RevocationFilter(capacity=100)
+    await revocations.rebuild()
+    await revocations.revoke("jti-1", time.time() + 3600)
+    assert await revocations.is_revoked("jti-1")
+    assert not await revocations.is_revoked("jti-2")
+    assert revocations.stats["skipped"] == 1
+
+    await revocations.rebuild()
+    assert await revocations.is_revoked("jti-1")
+    assert await redis.zscore(INDEX_KEY, "jti-1") is not None
+
+
+async def test_rebuild_drops_expired_jtis(redis):
+    await redis.zadd(INDEX_KEY, {"expired": time.time() - 1, "live": time.time() + 3600})
+    revocations = RevocationFilter(capacity=100)
+    await revocations.rebuild()
+    assert await redis.zrange(INDEX_KEY, 0, -1) == ["live"]
+    assert revocations.snapshot()["items"] == 1
+
+
+async def test_other_worker_learns_of_revocation_from_the_stream(redis):
+    worker, other = RevocationFilter(capacity=100), RevocationFilter(capacity=100, block_ms=10)
+    await worker.rebuild()
+    other.start()
+    try:
+        while not other._ready:
+            await asyncio.sleep(0.01)
+        await worker.revoke("jti-1", time.time() + 3600)
+        for _ in range(200):
+            if other.stats["streamed"]:
+                break
+            await asyncio.sleep(0.01)
+        assert other.stats["streamed"] == 1
+        assert await other.is_revoked("jti-1")
+        assert other.stats["confirmed"] == 1
+        assert not await other.is_revoked("jti-2")
+    finally:
+        await other.stop()
+
+
+async def test_revocation_made_during_rebuild_is_replayed(redis):
+    revocations = RevocationFilter(capacity=100)
+    await revocations.revoke("jti-1", time.time() + 3600)
+    last_id = await revocations.rebuild()
+    await revocations.revoke("jti-2", time.time() + 3600)
+
+    entries = await redis.xread({STREAM_KEY: last_id}, count=1000)
+    replayed = [fields["jti"] for _, messages in entries for _, fields in messages]
+    assert replayed == ["jti-2"]
@@ -0,0 +1,215 @@
+import asyncio
+import hashlib
+import uuid
+
+import pytest
+from sqlalchemy import select
+
+from src.v1.base.exception import BadRequest, TooManyRequests
+from src.v1.model import Resource, User
+from src.v1.resource import service
+from src.v1.resource.multipart import MultipartFileStream, multipart_boundary
+from src.v1.resource.service import ResourceService, UploadLimiter
+
+BOUNDARY = "upload-boundary"
+CONTENT_TYPE = f"multipart/form-data; boundary={BOUNDARY}"
+
+
+def multipart(content: bytes, fields: dict = None, filename: str = "thesis.pdf", trailing: dict = None) -> bytes:
+    def part(name: str, value: bytes, extra: str = "") -> bytes:
+        return (
+            f"--{BOUNDARY}\r\nContent-Disposition: form-data; name=\"{name}\"{extra}\r\n\r\n".encode()
+            + value + b"\r\n"
+        )
+
+    body = b"".join(part(name, value.encode()) for name, value in (fields or {}).items())
+    body += part("file", content, f"; filename=\"{filename}\"\r\nContent-Type: application/pdf")
+    body += b"".join(part(name, value.encode()) for name, value in (trailing or {}).items())
+    return body + f"--{BOUNDARY}--\r\n".encode()
+
+
+async def stream(body: bytes, size: int = 1000):
+    for offset in range(0, len(body), size):
+        yield body[offset:offset + size]
+
+
+def reader(body: bytes, chunk_size: int = 4096, max_bytes: int = 1 << 20, size: int = 1000) -> MultipartFileStream:
+    return MultipartFileStream(stream(body, size), multipart_boundary(CONTENT_TYPE), chunk_size, max_bytes)
+
+
+# ============ MultipartFileStream ============
+async def test_streams_the_file_in_bounded_chunks():
+    content = bytes(range(256)) * 200
+    upload = reader(multipart(content, {"name": "My thesis"}, trailing={"note": "after"}), chunk_size=4096)
+    await upload.open()
+    assert upload.fields == {"name": "My thesis"}
+    assert (upload.filename, upload.content_type) == ("thesis.pdf", "application/pdf")
+
+    chunks = [chunk async for chunk in upload]
+    await upload.finish()
+    assert b"".join(chunks) == content
+    # a chunk is handed out once chunk_size is buffered, plus whatever one body read added
+    assert max(len(chunk) for chunk in chunks) < 4096 + 1000
+    assert upload.size == len(content)
+    assert upload.checksums == {
+        "md5": hashlib.md5(content).hexdigest(),
+        "sha256": hashlib.sha256(content).hexdigest(),
+    }
+    assert upload.fields["note"] == "after"
+
+
+def test_rejects_other_content_types():
+    with pytest.raises(BadRequest):
+        multipart_boundary("application/json")
+
+
+async def test_rejects_files_over_the_limit():
+    upload = reader(multipart(b"x" * 5000), max_bytes=4000)
+    await upload.open()
+    with pytest.raises(BadRequest):
+        async for _ in upload:
+            pass
+    assert isinstance(upload.error, BadRequest)
+
+
+async def test_rejects_a_body_without_a_file():
+    body = f"--{BOUNDARY}\r\nContent-Disposition: form-data; name=\"name\"\r\n\r\nx\r\n--{BOUNDARY}--\r\n".encode()
+    with pytest.raises(BadRequest):
+        await reader(body).open()
+
+
+async def test_rejects_a_truncated_body():
+    upload = reader(multipart(b"x" * 5000)[:3000])
+    await upload.open()
+    with pytest.raises(BadRequest):
+        async for _ in upload:
+            pass
+
+
+async def test_rejects_a_second_file():
+    body = multipart(b"one")[:-len(f"--{BOUNDARY}--\r\n")] + multipart(b"two", filename="other.pdf")
+    upload = reader(body, size=64)
+    with pytest.raises(BadRequest):
+        await upload.open()
+        async for _ in upload:
+            pass
+        await upload.finish()
+
+
+# ============ UploadLimiter ============
+async def test_limits_uploads_per_user(redis):
+    limiter = UploadLimiter(per_worker=10, per_user=1, queue_timeout=1)
+    async with limiter.slot("user-1"):
+        with pytest.raises(TooManyRequests):
+            async with limiter.slot("user-1"):
+                pass
+        async with limiter.slot("user-2"):
+            assert limiter.active == 2
+    assert await redis.get(UploadLimiter.user_key("user-1")) == "0"
+    assert limiter.stats["rejected_user"] == 1
+
+
+async def test_queues_uploads_per_worker(redis):
+    limiter = UploadLimiter(per_worker=1, per_user=10, queue_timeout=0.05)
+    async with limiter.slot("user-1"):
+        with pytest.raises(TooManyRequests):
+            async with limiter.slot("user-2"):
+                pass
+
+    release = asyncio.Event()
+
+    async def hold():
+        async with limiter.slot("user-1"):
+            await release.wait()
+
+    holder = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+    asyncio.get_running_loop().call_later(0.01, release.set)
+    async with limiter.slot("user-2"):
+        assert limiter.active == 1
+    await holder
+
+
+# ============ ResourceService.upload_bitstream ============
+class FakeRequest():
+    def __init__(self, body: bytes):
+        self.headers = {"content-type": CONTENT_TYPE}
+        self._body = body
+
+    def stream(self):
+        return stream(self._body)
+
+
+class FakeDspace():
+    def __init__(self, checksum: str = None):
+        self.received = b""
+        self.checksum = checksum
+        self.deleted = []
+
+    async def upload_bitstream(self, endpoint, chunks, filename, content_type, properties, **kwargs):
+        async for chunk in chunks:
+            self.received += chunk
+        md5 = self.checksum or hashlib.md5(self.received).hexdigest()
+        return {"id": str(uuid.uuid4()), "checkSum": {"checkSumAlgorithm": "MD5", "value": md5}}, {}
+
+    async def _make_request(self, http_method, endpoint, **kwargs):
+        self.deleted.append(endpoint)
+
+
+@pytest.fixture
+def dspace(monkeypatch, redis):
+    async def is_authorized(feature, object_endpoint, eperson_id=None):
+        return True
+
+    async def get_tokens():
+        return {"jwt_token": "jwt", "DSPACE-XSRF-TOKEN": "csrf"}
+
+    monkeypatch.setattr(service.dspace_authz_service, "is_authorized", is_authorized)
+    monkeypatch.setattr(service.admin_token_provider, "get_tokens", get_tokens)
+
+    def use(fake: FakeDspace) -> FakeDspace:
+        monkeypatch.setattr(service, "dspace_client", fake)
+        return fake
+
+    return use
+
+
+async def add_user(db) -> User:
+    async with db() as session:
+        user = User(
+            first_name="Ada",
+            last_name="Obi",
+            email="ada@unical.edu.ng",
+            password="x",
+            dspace_id=str(uuid.uuid4()),
+            dspace_special_group="",
+        )
+        session.add(user)
+        await session.commit()
+        return user
+
+
+async def test_upload_records_the_resource(db, redis, dspace):
+    fake = dspace(FakeDspace())
+    user = await add_user(db)
+    content = b"%PDF" + b"x" * 100_000
+    bundle_id = str(uuid.uuid4())
+    async with db() as session:
+        resource = await ResourceService(session).upload_bitstream(
+            bundle_id, FakeRequest(multipart(content, {"name": "Final thesis"})), user
+        )
+    assert fake.received == content
+    assert (resource.filename, resource.size_bytes, resource.bundle_id) == ("Final thesis", len(content), bundle_id)
+    assert resource.checksum_md5 == hashlib.md5(content).hexdigest()
+    assert resource.checksum_sha256 == hashlib.sha256(content).hexdigest()
+    assert await redis.get(UploadLimiter.user_key(str(user.id))) == "0"
+
+
+async def test_upload_with_a_checksum_mismatch_is_deleted(db, dspace):
+    fake = dspace(FakeDspace(checksum="0" * 32))
+    user = await add_user(db)
+    async with db() as session:
+        with pytest.raises(BadRequest):
+            await ResourceService(session).upload_bitstream(str(uuid.uuid4()), FakeRequest(multipart(b"data")), user)
+        assert (await session.execute(select(Resource))).scalars().all() == []
+    assert len(fake.deleted) == 1
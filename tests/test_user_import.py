@@ -0,0 +1,155 @@
+import csv
+
+import pytest
+from sqlalchemy import select
+
+from src.v1.base.exception import DSpaceError, NotFoundError
+from src.v1.model import Role, User
+from src.v1.model.roles import Role_Enum
+from src.v1.service import user_import
+from src.v1.service.user_import import UserImport
+
+FIELDS = ["user_name", "email", "first_name", "last_name", "password", "role"]
+
+
+def row(n: int, role: str = "student", **overrides) -> dict:
+    return {
+        "user_name": f"user{n}",
+        "email": f"User{n}@unical.edu.ng",
+        "first_name": "Ada",
+        "last_name": f"Obi {n}",
+        "password": "secret",
+        "role": role,
+        **overrides,
+    }
+
+
+def write_csv(path, rows) -> str:
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+    return str(path)
+
+
+class FakeDspace():
+    """dspace_auth_service and dspace_group_service in one: epersons by email, group links by role."""
+
+    def __init__(self):
+        self.epersons = {}
+        self.links = {}
+        self.fail_links = set()
+        self.crash_on_link = None
+
+    async def register(self, user):
+        if user.email in self.epersons:
+            raise DSpaceError("eperson already exists", status=422)
+        eperson_id = f"{len(self.epersons) + 1:08x}-eeee-4eee-8eee-eeeeeeeeeeee"
+        self.epersons[user.email] = eperson_id
+        return {"id": eperson_id}
+
+    async def find_eperson_by_email(self, email):
+        return {"id": self.epersons[email]} if email in self.epersons else None
+
+    async def link_users_to_role_group(self, role_name, user_ids, concurrency=None):
+        if role_name == self.crash_on_link:
+            raise RuntimeError("worker killed")
+        if role_name == Role_Enum.LECTURER:
+            raise NotFoundError("role 'lecturer' has no DSpace group")
+        linked = [user_id for user_id in user_ids if user_id not in self.fail_links]
+        self.links.setdefault(role_name, []).extend(linked)
+        return {
+            "linked": linked,
+            "failed": [{"user_id": user_id, "error": "rejected"} for user_id in user_ids if user_id in self.fail_links],
+        }
+
+
+@pytest.fixture
+async def dspace(monkeypatch, db, redis):
+    fake = FakeDspace()
+    monkeypatch.setattr(user_import, "dspace_auth_service", fake)
+    monkeypatch.setattr(user_import, "dspace_group_service", fake)
+    # bcrypt is slow on purpose, the tests don't need it
+    monkeypatch.setattr(user_import, "password_hash", lambda password: f"hashed:{password}")
+    async with db() as session:
+        session.add_all([Role(name=Role_Enum.STUDENT), Role(name=Role_Enum.LECTURER), Role(name=Role_Enum.ADMIN)])
+        await session.commit()
+    return fake
+
+
+async def users(db) -> dict:
+    async with db() as session:
+        return {user.email: user for user in (await session.execute(select(User))).scalars()}
+
+
+async def test_imports_valid_rows_and_reports_the_rest(tmp_path, db, dspace):
+    path = write_csv(tmp_path / "users.csv", [
+        row(1),
+        row(2),
+        row(3, email="USER1@unical.edu.ng"),  # duplicate of row 1 in the same batch
+        row(4, role="librarian"),  # not a role at all
+        row(5, role="super_admin"),  # a role with no row in the roles table
+        row(6),
+    ])
+    report = await UserImport(path, batch_size=3, batch_pause=0).run()
+
+    assert (report["imported"], report["skipped"], report["failed"], report["last_row"]) == (3, 0, 3, 6)
+    failures = {error["row"]: error for error in report["errors"]}
+    assert sorted(failures) == [3, 4, 5]
+    assert failures[3]["error"] == "duplicate of row 1"
+    assert failures[4]["error"].startswith("role: ")
+    assert failures[5]["error"] == "role 'super_admin' does not exist"
+
+    imported = await users(db)
+    assert sorted(imported) == ["user1@unical.edu.ng", "user2@unical.edu.ng", "user6@unical.edu.ng"]
+    assert imported["user1@unical.edu.ng"].password == "hashed:secret"
+    assert sorted(dspace.links[Role_Enum.STUDENT]) == sorted(user.dspace_id for user in imported.values())
+
+    # the same file again finds the finished checkpoint and does nothing
+    again = await UserImport(path, batch_size=3, batch_pause=0).run()
+    assert again["rows_this_run"] == 0 and again["imported"] == 3
+
+
+async def test_resumes_after_a_crash(tmp_path, db, dspace):
+    path = write_csv(tmp_path / "users.csv", [row(1), row(2), row(3, role="admin"), row(4, role="admin")])
+    dspace.crash_on_link = Role_Enum.ADMIN
+    with pytest.raises(RuntimeError):
+        await UserImport(path, batch_size=2, batch_pause=0).run()
+    job = UserImport(path, batch_size=2, batch_pause=0)
+    assert (await job.checkpoint())["row"] == 2
+
+    dspace.crash_on_link = None
+    report = await job.run()
+    assert report["resumed_from_row"] == 2
+    # the crashed run had inserted rows 3 and 4, the replay links them without creating them again
+    assert (report["imported"], report["skipped"], report["failed"]) == (2, 2, 0)
+    assert len(dspace.links[Role_Enum.ADMIN]) == 2
+    assert len(dspace.epersons) == 4
+
+
+async def test_reuses_an_eperson_left_by_a_crashed_run(tmp_path, db, dspace):
+    dspace.epersons["user1@unical.edu.ng"] = "0000abcd-eeee-4eee-8eee-eeeeeeeeeeee"
+    report = await UserImport(write_csv(tmp_path / "users.csv", [row(1)]), batch_pause=0).run()
+    assert report["imported"] == 1
+    assert (await users(db))["user1@unical.edu.ng"].dspace_id == "0000abcd-eeee-4eee-8eee-eeeeeeeeeeee"
+
+
+async def test_existing_users_are_only_linked_to_roles_they_hold(tmp_path, db, dspace):
+    await UserImport(write_csv(tmp_path / "first.csv", [row(1), row(2)]), batch_pause=0).run()
+    dspace.links.clear()
+
+    # the same people again, one of them asking for the admin role
+    report = await UserImport(write_csv(tmp_path / "second.csv", [row(1), row(2, role="admin")]), batch_pause=0).run()
+    assert (report["imported"], report["skipped"]) == (0, 2)
+    existing = await users(db)
+    assert dspace.links == {Role_Enum.STUDENT: [existing["user1@unical.edu.ng"].dspace_id]}
+    assert [role.name for role in existing["user2@unical.edu.ng"].roles] == [Role_Enum.STUDENT]
+
+
+async def test_link_failures_count_as_failed(tmp_path, db, dspace):
+    dspace.fail_links.add("00000001-eeee-4eee-8eee-eeeeeeeeeeee")
+    report = await UserImport(
+        write_csv(tmp_path / "users.csv", [row(1), row(2), row(3, role="lecturer")]), batch_pause=0
+    ).run()
+    assert (report["imported"], report["failed"]) == (3, 2)
+    assert sorted((error["row"], error["stage"]) for error in report["errors"]) == [(1, "link"), (3, "link")]